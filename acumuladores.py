@@ -0,0 +1,483 @@
+"""
+ACUMULADORES COMBINABLES PARA ANÁLISIS POR BLOQUES
+=========================================================
+
+Permite analizar archivos CSV más grandes que la memoria disponible:
+el archivo se lee en bloques de tamaño fijo y cada bloque se incorpora a
+un conjunto de acumuladores que luego se pueden combinar entre sí.
+
+- Momentos (Welford/Chan): media, varianza, desviación estándar y CV
+- Extremos: mínimo y máximo
+- Conteo de valores: moda y cuantiles exactos en columnas de baja cardinalidad
+- Sketch KLL: cuantiles aproximados en columnas de alta cardinalidad
+- Co-momentos por pares: matriz de correlación de Pearson
+- Conteos conjuntos: Rho de Spearman y tabla de contingencia (Chi-cuadrado)
+
+Los resultados coinciden con los del análisis en memoria (PASOS 4 a 9).
+Excepción: en los pares de columnas con demasiados valores distintos
+(columnas continuas) el conteo conjunto se agrupa en intervalos de
+cuantiles y el Rho de Spearman pasa a ser aproximado (se avisa con un
+warning).
+"""
+
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from correlaciones import NIVEL_CONFIANZA, p_valores_correlacion, resultado_correlacion
+from cuantiles import ERROR_CUANTILES, SketchKLL
+from estadisticas import ResumenDescriptivo
+
+# Número de filas que se leen del CSV en cada bloque
+TAMANO_BLOQUE = 100_000
+
+# Máximo de valores distintos (o celdas, en los conteos conjuntos) que se
+# guardan antes de descartar un conteo exacto para no crecer sin límite
+LIMITE_CARDINALIDAD = 10_000
+
+# Intervalos por columna del conteo conjunto agrupado (Spearman aproximado)
+INTERVALOS_SPEARMAN = 100
+
+# Filas iniciales que se conservan para mostrar (PASO 2)
+FILAS_MUESTRA = 10
+
+
+class Momentos:
+    """Conteo, media y suma de cuadrados centrada (M2) de k columnas,
+    actualizados con el algoritmo de Welford/Chan."""
+
+    def __init__(self, k):
+        self.n = np.zeros(k)
+        self.media = np.zeros(k)
+        self.m2 = np.zeros(k)
+
+    def actualizar(self, datos):
+        validos = ~np.isnan(datos)
+        n = validos.sum(axis=0).astype(np.float64)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            media = np.nansum(datos, axis=0) / n
+            m2 = (np.where(validos, datos - media, 0.0) ** 2).sum(axis=0)
+        self._combinar(n, media, m2)
+
+    def combinar(self, otro):
+        self._combinar(otro.n, otro.media, otro.m2)
+        return self
+
+    def _combinar(self, n_b, media_b, m2_b):
+        n = self.n + n_b
+        hay_datos = n_b > 0
+        with np.errstate(divide='ignore', invalid='ignore'):
+            delta = media_b - self.media
+            peso = n_b / n
+            self.m2 = np.where(hay_datos, self.m2 + m2_b + delta ** 2 * self.n * peso, self.m2)
+            self.media = np.where(hay_datos, self.media + delta * peso, self.media)
+        self.n = n
+
+    @property
+    def varianza(self):
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(self.n > 1, self.m2 / (self.n - 1), np.nan)
+
+
+class Extremos:
+    """Mínimo y máximo de k columnas (se ignoran los NaN)."""
+
+    def __init__(self, k):
+        self.minimo = np.full(k, np.nan)
+        self.maximo = np.full(k, np.nan)
+
+    def actualizar(self, datos):
+        if len(datos):
+            self.minimo = np.fmin(self.minimo, np.fmin.reduce(datos, axis=0))
+            self.maximo = np.fmax(self.maximo, np.fmax.reduce(datos, axis=0))
+
+    def combinar(self, otro):
+        self.minimo = np.fmin(self.minimo, otro.minimo)
+        self.maximo = np.fmax(self.maximo, otro.maximo)
+        return self
+
+
+class ConteoValores:
+    """Frecuencia exacta de cada valor de una columna. Si la columna supera
+    `limite` valores distintos el conteo se descarta (`desbordado`)."""
+
+    def __init__(self, limite=LIMITE_CARDINALIDAD):
+        self.limite = limite
+        self.conteos = pd.Series(dtype=np.int64)
+        self.desbordado = False
+
+    def actualizar(self, valores):
+        if not self.desbordado:
+            unicos, repeticiones = np.unique(valores[~np.isnan(valores)], return_counts=True)
+            self._sumar(pd.Series(repeticiones, index=unicos))
+
+    def combinar(self, otro):
+        if otro.desbordado:
+            self.desbordado, self.conteos = True, None
+        else:
+            self._sumar(otro.conteos)
+        return self
+
+    def _sumar(self, conteos):
+        if self.desbordado:
+            return
+        total = self.conteos.add(conteos, fill_value=0).astype(np.int64)
+        if len(total) > self.limite:
+            self.desbordado, self.conteos = True, None
+        else:
+            self.conteos = total.sort_index()
+
+    @property
+    def exacto(self):
+        return not self.desbordado
+
+    def moda(self):
+        """Valor más frecuente; ante empates el menor (igual que pandas)."""
+        if not self.exacto or self.conteos.empty:
+            return np.nan
+        return float(self.conteos.index[np.argmax(self.conteos.to_numpy())])
+
+    def cuantil(self, q):
+        """Cuantil exacto con interpolación lineal, como `Series.quantile`."""
+        if not self.exacto or self.conteos.empty:
+            return np.nan
+        valores = self.conteos.index.to_numpy(dtype=np.float64)
+        acumulado = np.cumsum(self.conteos.to_numpy())
+        n = acumulado[-1]
+        posicion = (n - 1) * q
+        inferior = int(np.floor(posicion))
+        superior = min(inferior + 1, n - 1)
+        bajo = valores[np.searchsorted(acumulado, inferior, side='right')]
+        alto = valores[np.searchsorted(acumulado, superior, side='right')]
+        return bajo + (alto - bajo) * (posicion - inferior)
+
+
+class ConteoConjunto:
+    """Frecuencias conjuntas de dos columnas (como `pd.crosstab`), guardadas
+    como serie con índice (valor_a, valor_b). Si se superan `limite` celdas
+    el conteo se descarta (`conteos = None`), salvo que se indiquen
+    `intervalos`: entonces cada columna se agrupa en hasta `intervalos`
+    intervalos de cuantiles (`agrupado`) y el índice guarda el límite
+    inferior de cada intervalo."""
+
+    def __init__(self, columna_a, columna_b, limite=LIMITE_CARDINALIDAD, intervalos=None):
+        self.columna_a = columna_a
+        self.columna_b = columna_b
+        self.limite = limite
+        self.intervalos = intervalos
+        self.conteos = None
+        self.desbordado = False
+        self.limites = None  # Límites inferiores de los intervalos de cada columna
+
+    @property
+    def agrupado(self):
+        return self.limites is not None
+
+    def actualizar(self, bloque):
+        if self.desbordado:
+            return
+        if self.agrupado:
+            bloque = bloque[[self.columna_a, self.columna_b]].dropna()
+            bloque = pd.DataFrame({
+                columna: self._agrupar_valores(bloque[columna].to_numpy(dtype=np.float64), nivel)
+                for nivel, columna in enumerate((self.columna_a, self.columna_b))
+            })
+        self._sumar(bloque.groupby([self.columna_a, self.columna_b]).size())
+
+    def combinar(self, otro):
+        if otro.desbordado:
+            self.desbordado, self.conteos, self.limites = True, None, None
+        elif otro.conteos is not None:
+            if otro.agrupado and not self.agrupado and not self.desbordado:
+                self.limites = otro.limites
+                if self.conteos is not None:
+                    self.conteos = self._agrupar(self.conteos)
+            self._sumar(otro.conteos)
+        return self
+
+    def _sumar(self, conteos):
+        if self.desbordado:
+            return
+        if self.agrupado:
+            conteos = self._agrupar(conteos)
+        if self.conteos is not None:
+            conteos = self.conteos.add(conteos, fill_value=0).astype(np.int64)
+        if len(conteos) > self.limite and not self.agrupado:
+            if self.intervalos is None:
+                self.desbordado, self.conteos = True, None
+                return
+            self.limites = [self._limites_intervalos(conteos, nivel) for nivel in (0, 1)]
+            conteos = self._agrupar(conteos)
+        self.conteos = conteos.sort_index()
+
+    def _limites_intervalos(self, conteos, nivel):
+        # Límites en los cuantiles i / intervalos de la distribución marginal
+        marginal = conteos.groupby(level=nivel).sum().sort_index()
+        valores = marginal.index.to_numpy(dtype=np.float64)
+        if len(valores) <= self.intervalos:
+            return valores
+        acumulado = np.cumsum(marginal.to_numpy())
+        posiciones = np.searchsorted(acumulado, np.arange(self.intervalos) * acumulado[-1] / self.intervalos,
+                                     side='right')
+        return np.unique(valores[posiciones])
+
+    def _agrupar_valores(self, valores, nivel):
+        limites = self.limites[nivel]
+        return limites[np.clip(np.searchsorted(limites, valores, side='right') - 1, 0, len(limites) - 1)]
+
+    def _agrupar(self, conteos):
+        """Reasigna los conteos (exactos o de otros intervalos) a los
+        intervalos propios, por el valor de su índice."""
+        return conteos.groupby([
+            self._agrupar_valores(conteos.index.get_level_values(nivel).to_numpy(dtype=np.float64), nivel)
+            for nivel in (0, 1)
+        ]).sum().astype(np.int64)
+
+    def tabla(self):
+        """Tabla de contingencia con la misma forma que `pd.crosstab`."""
+        if self.conteos is None:
+            return pd.DataFrame()
+        tabla = self.conteos.unstack(fill_value=0).astype(np.int64)
+        tabla.index.name = self.columna_a
+        tabla.columns.name = self.columna_b
+        return tabla
+
+    def spearman(self):
+        """Rho de Spearman a partir de los conteos conjuntos: cada valor
+        recibe su rango promedio (empates) y se calcula Pearson ponderado.
+        Si el conteo está `agrupado` cada intervalo cuenta como un empate y
+        el resultado es aproximado."""
+        if self.conteos is None or self.conteos.empty:
+            return np.nan, 0
+        pesos = self.conteos.to_numpy(dtype=np.float64)
+        n = pesos.sum()
+        centro = (n + 1) / 2
+        rangos = []
+        marginales = []
+        for nivel in (0, 1):
+            marginal = self.conteos.groupby(level=nivel).sum().sort_index()
+            rango_medio = np.cumsum(marginal.to_numpy()) - (marginal.to_numpy() - 1) / 2
+            rango_medio = pd.Series(rango_medio, index=marginal.index)
+            rangos.append(rango_medio.reindex(self.conteos.index.get_level_values(nivel)).to_numpy() - centro)
+            marginales.append(((rango_medio.to_numpy() - centro) ** 2 * marginal.to_numpy()).sum())
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rho = (pesos * rangos[0] * rangos[1]).sum() / np.sqrt(marginales[0] * marginales[1])
+        return float(np.clip(rho, -1, 1)), int(n)
+
+
+class CoMomentos:
+    """Co-momentos por pares de k columnas, como `df.corr()` (cada par usa
+    las filas donde ambas columnas tienen valor). Para cada par (i, j) se
+    guarda el conteo, la media de i, M2 de i y el co-momento de i con j."""
+
+    def __init__(self, k):
+        self.n = np.zeros((k, k))
+        self.media = np.zeros((k, k))
+        self.m2 = np.zeros((k, k))
+        self.c = np.zeros((k, k))
+
+    def actualizar(self, datos):
+        validos = ~np.isnan(datos)
+        mascara = validos.astype(np.float64)
+        # Centrar el bloque mejora la estabilidad numérica de las sumas
+        with np.errstate(divide='ignore', invalid='ignore'):
+            centro = np.nan_to_num(np.nansum(datos, axis=0) / validos.sum(axis=0))
+            x = np.where(validos, datos - centro, 0.0)
+            n = mascara.T @ mascara
+            suma = x.T @ mascara
+            media = suma / n
+            m2 = (x * x).T @ mascara - suma * media
+            c = x.T @ x - suma * media.T
+        self._combinar(n, media + centro[:, None], m2, c)
+
+    def combinar(self, otro):
+        self._combinar(otro.n, otro.media, otro.m2, otro.c)
+        return self
+
+    def _combinar(self, n_b, media_b, m2_b, c_b):
+        n = self.n + n_b
+        hay_datos = n_b > 0
+        with np.errstate(divide='ignore', invalid='ignore'):
+            delta = media_b - self.media
+            factor = self.n * n_b / n
+            self.c = np.where(hay_datos, self.c + c_b + delta * delta.T * factor, self.c)
+            self.m2 = np.where(hay_datos, self.m2 + m2_b + delta ** 2 * factor, self.m2)
+            self.media = np.where(hay_datos, self.media + delta * n_b / n, self.media)
+        self.n = n
+
+    def correlacion(self):
+        with np.errstate(divide='ignore', invalid='ignore'):
+            r = self.c / np.sqrt(self.m2 * self.m2.T)
+        r = np.where(self.n > 1, np.clip(r, -1, 1), np.nan)
+        diagonal = np.diag_indices_from(r)
+        r[diagonal] = np.where(np.isnan(r[diagonal]), np.nan, 1.0)
+        return r
+
+
+class EstadoAnalisis:
+    """Estado combinable de todo el análisis (PASOS 3 a 9) de un conjunto
+    de bloques. `actualizar` incorpora un bloque del CSV y `combinar`
+    fusiona el estado de otro conjunto de bloques."""
+
+    def __init__(self, variables, par_contingencia=('Nivel_Socioeconomico', 'Aprobado'),
+                 limite_cardinalidad=LIMITE_CARDINALIDAD, error_cuantiles=ERROR_CUANTILES):
+        self.variables = list(variables)
+        self.par_contingencia = par_contingencia
+        k = len(self.variables)
+        self.n_registros = 0
+        self.nulos = None
+        self.muestra = None
+        self.momentos = Momentos(k)
+        self.extremos = Extremos(k)
+        self.comomentos = CoMomentos(k)
+        self.conteos = [ConteoValores(limite_cardinalidad) for _ in self.variables]
+        self.sketches = [SketchKLL(error_cuantiles) for _ in self.variables]
+        self.conjuntos = {
+            (a, b): ConteoConjunto(a, b, limite_cardinalidad, INTERVALOS_SPEARMAN)
+            for i, a in enumerate(self.variables) for b in self.variables[i + 1:]
+        }
+        self.contingencia = ConteoConjunto(*par_contingencia, limite=limite_cardinalidad)
+
+    def actualizar(self, bloque):
+        if self.muestra is None:
+            self.muestra = bloque.head(FILAS_MUESTRA)
+        elif len(self.muestra) < FILAS_MUESTRA:
+            self.muestra = pd.concat([self.muestra, bloque.head(FILAS_MUESTRA - len(self.muestra))])
+        self.n_registros += len(bloque)
+        nulos = bloque.isnull().sum()
+        self.nulos = nulos if self.nulos is None else self.nulos.add(nulos, fill_value=0).astype(np.int64)
+
+        datos = bloque[self.variables].to_numpy(dtype=np.float64)
+        self.momentos.actualizar(datos)
+        self.extremos.actualizar(datos)
+        self.comomentos.actualizar(datos)
+        for j, (conteo, sketch) in enumerate(zip(self.conteos, self.sketches)):
+            conteo.actualizar(datos[:, j])
+            sketch.actualizar(datos[:, j])
+        for conjunto in self.conjuntos.values():
+            conjunto.actualizar(bloque)
+        self.contingencia.actualizar(bloque)
+        return self
+
+    def combinar(self, otro):
+        if self.muestra is None:
+            self.muestra = otro.muestra
+        self.n_registros += otro.n_registros
+        if otro.nulos is not None:
+            self.nulos = otro.nulos if self.nulos is None else self.nulos.add(otro.nulos, fill_value=0).astype(np.int64)
+        self.momentos.combinar(otro.momentos)
+        self.extremos.combinar(otro.extremos)
+        self.comomentos.combinar(otro.comomentos)
+        for conteo, conteo_otro in zip(self.conteos, otro.conteos):
+            conteo.combinar(conteo_otro)
+        for sketch, sketch_otro in zip(self.sketches, otro.sketches):
+            sketch.combinar(sketch_otro)
+        for par, conjunto in self.conjuntos.items():
+            conjunto.combinar(otro.conjuntos[par])
+        self.contingencia.combinar(otro.contingencia)
+        return self
+
+    # -------------------------------------------------------------------------
+    # Resultados
+    # -------------------------------------------------------------------------
+    def resumen(self, cuantiles='auto'):
+        """Medidas de `resumen_completo` (PASOS 4, 5, 6 y 11).
+
+        Con `cuantiles='auto'` la mediana y los cuartiles son exactos en las
+        columnas con conteo de valores y aproximados (sketch KLL) en las de
+        alta cardinalidad; `'kll'` usa el sketch en todas las columnas."""
+        if cuantiles not in ('auto', 'kll'):
+            raise ValueError(f"Backend de cuantiles desconocido: '{cuantiles}' (use 'auto' o 'kll')")
+        sin_conteo = [v for v, c in zip(self.variables, self.conteos) if not c.exacto]
+        if sin_conteo:
+            warnings.warn(
+                f"Más de {self.conteos[0].limite} valores distintos en {sin_conteo}: "
+                "la moda no está disponible en modo streaming"
+            )
+        sketches = {
+            variable: sketch
+            for variable, conteo, sketch in zip(self.variables, self.conteos, self.sketches)
+            if cuantiles == 'kll' or not conteo.exacto
+        }
+        cuartiles = np.array([
+            self.sketches[j].cuantiles([0.25, 0.5, 0.75]) if variable in sketches
+            else [conteo.cuantil(q) for q in (0.25, 0.5, 0.75)]
+            for j, (variable, conteo) in enumerate(zip(self.variables, self.conteos))
+        ]).reshape(len(self.variables), 3)
+        return ResumenDescriptivo(
+            variables=self.variables,
+            n=self.momentos.n.astype(np.int64),
+            media=np.where(self.momentos.n > 0, self.momentos.media, np.nan),
+            mediana=cuartiles[:, 1],
+            moda=np.array([c.moda() for c in self.conteos]),
+            minimo=self.extremos.minimo,
+            maximo=self.extremos.maximo,
+            q1=cuartiles[:, 0],
+            q3=cuartiles[:, 2],
+            varianza=self.momentos.varianza,
+            sketches=sketches or None
+        )
+
+    def correlaciones(self, nivel_confianza=NIVEL_CONFIANZA):
+        """Igual que `calcular_correlaciones` (PASOS 7 y 8): matrices de
+        Pearson y Spearman con p-valores e intervalos de confianza."""
+        aproximados = self.spearman_aproximado()
+        if aproximados:
+            warnings.warn(
+                f"Más de {self.contingencia.limite} combinaciones de valores en {aproximados}: "
+                f"el Rho de Spearman es aproximado ({INTERVALOS_SPEARMAN} intervalos de cuantiles por variable)"
+            )
+        n_spearman = np.diag(np.diag(self.comomentos.n)).astype(np.int64)
+        r_spearman = np.where(np.diag(self.comomentos.n) > 1, 1.0, np.nan) * np.eye(len(self.variables))
+        for (a, b), conjunto in self.conjuntos.items():
+            i, j = self.variables.index(a), self.variables.index(b)
+            rho, n = conjunto.spearman()
+            r_spearman[i, j] = r_spearman[j, i] = rho
+            n_spearman[i, j] = n_spearman[j, i] = n
+        return {
+            'pearson': resultado_correlacion('pearson', self.variables, self.comomentos.correlacion(),
+                                             self.comomentos.n, nivel_confianza),
+            'spearman': resultado_correlacion('spearman', self.variables, r_spearman, n_spearman, nivel_confianza)
+        }
+
+    def spearman_aproximado(self):
+        """Pares de variables cuyo Rho de Spearman es aproximado (conteo
+        conjunto agrupado en intervalos)."""
+        return [par for par, conjunto in self.conjuntos.items() if conjunto.agrupado]
+
+    def matriz_pearson(self):
+        """Igual que `df[variables].corr(method='pearson')` (PASO 7)."""
+        return pd.DataFrame(self.comomentos.correlacion(), index=self.variables, columns=self.variables)
+
+    def matriz_spearman(self):
+        """Igual que `df[variables].corr(method='spearman')` (PASO 8)."""
+        return self.correlaciones()['spearman'].matriz()
+
+    def pearson(self, x, y):
+        """(r, p-valor) de un par de variables, como `stats.pearsonr`."""
+        i, j = self.variables.index(x), self.variables.index(y)
+        r = self.comomentos.correlacion()[i, j]
+        return r, float(p_valores_correlacion(r, self.comomentos.n[i, j]))
+
+    def spearman(self, x, y):
+        """(rho, p-valor) de un par de variables, como `stats.spearmanr`."""
+        conjunto = self.conjuntos.get((x, y)) or self.conjuntos[(y, x)]
+        rho, n = conjunto.spearman()
+        return rho, float(p_valores_correlacion(rho, n))
+
+    def tabla_contingencia(self):
+        """Igual que `pd.crosstab` del par de variables categóricas (PASO 9)."""
+        return self.contingencia.tabla()
+
+
+def analizar_csv_por_bloques(ruta_archivo, variables, par_contingencia=('Nivel_Socioeconomico', 'Aprobado'),
+                             tamano_bloque=TAMANO_BLOQUE, limite_cardinalidad=LIMITE_CARDINALIDAD,
+                             error_cuantiles=ERROR_CUANTILES):
+    """Lee el CSV en bloques de `tamano_bloque` filas y devuelve el
+    EstadoAnalisis acumulado. La memoria usada depende del tamaño del
+    bloque, no del tamaño del archivo."""
+    estado = EstadoAnalisis(variables, par_contingencia, limite_cardinalidad, error_cuantiles)
+    for bloque in pd.read_csv(ruta_archivo, chunksize=tamano_bloque):
+        estado.actualizar(bloque)
+    return estado
@@ -0,0 +1,324 @@
+"""
+ANÁLISIS POR GRUPOS
+=========================================================
+
+Calcula las medidas de `resumen_completo` (PASOS 4 a 6) y las matrices de
+correlación (PASOS 7 y 8) para cada grupo de una o varias agrupaciones
+(por ejemplo Nivel_Socioeconomico, Aprobado y tramos de Edad), sin filtrar
+el DataFrame ni repetir el análisis por cada grupo.
+
+- Cada columna se ordena por valor una única vez; para cada agrupación
+  ese orden se reordena de forma estable por código de grupo (radix sort,
+  lineal). De ahí salen el mínimo, el máximo, los cuantiles (interpolación
+  lineal, igual que pandas), la moda y los rangos de Spearman de todos los
+  grupos.
+- Medias y varianzas de todos los grupos salen de `np.bincount` ponderados
+  por el código de grupo; las covarianzas, de un producto de matrices por
+  grupo sobre las filas ordenadas por grupo.
+
+El resultado son tablas largas ("tidy"), una fila por grupo, variable y
+medida, que la app de Streamlit filtra sin volver a calcular nada.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from asociacion import codificar_categoricas
+from correlaciones import NIVEL_CONFIANZA, calcular_correlaciones, resultado_correlacion
+from esquema import ETIQUETAS_BOOLEANAS
+from estadisticas import MEDIDAS_RESUMEN, ResumenDescriptivo
+
+# Límites (inclusive) de los tramos de Edad: 18 o menos, 19, 20 o más
+LIMITES_TRAMOS_EDAD = [18, 19]
+
+COLUMNAS_MEDIDAS = ['Agrupacion', 'Grupo', 'Variable', 'N', 'Medida', 'Valor']
+COLUMNAS_CORRELACIONES = [
+    'Agrupacion', 'Grupo', 'Metodo', 'Variable_1', 'Variable_2',
+    'Coeficiente', 'P_valor', 'IC_inferior', 'IC_superior', 'N'
+]
+
+
+@dataclass
+class AnalisisPorGrupos:
+    """Medidas y correlaciones de cada grupo en formato largo:
+
+    - medidas: Agrupacion, Grupo, Variable, N, Medida, Valor
+    - correlaciones: Agrupacion, Grupo, Metodo, Variable_1, Variable_2,
+      Coeficiente, P_valor, IC_inferior, IC_superior, N (un par por fila)"""
+
+    variables: list
+    medidas: pd.DataFrame
+    correlaciones: pd.DataFrame
+
+    def agrupaciones(self):
+        return list(self.medidas['Agrupacion'].unique())
+
+    def grupos(self, agrupacion):
+        return list(self.medidas.loc[self.medidas['Agrupacion'] == agrupacion, 'Grupo'].unique())
+
+    def resumen(self, agrupacion, grupo):
+        """Tabla `resumen_completo` de un grupo: una fila por variable, una
+        columna por medida."""
+        filas = self.medidas[(self.medidas['Agrupacion'] == agrupacion) & (self.medidas['Grupo'] == grupo)]
+        tabla = filas.pivot(index='Variable', columns='Medida', values='Valor')
+        return tabla.reindex(index=self.variables, columns=MEDIDAS_RESUMEN)
+
+    def tabla(self, agrupacion, medida='Media'):
+        """Una medida para todos los grupos (filas) y variables (columnas)."""
+        filas = self.medidas[(self.medidas['Agrupacion'] == agrupacion) & (self.medidas['Medida'] == medida)]
+        tabla = filas.pivot(index='Grupo', columns='Variable', values='Valor')
+        return tabla.reindex(index=self.grupos(agrupacion), columns=self.variables)
+
+    def matriz(self, agrupacion, grupo, metodo='pearson'):
+        """Matriz de correlación de un grupo, como `df[mascara].corr(method)`."""
+        filas = self.correlaciones[(self.correlaciones['Agrupacion'] == agrupacion)
+                                   & (self.correlaciones['Grupo'] == grupo)
+                                   & (self.correlaciones['Metodo'] == metodo)]
+        # Diagonal: 1, o vacía si la variable es constante en el grupo
+        varianza = self.resumen(agrupacion, grupo)['Varianza'].to_numpy()
+        matriz = pd.DataFrame(np.diag(np.where(varianza > 0, 1.0, np.nan)), index=self.variables,
+                              columns=self.variables)
+        for fila in filas.itertuples(index=False):
+            matriz.loc[fila.Variable_1, fila.Variable_2] = fila.Coeficiente
+            matriz.loc[fila.Variable_2, fila.Variable_1] = fila.Coeficiente
+        return matriz
+
+
+# =============================================================================
+# AGRUPACIONES
+# =============================================================================
+
+def tramos_edad(edades, limites=LIMITES_TRAMOS_EDAD):
+    """Tramos de edad (categoría ordenada) con límites superiores inclusive;
+    con los límites por defecto: '18 o menos', '19', '20 o más'."""
+    etiquetas = [f"{limites[0]} o menos"]
+    for inferior, superior in zip(limites[:-1], limites[1:]):
+        etiquetas.append(f"{superior}" if superior == inferior + 1 else f"{inferior + 1}-{superior}")
+    etiquetas.append(f"{limites[-1] + 1} o más")
+    return pd.cut(edades, bins=[-np.inf] + list(limites) + [np.inf], labels=etiquetas)
+
+
+def agrupaciones_estudiantes(df):
+    """Agrupaciones habituales del dataset: nivel socioeconómico, aprobado y
+    tramos de edad."""
+    return {
+        'Nivel_Socioeconomico': df['Nivel_Socioeconomico'],
+        'Aprobado': df['Aprobado'],
+        'Tramo_Edad': tramos_edad(df['Edad'])
+    }
+
+
+def _etiqueta_grupo(valor):
+    if isinstance(valor, (bool, np.bool_)):
+        return ETIQUETAS_BOOLEANAS[bool(valor)]
+    return str(valor)
+
+
+# =============================================================================
+# MEDIDAS POR GRUPO
+# =============================================================================
+
+def _orden_por_grupo(codigos, k, orden=None):
+    """Orden estable de las filas por código de grupo (sobre `orden`, si se
+    da). Con códigos de 16 bits numpy usa radix sort, lineal en las filas."""
+    if orden is None:
+        orden = np.arange(len(codigos))
+    clave = codigos[orden]
+    if k <= np.iinfo(np.int16).max:
+        clave = clave.astype(np.int16)
+    return orden[np.argsort(clave, kind='stable')]
+
+
+def _medidas_columna(valores, codigos, k, orden_valores):
+    """Medidas y rangos de una columna para los k grupos. `orden_valores` es
+    el orden de la columna por valor (NaN al final), calculado una sola vez
+    para todas las agrupaciones: reordenarlo de forma estable por grupo deja
+    cada grupo ordenado por valor. Devuelve un diccionario de arreglos de
+    largo k y los rangos promedio de cada fila dentro de su grupo."""
+    orden = _orden_por_grupo(codigos, k, orden_valores)
+    ordenados = valores[orden]
+    grupos_ordenados = codigos[orden]
+    validos = ~np.isnan(valores)
+
+    filas = np.bincount(codigos, minlength=k)
+    inicio = np.concatenate([[0], np.cumsum(filas)[:-1]])
+    n = np.bincount(codigos, weights=validos, minlength=k).astype(np.int64)
+    ultimo = max(len(ordenados) - 1, 0)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        media = np.bincount(codigos, weights=np.where(validos, valores, 0.0), minlength=k) / n
+        desvios = np.where(validos, valores - media[codigos], 0.0)
+        varianza = np.bincount(codigos, weights=desvios ** 2, minlength=k) / (n - 1)
+
+    def cuantil(q):
+        # Los NaN quedan al final de cada grupo: los n primeros son los válidos
+        posicion = (n - 1) * q
+        inferior = np.floor(posicion).astype(np.int64)
+        superior = np.minimum(inferior + 1, np.maximum(n - 1, 0))
+        bajo = ordenados[np.clip(inicio + np.maximum(inferior, 0), 0, ultimo)]
+        alto = ordenados[np.clip(inicio + superior, 0, ultimo)]
+        return np.where(n > 0, bajo + (alto - bajo) * (posicion - np.floor(posicion)), np.nan)
+
+    # Rachas de valores iguales dentro de cada grupo (cada NaN es su propia racha)
+    inicios = np.flatnonzero(np.r_[True, (ordenados[1:] != ordenados[:-1])
+                                   | (grupos_ordenados[1:] != grupos_ordenados[:-1])])
+    largos = np.diff(np.r_[inicios, len(ordenados)])
+    grupo_racha = grupos_ordenados[inicios]
+    racha_valida = ~np.isnan(ordenados[inicios])
+
+    # Moda: la racha más larga de cada grupo; ante empates la primera (el
+    # menor valor), igual que `Series.mode().values[0]`
+    moda = np.full(k, np.nan)
+    candidatas = np.flatnonzero(racha_valida)
+    elegidas = candidatas[np.lexsort((inicios[candidatas], -largos[candidatas], grupo_racha[candidatas]))]
+    primera = np.r_[True, grupo_racha[elegidas][1:] != grupo_racha[elegidas][:-1]] if len(elegidas) else []
+    moda[grupo_racha[elegidas][primera]] = ordenados[inicios[elegidas][primera]]
+
+    # Rango promedio de cada racha dentro de su grupo (como rankdata 'average')
+    posicion_racha = inicios - inicio[grupo_racha]
+    rangos = np.empty(len(valores))
+    rangos[orden] = np.repeat(posicion_racha + (largos + 1) / 2, largos)
+    rangos[~validos] = np.nan
+
+    medidas = {
+        'n': n,
+        'media': media,
+        'mediana': cuantil(0.5),
+        'moda': moda,
+        'minimo': np.where(n > 0, ordenados[np.clip(inicio, 0, ultimo)], np.nan),
+        'maximo': np.where(n > 0, ordenados[np.clip(inicio + n - 1, 0, ultimo)], np.nan),
+        'q1': cuantil(0.25),
+        'q3': cuantil(0.75),
+        'varianza': np.where(n > 1, varianza, np.nan)
+    }
+    return medidas, rangos
+
+
+def _resumenes_por_grupo(columnas, k, variables):
+    """Un ResumenDescriptivo por grupo (mismas medidas que calcular_resumen)
+    a partir de las medidas de cada columna."""
+    return [
+        ResumenDescriptivo(variables=variables, **{
+            campo: np.array([columna[campo][grupo] for columna in columnas]) for campo in columnas[0]
+        })
+        for grupo in range(k)
+    ]
+
+
+# =============================================================================
+# CORRELACIONES POR GRUPO
+# =============================================================================
+
+def _correlacion_grupos(datos, codigos, k):
+    """Coeficientes de Pearson de todas las columnas en cada grupo. Las filas
+    se ordenan una vez por grupo y cada grupo es un bloque contiguo: su
+    matriz sale de un producto de matrices. Devuelve matrices (k, p, p).
+    Requiere datos sin nulos."""
+    p = datos.shape[1]
+    ordenados = datos[_orden_por_grupo(codigos, k)]
+    n = np.bincount(codigos, minlength=k)
+    limites = np.concatenate([[0], np.cumsum(n)])
+    r = np.full((k, p, p), np.nan)
+    for grupo in range(k):
+        if n[grupo] < 2:
+            continue
+        bloque = ordenados[limites[grupo]:limites[grupo + 1]]
+        centrados = bloque - bloque.mean(axis=0)
+        covarianza = centrados.T @ centrados
+        varianza = np.diag(covarianza)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            r[grupo] = covarianza / np.sqrt(np.outer(varianza, varianza))
+        np.fill_diagonal(r[grupo], np.where(varianza > 0, 1.0, np.nan))
+    return np.clip(r, -1.0, 1.0), np.broadcast_to(n[:, None, None], (k, p, p))
+
+
+def _correlaciones_por_grupo(datos, rangos, codigos, k, variables, nivel_confianza):
+    """{'pearson': [MatrizCorrelacion por grupo], 'spearman': [...]}; los
+    rangos de Spearman ya vienen calculados dentro de cada grupo."""
+    if np.isnan(datos).any():
+        # Con nulos (exclusión por pares) se usa el motor general en cada grupo
+        por_grupo = [
+            calcular_correlaciones(pd.DataFrame(datos[codigos == grupo], columns=variables), variables,
+                                   nivel_confianza)
+            for grupo in range(k)
+        ]
+        return {metodo: [c[metodo] for c in por_grupo] for metodo in ('pearson', 'spearman')}
+
+    resultado = {}
+    for metodo, valores in (('pearson', datos), ('spearman', rangos)):
+        r, n = _correlacion_grupos(valores, codigos, k)
+        resultado[metodo] = [resultado_correlacion(metodo, variables, r[g], n[g], nivel_confianza) for g in range(k)]
+    return resultado
+
+
+# =============================================================================
+# ANÁLISIS COMPLETO
+# =============================================================================
+
+def calcular_por_grupos(df, variables, agrupaciones=None, nivel_confianza=NIVEL_CONFIANZA):
+    """Medidas de `resumen_completo` y correlaciones de Pearson y Spearman de
+    `variables` para cada grupo de cada agrupación.
+
+    `agrupaciones` es una lista de columnas de `df` o un diccionario
+    {nombre: Series alineada con df}; por defecto, agrupaciones_estudiantes(df).
+    Las filas con el grupo nulo se excluyen de esa agrupación."""
+    variables = list(variables)
+    if agrupaciones is None:
+        agrupaciones = agrupaciones_estudiantes(df)
+    elif not isinstance(agrupaciones, dict):
+        agrupaciones = {columna: df[columna] for columna in agrupaciones}
+
+    nombres = list(agrupaciones)
+    # Las categorías conservan su orden (por ejemplo Bajo, Medio, Alto)
+    claves = pd.DataFrame({nombre: pd.Series(serie).reset_index(drop=True) for nombre, serie in agrupaciones.items()})
+    codigos_agrupaciones, categorias = codificar_categoricas(claves, nombres)
+    datos = df[variables].to_numpy(dtype=np.float64)
+    # Cada columna se ordena por valor una sola vez para todas las agrupaciones
+    orden_valores = np.argsort(datos, axis=0, kind='stable')
+
+    medidas, correlaciones = [], []
+    for a, nombre in enumerate(nombres):
+        k = len(categorias[a])
+        # Las filas sin grupo van a un grupo extra (k) que se descarta
+        codigos = np.where(codigos_agrupaciones[:, a] >= 0, codigos_agrupaciones[:, a], k)
+        etiquetas = [_etiqueta_grupo(valor) for valor in categorias[a]]
+
+        columnas, rangos = zip(*[_medidas_columna(datos[:, j], codigos, k + 1, orden_valores[:, j])
+                                 for j in range(len(variables))])
+        for etiqueta, resumen in zip(etiquetas, _resumenes_por_grupo(columnas, k, variables)):
+            medidas.append(pd.DataFrame({
+                'Agrupacion': nombre,
+                'Grupo': etiqueta,
+                'Variable': np.repeat(variables, len(MEDIDAS_RESUMEN)),
+                'N': np.repeat(resumen.n, len(MEDIDAS_RESUMEN)),
+                'Medida': np.tile(MEDIDAS_RESUMEN, len(variables)),
+                'Valor': resumen.tabla().to_numpy().ravel()
+            }))
+
+        i, j = np.triu_indices(len(variables), k=1)
+        matrices = _correlaciones_por_grupo(datos, np.column_stack(rangos), codigos, k + 1, variables,
+                                            nivel_confianza)
+        for metodo, por_grupo in matrices.items():
+            for etiqueta, matriz in zip(etiquetas, por_grupo[:k]):
+                correlaciones.append(pd.DataFrame({
+                    'Agrupacion': nombre,
+                    'Grupo': etiqueta,
+                    'Metodo': metodo,
+                    'Variable_1': [variables[x] for x in i],
+                    'Variable_2': [variables[y] for y in j],
+                    'Coeficiente': matriz.r[i, j],
+                    'P_valor': matriz.p_valor[i, j],
+                    'IC_inferior': matriz.ic_inferior[i, j],
+                    'IC_superior': matriz.ic_superior[i, j],
+                    'N': matriz.n[i, j]
+                }))
+
+    return AnalisisPorGrupos(
+        variables=variables,
+        medidas=pd.concat(medidas, ignore_index=True)[COLUMNAS_MEDIDAS] if medidas
+        else pd.DataFrame(columns=COLUMNAS_MEDIDAS),
+        correlaciones=pd.concat(correlaciones, ignore_index=True)[COLUMNAS_CORRELACIONES] if correlaciones
+        else pd.DataFrame(columns=COLUMNAS_CORRELACIONES)
+    )
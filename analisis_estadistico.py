@@ -23,19 +23,45 @@ Fecha: Andrés Cervantes 2026
 # =============================================================================
 # 1. IMPORTACIÓN DE LIBRERÍAS NECESARIAS
 # =============================================================================
+from instrumentacion import Instrumentacion
+
+# Instrumentación: tiempo real, tiempo de CPU y memoria (RSS) de cada PASO.
+# Con `medir_memoria_python = True` también se mide el pico de memoria de
+# Python/NumPy (tracemalloc, más lento); `perfilar_pasos` guarda un perfil de
+# cProfile de los pasos indicados, por ejemplo 'PASO 10' o ['PASO 2', 'PASO 12'].
+# La traza se guarda en `archivo_traza` (JSON, o CSV si termina en .csv).
+instrumentar = True
+medir_memoria_python = False
+perfilar_pasos = None
+archivo_traza = 'traza_pasos.json'
+
+instrumentacion = Instrumentacion(activa=instrumentar, memoria_python=medir_memoria_python,
+                                  perfilar=perfilar_pasos)
+instrumentacion.marcar('PASO 1: Importación de librerías')
 print("="*80)
 print("PASO 1: Importando librerías necesarias...")
 print("="*80)
 
+import os
+
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
 from scipy import stats
 
-# Configurar estilo de gráficas para mejor visualización
-plt.style.use('seaborn-v0_8-darkgrid')
-sns.set_palette("husl")
+from carga_datos import ESQUEMA_ANALISIS, cargar_csv, columnas_analisis
+from consultas import analizar_con_duckdb
+from agrupado import calcular_por_grupos
+from asociacion import calcular_asociaciones
+from atipicos import NOMBRES_METODOS, detectar_atipicos
+from bootstrap import calcular_bootstrap
+from correlaciones import calcular_correlaciones
+from esquema import ETIQUETAS_BOOLEANAS, VARIABLES_NUMERICAS, aplicar_esquema, etiquetas_originales, uso_memoria
+from exportacion import LibroExcel, bloques_csv, exportar_datos, ruta_datos
+from estadisticas import calcular_resumen
+from graficas import LIMITE_FILAS_GRAFICAS, generar_figura
+from incremental import analizar_incremental
+from paralelo import analizar_particiones, expandir_rutas
+from permutaciones import LIMITE_FILAS_PERMUTACION, calcular_pruebas, fisher_exacto
 
 print("✓ Librerías importadas correctamente\n")
 
@@ -46,6 +72,7 @@ print("✓ Librerías importadas correctamente\n")
 # =============================================================================
 # 2. CARGA DE DATOS DESDE ARCHIVO CSV
 # =============================================================================
+instrumentacion.marcar('PASO 2: Carga de datos')
 print("="*80)
 print("PASO 2: Cargando datos desde archivo CSV...")
 print("="*80)
@@ -53,10 +80,96 @@ print("="*80)
 # Cargar el dataset desde archivo CSV
 # Nota: Cambia la ruta si el archivo está en otra ubicación
 ruta_archivo = 'estudiantes_datos.csv'
-df = pd.read_csv(ruta_archivo)
 
+# Caché columnar: la primera lectura guarda una copia tipada del CSV (Feather)
+# en .cache_columnar/ y las siguientes la abren con memoria mapeada sin volver
+# a interpretar el texto. Se invalida si cambia la fecha o el tamaño del CSV.
+usar_cache_columnar = True
+
+# Modo streaming: para archivos más grandes que la memoria disponible.
+# El CSV se lee en bloques de `tamano_bloque` filas y los PASOS 4 a 9 se
+# calculan con acumuladores combinables, sin cargar el archivo completo.
+# Las gráficas (PASO 10) y la hoja de datos originales requieren el modo normal.
+# En este modo `ruta_archivo` puede ser un patrón con varios archivos (por
+# ejemplo 'datos/sede_*.csv'): cada archivo se analiza en un proceso distinto
+# (hasta `procesos`, None = uno por núcleo) y los resultados se combinan.
+modo_streaming = False
+tamano_bloque = 100_000
+procesos = None
+
+# Modo incremental (requiere modo_streaming con un solo archivo): guarda el
+# estado del análisis en '<ruta_archivo>.estado.pkl' y en las siguientes
+# ejecuciones solo procesa las filas agregadas al final del CSV. Si cambió
+# alguna fila ya procesada, se recalcula todo.
+modo_incremental = False
+
+# Motor de cálculo de los PASOS 3 a 9 y 11: 'pandas' carga los datos en
+# memoria (es la referencia); 'duckdb' ejecuta cada resultado como una
+# consulta de agregación sobre el CSV (o su copia Parquet en .cache_columnar/),
+# con varios hilos y volcando a disco lo que no cabe en memoria, sin cargar
+# el DataFrame completo (requiere `pip install duckdb`, ver consultas.py).
+# Como en el modo streaming, las gráficas, los grupos, el bootstrap y las
+# permutaciones requieren motor = 'pandas'.
+motor = 'pandas'
+
+# Cuantiles (mediana, Q1, Q3 y bigotes del box plot): 'exacto' ordena cada
+# columna; 'kll' los aproxima con un sketch de memoria constante y error de
+# rango `error_cuantiles` (en modo streaming, las columnas con demasiados
+# valores distintos para un conteo exacto usan siempre el sketch)
+backend_cuantiles = 'exacto'
+error_cuantiles = 0.01
+
+# Seleccionar variables numéricas para análisis (por defecto, las de esquema.py:
+# Edad, Calificacion_Matematicas, Calificacion_Ciencias y Horas_Estudio)
+variables_numericas = list(VARIABLES_NUMERICAS)
+
+if motor == 'duckdb':
+    estado = analizar_con_duckdb(
+        expandir_rutas(ruta_archivo), variables_numericas,
+        par_contingencia=('Nivel_Socioeconomico', 'Aprobado'),
+        usar_cache=usar_cache_columnar
+    )
+    df = estado.muestra  # Solo las primeras filas, para mostrarlas
+    n_registros = estado.n_registros
+elif modo_streaming and modo_incremental:
+    estado, info_incremental = analizar_incremental(
+        ruta_archivo, variables_numericas,
+        par_contingencia=('Nivel_Socioeconomico', 'Aprobado'),
+        tamano_bloque=tamano_bloque,
+        error_cuantiles=error_cuantiles
+    )
+    df = estado.muestra  # Solo las primeras filas, para mostrarlas
+    n_registros = estado.n_registros
+    print(f"✓ Recálculo {info_incremental['modo']}: {info_incremental['filas_nuevas']} filas nuevas procesadas")
+elif modo_streaming:
+    estado = analizar_particiones(
+        expandir_rutas(ruta_archivo), variables_numericas,
+        par_contingencia=('Nivel_Socioeconomico', 'Aprobado'),
+        tamano_bloque=tamano_bloque,
+        error_cuantiles=error_cuantiles,
+        procesos=procesos
+    )
+    df = estado.muestra  # Solo las primeras filas, para mostrarlas
+    n_registros = estado.n_registros
+else:
+    df = cargar_csv(ruta_archivo, columnas=columnas_analisis(ruta_archivo), usar_cache=usar_cache_columnar)
+    n_registros = len(df)
+    # Esquema validado con tipos compactos: categorías ordenadas para los
+    # niveles, booleano para Aprobado y enteros pequeños para las columnas
+    # numéricas (ver esquema.py)
+    memoria_original = uso_memoria(df)
+    df = aplicar_esquema(df, ESQUEMA_ANALISIS)
+    memoria_compacta = uso_memoria(df)
+    print(f"✓ Memoria del dataset: {memoria_original / 1024:.1f} KB -> {memoria_compacta / 1024:.1f} KB "
+          f"({1 - memoria_compacta / memoria_original:.1%} menos)")
+
+# Los PASOS que recorren todas las filas del DataFrame (gráficas, grupos,
+# bootstrap, permutaciones y hoja de datos) solo se ejecutan en memoria
+datos_en_memoria = motor == 'pandas' and not modo_streaming
+
+instrumentacion.registrar_filas(n_registros)
 print(f"✓ Datos cargados exitosamente")
-print(f"✓ Número de registros: {len(df)}")
+print(f"✓ Número de registros: {n_registros}")
 print(f"✓ Número de variables: {len(df.columns)}")
 print(f"\nPrimeros registros del dataset:")
 print(df.head(10))
@@ -65,6 +178,7 @@ print("\n")
 # =============================================================================
 # 3. EXPLORACIÓN INICIAL DE LOS DATOS
 # =============================================================================
+instrumentacion.marcar('PASO 3: Exploración inicial', filas=n_registros)
 print("="*80)
 print("PASO 3: Exploración inicial de los datos")
 print("="*80)
@@ -72,46 +186,59 @@ print("="*80)
 print("\nTipos de datos por columna:")
 print(df.dtypes)
 
-print("\nInformación general del dataset:")
-print(df.info())
+if datos_en_memoria:
+    print("\nInformación general del dataset:")
+    print(df.info())
 
 print("\nVerificación de valores nulos:")
-print(df.isnull().sum())
+print(df.isnull().sum() if datos_en_memoria else estado.nulos)
 print("\n")
 
 # =============================================================================
 # 4. MEDIDAS DE POSICIÓN (TENDENCIA CENTRAL)
 # =============================================================================
+instrumentacion.marcar('PASO 4: Medidas de posición', filas=n_registros)
 print("="*80)
 print("PASO 4: MEDIDAS DE POSICIÓN (TENDENCIA CENTRAL)")
 print("="*80)
 
-# Seleccionar variables numéricas para análisis
-variables_numericas = ['Edad', 'Calificacion_Matematicas', 'Calificacion_Ciencias', 'Horas_Estudio']
+# Todas las medidas se calculan una sola vez (un ordenamiento por columna)
+# y los PASOS 4, 5, 6 y 11 se muestran a partir de este mismo resultado
+if motor == 'duckdb':
+    # Cuantiles siempre exactos (quantile_cont)
+    resumen_estadistico = estado.resumen()
+elif modo_streaming:
+    resumen_estadistico = estado.resumen('kll' if backend_cuantiles == 'kll' else 'auto')
+else:
+    resumen_estadistico = calcular_resumen(df, variables_numericas, backend_cuantiles, error_cuantiles)
+
+print(f"Cuantiles: {resumen_estadistico.descripcion_cuantiles()}")
 
 for variable in variables_numericas:
     print(f"\n--- Análisis de: {variable} ---")
 
+    medidas = resumen_estadistico.medidas(variable)
+
     # 4.1 PROMEDIO (Media aritmética)
-    promedio = df[variable].mean()
+    promedio = medidas['Media']
     print(f"Promedio (Media): {promedio:.2f}")
     print(f"  Interpretación: El valor promedio de {variable} es {promedio:.2f}")
 
     # 4.2 MEDIANA (Percentil 50)
-    mediana = df[variable].median()
+    mediana = medidas['Mediana']
     print(f"Mediana: {mediana:.2f}")
     print(f"  Interpretación: El 50% de los datos están por debajo de {mediana:.2f}")
 
     # 4.3 MODA (Valor más frecuente)
-    moda = df[variable].mode()
-    if len(moda) > 0:
-        print(f"Moda: {moda.values[0]:.2f}")
-        print(f"  Interpretación: El valor más frecuente es {moda.values[0]:.2f}")
+    moda = medidas['Moda']
+    if not np.isnan(moda):
+        print(f"Moda: {moda:.2f}")
+        print(f"  Interpretación: El valor más frecuente es {moda:.2f}")
 
     # 4.4 CUANTILES (Q1, Q2, Q3)
-    q1 = df[variable].quantile(0.25)
-    q2 = df[variable].quantile(0.50)  # igual a la mediana
-    q3 = df[variable].quantile(0.75)
+    q1 = medidas['Q1 (25%)']
+    q2 = mediana  # igual a la mediana
+    q3 = medidas['Q3 (75%)']
 
     print(f"Cuartil 1 (Q1 - 25%): {q1:.2f}")
     print(f"  Interpretación: El 25% de los datos están por debajo de {q1:.2f}")
@@ -124,6 +251,7 @@ print("\n")
 # =============================================================================
 # 5. MEDIDAS DE VARIABILIDAD (DISPERSIÓN)
 # =============================================================================
+instrumentacion.marcar('PASO 5: Medidas de variabilidad', filas=n_registros)
 print("="*80)
 print("PASO 5: MEDIDAS DE VARIABILIDAD (DISPERSIÓN)")
 print("="*80)
@@ -132,29 +260,29 @@ for variable in variables_numericas:
     print(f"\n--- Análisis de dispersión: {variable} ---")
 
     # 5.1 MÍNIMO Y MÁXIMO
-    minimo = df[variable].min()
-    maximo = df[variable].max()
+    medidas = resumen_estadistico.medidas(variable)
+    minimo = medidas['Mínimo']
+    maximo = medidas['Máximo']
     print(f"Mínimo: {minimo:.2f}")
     print(f"Máximo: {maximo:.2f}")
 
     # 5.2 RANGO
-    rango = maximo - minimo
+    rango = medidas['Rango']
     print(f"Rango: {rango:.2f}")
     print(f"  Interpretación: La diferencia entre el valor máximo y mínimo es {rango:.2f}")
 
     # 5.3 VARIANZA
-    varianza = df[variable].var()
+    varianza = medidas['Varianza']
     print(f"Varianza: {varianza:.2f}")
     print(f"  Interpretación: Medida de dispersión promedio al cuadrado")
 
     # 5.4 DESVIACIÓN ESTÁNDAR
-    desviacion_std = df[variable].std()
+    desviacion_std = medidas['Desv. Estándar']
     print(f"Desviación Estándar: {desviacion_std:.2f}")
     print(f"  Interpretación: En promedio, los datos se desvían {desviacion_std:.2f} unidades de la media")
 
     # 5.5 COEFICIENTE DE VARIACIÓN (CV)
-    promedio = df[variable].mean()
-    coef_variacion = (desviacion_std / promedio) * 100
+    coef_variacion = medidas['Coef. Variación (%)']
     print(f"Coeficiente de Variación (CV): {coef_variacion:.2f}%")
     print(f"  Interpretación: La desviación estándar representa el {coef_variacion:.2f}% de la media")
     if coef_variacion < 15:
@@ -169,18 +297,35 @@ print("\n")
 # =============================================================================
 # 6. RESUMEN ESTADÍSTICO COMPLETO
 # =============================================================================
+instrumentacion.marcar('PASO 6: Resumen estadístico', filas=n_registros)
 print("="*80)
 print("PASO 6: RESUMEN ESTADÍSTICO COMPLETO")
 print("="*80)
 
 print("\nEstadísticas descriptivas de todas las variables numéricas:")
-resumen = df[variables_numericas].describe()
+resumen = resumen_estadistico.tabla_describe()
 print(resumen)
+
+# Valores atípicos de todas las variables con tres métodos a la vez, a partir
+# de los cuartiles, la mediana y los momentos ya calculados (ver atipicos.py):
+# IQR (los mismos límites que el box plot del PASO 10), puntaje z y MAD
+atipicos = None
+if not datos_en_memoria:
+    print("\n✗ Detección de atípicos omitida: requiere los datos completos en memoria (modo_streaming = False y motor = 'pandas')")
+else:
+    atipicos = detectar_atipicos(df, resumen_estadistico)
+    print("\nValores atípicos por variable y método:")
+    print(atipicos.conteos.rename(columns=NOMBRES_METODOS))
+    registros_atipicos = atipicos.detalle(df)
+    print(f"\nRegistros marcados por algún método: {len(registros_atipicos)}")
+    if len(registros_atipicos):
+        print(registros_atipicos.head(10).to_string())
 print("\n")
 
 # =============================================================================
 # 7. MEDIDAS DE ASOCIACIÓN - CORRELACIÓN DE PEARSON
 # =============================================================================
+instrumentacion.marcar('PASO 7: Correlación de Pearson', filas=n_registros)
 print("="*80)
 print("PASO 7: MEDIDAS DE ASOCIACIÓN - CORRELACIÓN DE PEARSON")
 print("="*80)
@@ -189,22 +334,26 @@ print("\nLa correlación de Pearson mide la relación lineal entre dos variables
 print("Rango: -1 (correlación negativa perfecta) a +1 (correlación positiva perfecta)")
 print("Cerca de 0: no hay correlación lineal\n")
 
-# Calcular matriz de correlación de Pearson
-matriz_correlacion = df[variables_numericas].corr(method='pearson')
+# Calcular las matrices de Pearson y Spearman (PASO 8) con sus p-valores e
+# intervalos de confianza en una sola pasada vectorizada (ver correlaciones.py)
+if not datos_en_memoria:
+    correlaciones = estado.correlaciones()
+else:
+    correlaciones = calcular_correlaciones(df, variables_numericas)
+matriz_correlacion = correlaciones['pearson'].matriz()
 
 print("Matriz de Correlación de Pearson:")
 print(matriz_correlacion)
 
 # Ejemplo específico: correlación entre Matemáticas y Ciencias
-correlacion_mat_cie, p_valor = stats.pearsonr(
-    df['Calificacion_Matematicas'], 
-    df['Calificacion_Ciencias']
-)
+correlacion_mat_cie, p_valor = correlaciones['pearson'].par('Calificacion_Matematicas', 'Calificacion_Ciencias')
+ic_inferior, ic_superior = correlaciones['pearson'].intervalo('Calificacion_Matematicas', 'Calificacion_Ciencias')
 
 print(f"\n--- Ejemplo detallado ---")
 print(f"Correlación entre Calificación de Matemáticas y Ciencias:")
 print(f"Coeficiente de Pearson (r): {correlacion_mat_cie:.4f}")
 print(f"P-valor: {p_valor:.6f}")
+print(f"Intervalo de confianza 95%: [{ic_inferior:.4f}, {ic_superior:.4f}]")
 
 if p_valor < 0.05:
     print(f"✓ La correlación ES estadísticamente significativa (p < 0.05)")
@@ -223,6 +372,7 @@ print("\n")
 # =============================================================================
 # 8. MEDIDAS DE ASOCIACIÓN - RHO DE SPEARMAN
 # =============================================================================
+instrumentacion.marcar('PASO 8: Rho de Spearman', filas=n_registros)
 print("="*80)
 print("PASO 8: MEDIDAS DE ASOCIACIÓN - RHO DE SPEARMAN")
 print("="*80)
@@ -231,22 +381,26 @@ print("\nRho de Spearman mide la relación monotónica (no necesariamente lineal
 print("Se basa en rangos ordenados de los datos")
 print("Útil cuando los datos no siguen una distribución normal\n")
 
-# Calcular matriz de correlación de Spearman
-matriz_spearman = df[variables_numericas].corr(method='spearman')
+# Matriz de correlación de Spearman (calculada junto con la de Pearson)
+matriz_spearman = correlaciones['spearman'].matriz()
 
 print("Matriz de Correlación de Spearman:")
 print(matriz_spearman)
 
+if not datos_en_memoria and estado.spearman_aproximado():
+    print("\nNota: Rho de Spearman aproximado (valores agrupados en intervalos de cuantiles) en:")
+    for variable_a, variable_b in estado.spearman_aproximado():
+        print(f"  - {variable_a} / {variable_b}")
+
 # Ejemplo específico
-spearman_mat_horas, p_valor_sp = stats.spearmanr(
-    df['Calificacion_Matematicas'], 
-    df['Horas_Estudio']
-)
+spearman_mat_horas, p_valor_sp = correlaciones['spearman'].par('Calificacion_Matematicas', 'Horas_Estudio')
+ic_inferior_sp, ic_superior_sp = correlaciones['spearman'].intervalo('Calificacion_Matematicas', 'Horas_Estudio')
 
 print(f"\n--- Ejemplo detallado ---")
 print(f"Correlación entre Calificación de Matemáticas y Horas de Estudio:")
 print(f"Coeficiente de Spearman (ρ): {spearman_mat_horas:.4f}")
 print(f"P-valor: {p_valor_sp:.6f}")
+print(f"Intervalo de confianza 95%: [{ic_inferior_sp:.4f}, {ic_superior_sp:.4f}]")
 
 if p_valor_sp < 0.05:
     print(f"✓ La correlación ES estadísticamente significativa (p < 0.05)")
@@ -258,6 +412,7 @@ print("\n")
 # =============================================================================
 # 9. MEDIDAS DE ASOCIACIÓN - CHI-CUADRADO (χ²)
 # =============================================================================
+instrumentacion.marcar('PASO 9: Chi-cuadrado', filas=n_registros)
 print("="*80)
 print("PASO 9: MEDIDAS DE ASOCIACIÓN - CHI-CUADRADO (χ²)")
 print("="*80)
@@ -267,10 +422,13 @@ print("H0: Las variables son independientes")
 print("H1: Las variables están asociadas\n")
 
 # Crear tabla de contingencia entre Nivel Socioeconómico y Aprobado
-tabla_contingencia = pd.crosstab(
-    df['Nivel_Socioeconomico'], 
-    df['Aprobado']
-)
+if not datos_en_memoria:
+    tabla_contingencia = estado.tabla_contingencia()
+else:
+    tabla_contingencia = pd.crosstab(
+        df['Nivel_Socioeconomico'], 
+        df['Aprobado']
+    ).rename(columns=ETIQUETAS_BOOLEANAS)
 
 print("Tabla de Contingencia (Nivel Socioeconómico vs Aprobado):")
 print(tabla_contingencia)
@@ -298,152 +456,119 @@ else:
     print(f"\n✗ No rechazamos H0: Las variables son independientes (p >= 0.05)")
     print(f"  No hay evidencia de relación entre Nivel Socioeconómico y Aprobar")
 
+# Cribado de todos los pares de variables categóricas (Chi-cuadrado y V de
+# Cramér), ordenados de mayor a menor asociación (ver asociacion.py)
+asociaciones = None
+if motor == 'duckdb':
+    asociaciones = estado.asociaciones
+elif not modo_streaming:
+    asociaciones = calcular_asociaciones(df)
+if asociaciones is not None:
+    print(f"\n--- Cribado de asociación entre variables categóricas ---")
+    print(asociaciones.pares.to_string(index=False))
+
+# P-valores por permutación y prueba exacta de Fisher (ver permutaciones.py):
+# con muestras pequeñas los p-valores asintóticos de los PASOS 7 a 9 son poco
+# fiables. Cada prueba hace hasta `permutaciones_maximas` permutaciones y se
+# detiene antes cuando su p-valor ya queda claramente por encima o por
+# debajo de 0.05; 0 las desactiva.
+permutaciones_maximas = 10_000
+pruebas_significancia = None
+if permutaciones_maximas and datos_en_memoria and n_registros <= LIMITE_FILAS_PERMUTACION:
+    # Si todos comparten el mismo valor de Aprobado (o de nivel) la tabla no es
+    # 2xK y Fisher no aplica; si es demasiado grande queda el p-valor por permutación
+    if 2 not in tabla_contingencia.shape:
+        print(f"\nPrueba exacta de Fisher (Nivel Socioeconómico vs Aprobado): no aplica, "
+              f"la tabla de contingencia es {tabla_contingencia.shape[0]}x{tabla_contingencia.shape[1]}")
+    else:
+        try:
+            p_valor_fisher = fisher_exacto(tabla_contingencia)
+            print(f"\nPrueba exacta de Fisher (Nivel Socioeconómico vs Aprobado): p = {p_valor_fisher:.6f}")
+        except ValueError as error:
+            print(f"\nPrueba exacta de Fisher (Nivel Socioeconómico vs Aprobado): {error}")
+    pruebas_significancia = calcular_pruebas(df, variables_numericas, permutaciones_maximas=permutaciones_maximas)
+    print(f"\n--- P-valores por permutación (y exactos de Fisher) ---")
+    print(pruebas_significancia.pruebas.to_string(index=False))
+elif permutaciones_maximas and datos_en_memoria:
+    print(f"\nPruebas de permutación omitidas: con más de {LIMITE_FILAS_PERMUTACION} filas los p-valores "
+          "asintóticos son fiables")
+
 print("\n")
 
 # =============================================================================
 # 10. VISUALIZACIONES GRÁFICAS
 # =============================================================================
+instrumentacion.marcar('PASO 10: Visualizaciones', filas=n_registros)
 print("="*80)
 print("PASO 10: Generando visualizaciones gráficas...")
 print("="*80)
 
-# Crear figura con múltiples subgráficas
-fig = plt.figure(figsize=(16, 12))
-
-# 10.1 HISTOGRAMA - Distribución de Calificaciones de Matemáticas
-ax1 = plt.subplot(3, 3, 1)
-plt.hist(df['Calificacion_Matematicas'], bins=15, color='skyblue', edgecolor='black', alpha=0.7)
-plt.axvline(df['Calificacion_Matematicas'].mean(), color='red', linestyle='--', linewidth=2, label='Media')
-plt.axvline(df['Calificacion_Matematicas'].median(), color='green', linestyle='--', linewidth=2, label='Mediana')
-plt.xlabel('Calificación')
-plt.ylabel('Frecuencia')
-plt.title('Distribución de Calificaciones de Matemáticas')
-plt.legend()
-plt.grid(True, alpha=0.3)
-
-# 10.2 BOX PLOT - Comparación de calificaciones
-ax2 = plt.subplot(3, 3, 2)
-datos_boxplot = [df['Calificacion_Matematicas'], df['Calificacion_Ciencias']]
-plt.boxplot(datos_boxplot, labels=['Matemáticas', 'Ciencias'])
-plt.ylabel('Calificación')
-plt.title('Box Plot - Comparación de Calificaciones')
-plt.grid(True, alpha=0.3)
-
-# 10.3 SCATTER PLOT - Correlación Matemáticas vs Ciencias
-ax3 = plt.subplot(3, 3, 3)
-plt.scatter(df['Calificacion_Matematicas'], df['Calificacion_Ciencias'], 
-            alpha=0.6, s=50, color='purple')
-plt.xlabel('Calificación Matemáticas')
-plt.ylabel('Calificación Ciencias')
-plt.title(f'Correlación Matemáticas vs Ciencias\n(r = {correlacion_mat_cie:.3f})')
-# Añadir línea de tendencia
-z = np.polyfit(df['Calificacion_Matematicas'], df['Calificacion_Ciencias'], 1)
-p = np.poly1d(z)
-plt.plot(df['Calificacion_Matematicas'].sort_values(), 
-         p(df['Calificacion_Matematicas'].sort_values()), 
-         "r--", alpha=0.8, linewidth=2)
-plt.grid(True, alpha=0.3)
-
-# 10.4 HISTOGRAMA - Distribución de Horas de Estudio
-ax4 = plt.subplot(3, 3, 4)
-plt.hist(df['Horas_Estudio'], bins=8, color='lightcoral', edgecolor='black', alpha=0.7)
-plt.axvline(df['Horas_Estudio'].mean(), color='red', linestyle='--', linewidth=2, label='Media')
-plt.xlabel('Horas de Estudio')
-plt.ylabel('Frecuencia')
-plt.title('Distribución de Horas de Estudio')
-plt.legend()
-plt.grid(True, alpha=0.3)
-
-# 10.5 MAPA DE CALOR - Matriz de Correlación de Pearson
-ax5 = plt.subplot(3, 3, 5)
-sns.heatmap(matriz_correlacion, annot=True, cmap='coolwarm', center=0, 
-            square=True, linewidths=1, cbar_kws={"shrink": 0.8}, fmt='.3f')
-plt.title('Mapa de Calor - Correlación de Pearson')
-
-# 10.6 SCATTER PLOT - Horas de Estudio vs Calificación
-ax6 = plt.subplot(3, 3, 6)
-plt.scatter(df['Horas_Estudio'], df['Calificacion_Matematicas'], 
-            alpha=0.6, s=50, color='green')
-plt.xlabel('Horas de Estudio')
-plt.ylabel('Calificación Matemáticas')
-plt.title(f'Horas de Estudio vs Calificación\n(ρ = {spearman_mat_horas:.3f})')
-plt.grid(True, alpha=0.3)
-
-# 10.7 GRÁFICO DE BARRAS - Aprobados por Nivel Socioeconómico
-ax7 = plt.subplot(3, 3, 7)
-conteo = pd.crosstab(df['Nivel_Socioeconomico'], df['Aprobado'])
-conteo.plot(kind='bar', ax=ax7, color=['salmon', 'lightgreen'], alpha=0.7)
-plt.xlabel('Nivel Socioeconómico')
-plt.ylabel('Cantidad de Estudiantes')
-plt.title('Distribución de Aprobados por Nivel Socioeconómico')
-plt.xticks(rotation=0)
-plt.legend(title='Aprobado')
-plt.grid(True, alpha=0.3, axis='y')
-
-# 10.8 VIOLIN PLOT - Distribución de calificaciones por aprobado
-ax8 = plt.subplot(3, 3, 8)
-datos_violin = [
-    df[df['Aprobado']=='Si']['Calificacion_Matematicas'],
-    df[df['Aprobado']=='No']['Calificacion_Matematicas']
-]
-parts = plt.violinplot(datos_violin, positions=[1, 2], showmeans=True, showmedians=True)
-plt.xticks([1, 2], ['Aprobado: Sí', 'Aprobado: No'])
-plt.ylabel('Calificación Matemáticas')
-plt.title('Distribución de Calificaciones por Estado de Aprobación')
-plt.grid(True, alpha=0.3)
-
-# 10.9 MAPA DE CALOR - Matriz de Correlación de Spearman
-ax9 = plt.subplot(3, 3, 9)
-sns.heatmap(matriz_spearman, annot=True, cmap='viridis', center=0, 
-            square=True, linewidths=1, cbar_kws={"shrink": 0.8}, fmt='.3f')
-plt.title('Mapa de Calor - Correlación de Spearman')
-
-# Ajustar el espaciado entre gráficas
-plt.tight_layout()
-
-# Guardar la figura
 nombre_archivo_graficas = 'analisis_estadistico_completo.png'
-plt.savefig(nombre_archivo_graficas, dpi=300, bbox_inches='tight')
-print(f"✓ Gráficas guardadas en: {nombre_archivo_graficas}")
 
-# Mostrar las gráficas
-plt.show()
+if not datos_en_memoria:
+    print("✗ Gráficas omitidas: requieren los datos completos en memoria (modo_streaming = False y motor = 'pandas')")
+else:
+    # Cada panel se dibuja por separado (en paralelo con `procesos`) y se
+    # guarda en la caché de disco: si los datos no cambiaron, la figura se
+    # lee de `.cache_graficas/` sin volver a dibujar
+    if n_registros > LIMITE_FILAS_GRAFICAS:
+        print(f"Más de {LIMITE_FILAS_GRAFICAS:,} filas: scatters como histogramas 2D y violines con una muestra")
+    figura_png = generar_figura(df, resumen_estadistico, correlaciones, dpi=300, procesos=procesos)
+
+    # Guardar la figura
+    with open(nombre_archivo_graficas, 'wb') as archivo:
+        archivo.write(figura_png)
+    print(f"✓ Gráficas guardadas en: {nombre_archivo_graficas}")
 
 print("\n")
 
 # =============================================================================
 # 11. TABLA RESUMEN DE TODAS LAS MEDIDAS CALCULADAS
 # =============================================================================
+instrumentacion.marcar('PASO 11: Tabla resumen final', filas=n_registros)
 print("="*80)
 print("PASO 11: TABLA RESUMEN FINAL")
 print("="*80)
 
-# Crear un resumen personalizado
-resumen_completo = pd.DataFrame()
-
-for variable in variables_numericas:
-    resumen_completo[variable] = {
-        'Media': df[variable].mean(),
-        'Mediana': df[variable].median(),
-        'Moda': df[variable].mode().values[0] if len(df[variable].mode()) > 0 else np.nan,
-        'Mínimo': df[variable].min(),
-        'Máximo': df[variable].max(),
-        'Rango': df[variable].max() - df[variable].min(),
-        'Q1 (25%)': df[variable].quantile(0.25),
-        'Q3 (75%)': df[variable].quantile(0.75),
-        'Varianza': df[variable].var(),
-        'Desv. Estándar': df[variable].std(),
-        'Coef. Variación (%)': (df[variable].std() / df[variable].mean()) * 100
-    }
-
-resumen_completo = resumen_completo.T
+# Resumen personalizado a partir de las medidas calculadas en el PASO 4
+resumen_completo = resumen_estadistico.tabla()
 print("\nRESUMEN ESTADÍSTICO COMPLETO:")
 print(resumen_completo.round(2))
 
+# Las mismas medidas y las correlaciones por Nivel_Socioeconomico, Aprobado
+# y tramos de Edad, calculadas para todos los grupos a la vez (ver agrupado.py)
+analisis_grupos = None
+if not datos_en_memoria:
+    print("\n✗ Resumen por grupos omitido: requiere los datos completos en memoria (modo_streaming = False y motor = 'pandas')")
+else:
+    analisis_grupos = calcular_por_grupos(df, variables_numericas)
+    for agrupacion in analisis_grupos.agrupaciones():
+        print(f"\nMEDIA POR {agrupacion.upper()}:")
+        print(analisis_grupos.tabla(agrupacion, 'Media').round(2))
+
+# Intervalos bootstrap (opcional): 0 los desactiva; por ejemplo 1000.
+# `metodo_bootstrap` es 'bca' (corrige sesgo y asimetría) o 'percentil'.
+# Las remuestras se reparten en bloques entre `procesos` (ver bootstrap.py).
+remuestras_bootstrap = 0
+metodo_bootstrap = 'bca'
+
+resultado_bootstrap = None
+if remuestras_bootstrap and not datos_en_memoria:
+    print("\n✗ Intervalos bootstrap omitidos: requieren los datos completos en memoria (modo_streaming = False y motor = 'pandas')")
+elif remuestras_bootstrap:
+    resultado_bootstrap = calcular_bootstrap(df, variables_numericas, remuestras_bootstrap,
+                                             metodo=metodo_bootstrap, procesos=procesos)
+    print(f"\n{resultado_bootstrap.descripcion().upper()}:")
+    print(resultado_bootstrap.texto_resumen().to_string())
+    for metodo in ('pearson', 'spearman'):
+        print(f"\nCorrelación {metodo.capitalize()} con intervalo bootstrap:")
+        print(resultado_bootstrap.texto_matriz(metodo).to_string())
+
 # =============================================================================
 # 12. EXPORTAR RESULTADOS A EXCEL
 # =============================================================================
 print("\n")
+instrumentacion.marcar('PASO 12: Exportación a Excel', filas=n_registros)
 print("="*80)
 print("PASO 12: Exportando resultados a Excel")
 print("="*80)
@@ -451,28 +576,84 @@ print("="*80)
 # Crear archivo Excel con múltiples hojas
 nombre_archivo_excel = 'resultados_analisis_estadistico.xlsx'
 
-with pd.ExcelWriter(nombre_archivo_excel, engine='openpyxl') as writer:
-    # Hoja 1: Datos originales
-    df.to_excel(writer, sheet_name='Datos_Originales', index=False)
+# Dónde se guardan los datos originales: 'excel' (hoja Datos_Originales; si
+# pasa del límite de filas de Excel continúa en Datos_Originales_2, ...),
+# 'parquet' y/o 'csv.gz' (archivos aparte junto al Excel, por ejemplo
+# resultados_analisis_estadistico_datos.parquet). Las hojas de resultados
+# siempre van en el Excel. Todo se escribe por bloques, en memoria constante.
+salidas_datos_originales = ['excel']
 
-    # Hoja 2: Resumen estadístico
-    resumen_completo.to_excel(writer, sheet_name='Resumen_Estadistico')
+# En modo incremental, si no llegaron filas nuevas el Excel existente sigue vigente
+sin_cambios = motor == 'pandas' and modo_streaming and modo_incremental and info_incremental['modo'] == 'sin cambios'
 
-    # Hoja 3: Correlación Pearson
-    matriz_correlacion.to_excel(writer, sheet_name='Correlacion_Pearson')
 
-    # Hoja 4: Correlación Spearman
-    matriz_spearman.to_excel(writer, sheet_name='Correlacion_Spearman')
+def bloques_datos_originales():
+    # Los datos se copian del CSV bloque a bloque: el DataFrame en memoria solo
+    # tiene las columnas del análisis (columnas_analisis), sin 'Estudiante'
+    return bloques_csv(expandir_rutas(ruta_archivo), tamano_bloque)
 
-    # Hoja 5: Tabla de contingencia
-    tabla_contingencia.to_excel(writer, sheet_name='Tabla_Contingencia')
 
-print(f"✓ Resultados exportados exitosamente a: {nombre_archivo_excel}")
+if sin_cambios and os.path.exists(nombre_archivo_excel):
+    print(f"✓ Sin filas nuevas: se conserva {nombre_archivo_excel}")
+else:
+    # Libro en modo de solo escritura: cada fila se vuelca al archivo al agregarla
+    with LibroExcel(nombre_archivo_excel) as libro:
+        # Hoja 1: Datos originales (en modo streaming o con DuckDB solo van a los archivos aparte)
+        if 'excel' in salidas_datos_originales and datos_en_memoria:
+            hojas_datos = libro.agregar_datos(bloques_datos_originales(), 'Datos_Originales')
+            if len(hojas_datos) > 1:
+                print(f"Datos originales repartidos en {len(hojas_datos)} hojas: {', '.join(hojas_datos)}")
+
+        # Hoja 2: Resumen estadístico
+        libro.agregar_tabla(resumen_completo, 'Resumen_Estadistico')
+
+        # Hoja 3: Correlación Pearson
+        libro.agregar_tabla(matriz_correlacion, 'Correlacion_Pearson')
+
+        # Hoja 4: Correlación Spearman
+        libro.agregar_tabla(matriz_spearman, 'Correlacion_Spearman')
+
+        # Hoja 5: Tabla de contingencia
+        libro.agregar_tabla(tabla_contingencia, 'Tabla_Contingencia')
+
+        # Hoja 6: Cribado de asociación entre variables categóricas
+        if asociaciones is not None:
+            libro.agregar_tabla(asociaciones.pares, 'Asociacion_Categoricas', index=False)
+
+        # Hoja 7: P-valores por permutación y exactos de Fisher
+        if pruebas_significancia is not None:
+            libro.agregar_tabla(pruebas_significancia.pruebas, 'Pruebas_Permutacion', index=False)
+
+        # Hojas 8 y 9: Medidas y correlaciones por grupo (formato largo)
+        if analisis_grupos is not None:
+            libro.agregar_tabla(analisis_grupos.medidas, 'Resumen_Por_Grupos', index=False)
+            libro.agregar_tabla(analisis_grupos.correlaciones, 'Correlacion_Por_Grupos', index=False)
+
+        # Hojas 10 y 11: Resumen con intervalos bootstrap junto a cada medida e
+        # intervalos de todas las medidas y correlaciones (formato largo)
+        if resultado_bootstrap is not None:
+            libro.agregar_tabla(resultado_bootstrap.tabla_resumen(), 'Resumen_Bootstrap')
+            libro.agregar_tabla(resultado_bootstrap.intervalos, 'Intervalos_Bootstrap', index=False)
+
+        # Hojas 12 y 13: Límites de cada método y registros atípicos con los
+        # métodos que marcaron cada variable
+        if atipicos is not None:
+            libro.agregar_tabla(atipicos.limites, 'Limites_Atipicos', index=False)
+            libro.agregar_datos(etiquetas_originales(registros_atipicos), 'Registros_Atipicos')
+
+    print(f"✓ Resultados exportados exitosamente a: {nombre_archivo_excel}")
+
+    # Datos originales en Parquet o CSV comprimido
+    for formato in salidas_datos_originales:
+        if formato != 'excel':
+            ruta_salida = exportar_datos(bloques_datos_originales(), ruta_datos(nombre_archivo_excel, formato), formato)
+            print(f"✓ Datos originales exportados a: {ruta_salida}")
 
 # =============================================================================
 # 13. CONCLUSIONES FINALES
 # =============================================================================
 print("\n")
+instrumentacion.marcar('PASO 13: Conclusiones', filas=n_registros)
 print("="*80)
 print("CONCLUSIONES DEL ANÁLISIS")
 print("="*80)
@@ -501,10 +682,26 @@ print("="*80)
 print("ANÁLISIS COMPLETADO EXITOSAMENTE")
 print("="*80)
 print("\nArchivos generados:")
-print(f"1. {nombre_archivo_graficas}")
+if datos_en_memoria:
+    print(f"1. {nombre_archivo_graficas}")
 print(f"2. {nombre_archivo_excel}")
+for numero, formato in enumerate([f for f in salidas_datos_originales if f != 'excel'], start=3):
+    print(f"{numero}. {ruta_datos(nombre_archivo_excel, formato)}")
 print("\n")
 
+# Resumen de la instrumentación: dónde se fue el tiempo y la memoria
+instrumentacion.finalizar()
+if instrumentar:
+    print("="*80)
+    print("TIEMPO Y MEMORIA POR PASO")
+    print("="*80)
+    print(instrumentacion.tabla().round(3).to_string(index=False))
+    for paso_perfilado in instrumentacion.perfiles:
+        print(f"\nPerfil de {paso_perfilado}:")
+        print(instrumentacion.texto_perfil(paso_perfilado))
+    instrumentacion.guardar(archivo_traza)
+    print(f"\n✓ Traza guardada en: {archivo_traza}")
+
 
 # In[ ]:
 
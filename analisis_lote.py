@@ -0,0 +1,239 @@
+"""
+ANÁLISIS EN LOTE DESDE LA LÍNEA DE COMANDOS
+=========================================================
+
+Ejecuta el análisis de `analisis_estadistico.py` sobre muchos archivos CSV
+sin interacción: sin gráficas en pantalla ni textos de interpretación. Cada
+archivo se analiza en su propio proceso (hasta `--procesos` a la vez) y deja
+en el directorio de salida:
+
+- <archivo>_resultados.xlsx con las hojas de los pasos elegidos
+- <archivo>_graficas.png, si se pide el paso 'graficas'
+- <archivo>_datos.parquet / .csv.gz, si se piden con `--datos`
+
+Al final se escribe `resumen_lote.csv` con una fila por archivo (filas,
+segundos, estado y error si lo hubo). Un archivo con errores no detiene el
+lote; el código de salida es 1 si alguno falló. matplotlib y seaborn solo se
+importan cuando se piden las gráficas.
+
+    python analisis_lote.py 'datos/sede_*.csv' --salida resultados/
+    python analisis_lote.py 'datos/*.csv' --salida resultados/ --pasos resumen graficas --procesos 8 --silencioso
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+from agrupado import calcular_por_grupos
+from asociacion import calcular_asociaciones
+from bootstrap import REMUESTRAS_BOOTSTRAP, calcular_bootstrap
+from carga_datos import cargar_csv
+from correlaciones import calcular_correlaciones
+from esquema import ETIQUETAS_BOOLEANAS, VARIABLES_NUMERICAS, aplicar_esquema, etiquetas_originales
+from estadisticas import calcular_resumen
+from exportacion import FORMATOS_DATOS, LibroExcel, bloques_dataframe, exportar_datos, ruta_datos
+from paralelo import _contexto_procesos, expandir_rutas
+from permutaciones import PERMUTACIONES_MAXIMAS, calcular_pruebas
+
+# Pasos que se pueden pedir con --pasos (nombre: PASO del script)
+PASOS_LOTE = {
+    'resumen': 'PASOS 4-6 y 11: medidas de posición y variabilidad',
+    'correlaciones': 'PASOS 7-8: Pearson y Spearman',
+    'contingencia': 'PASO 9: tabla de contingencia Nivel_Socioeconomico vs Aprobado',
+    'asociacion': 'PASO 9: cribado de asociación entre variables categóricas',
+    'permutaciones': 'PASO 9: p-valores por permutación y prueba exacta de Fisher',
+    'grupos': 'PASO 11: medidas y correlaciones por grupo',
+    'bootstrap': 'PASO 11: intervalos bootstrap',
+    'graficas': 'PASO 10: figura con las 9 gráficas (PNG)'
+}
+PASOS_POR_DEFECTO = ['resumen', 'correlaciones', 'contingencia', 'asociacion', 'grupos']
+
+ARCHIVO_RESUMEN = 'resumen_lote.csv'
+COLUMNAS_RESUMEN = ['archivo', 'filas', 'segundos', 'estado', 'error', 'salidas']
+
+
+# =============================================================================
+# ANÁLISIS DE UN ARCHIVO
+# =============================================================================
+
+def _hojas(df, pasos, variables, opciones):
+    """Hojas del Excel de un archivo, en el orden del script: lista de
+    (nombre, tabla, index). También devuelve la figura si se pidió."""
+    hojas = []
+    resumen = correlaciones = figura = None
+    if 'resumen' in pasos or 'graficas' in pasos:
+        resumen = calcular_resumen(df, variables)
+    if 'correlaciones' in pasos or 'graficas' in pasos:
+        correlaciones = calcular_correlaciones(df, variables)
+
+    if 'resumen' in pasos:
+        hojas.append(('Resumen_Estadistico', resumen.tabla(), True))
+    if 'correlaciones' in pasos:
+        hojas.append(('Correlacion_Pearson', correlaciones['pearson'].matriz(), True))
+        hojas.append(('Correlacion_Spearman', correlaciones['spearman'].matriz(), True))
+    if 'contingencia' in pasos:
+        tabla = pd.crosstab(df['Nivel_Socioeconomico'], df['Aprobado']).rename(columns=ETIQUETAS_BOOLEANAS)
+        hojas.append(('Tabla_Contingencia', tabla, True))
+    if 'asociacion' in pasos:
+        hojas.append(('Asociacion_Categoricas', calcular_asociaciones(df).pares, False))
+    if 'permutaciones' in pasos:
+        pruebas = calcular_pruebas(df, variables, permutaciones_maximas=opciones['permutaciones_maximas'])
+        hojas.append(('Pruebas_Permutacion', pruebas.pruebas, False))
+    if 'grupos' in pasos:
+        grupos = calcular_por_grupos(df, variables)
+        hojas.append(('Resumen_Por_Grupos', grupos.medidas, False))
+        hojas.append(('Correlacion_Por_Grupos', grupos.correlaciones, False))
+    if 'bootstrap' in pasos:
+        resultado = calcular_bootstrap(df, variables, opciones['remuestras_bootstrap'], procesos=1)
+        hojas.append(('Resumen_Bootstrap', resultado.tabla_resumen(), True))
+        hojas.append(('Intervalos_Bootstrap', resultado.intervalos, False))
+    if 'graficas' in pasos:
+        # Solo aquí: graficas.py y matplotlib no se cargan si no hay gráficas
+        from graficas import generar_figura
+
+        figura = generar_figura(df, resumen, correlaciones, dpi=opciones['dpi'], procesos=1,
+                                usar_cache=opciones['usar_cache'])
+    return hojas, figura
+
+
+def analizar_archivo(ruta, base_salida, pasos=PASOS_POR_DEFECTO, variables=VARIABLES_NUMERICAS,
+                     salidas_datos=(), usar_cache=True, dpi=300, remuestras_bootstrap=REMUESTRAS_BOOTSTRAP,
+                     permutaciones_maximas=PERMUTACIONES_MAXIMAS):
+    """Analiza un CSV y escribe sus resultados con el prefijo `base_salida`
+    (por ejemplo 'resultados/sede_a'). Nunca lanza excepciones: devuelve un
+    diccionario con las columnas de COLUMNAS_RESUMEN."""
+    inicio = time.perf_counter()
+    registro = {'archivo': ruta, 'filas': None, 'estado': 'ok', 'error': '', 'salidas': ''}
+    salidas = []
+    try:
+        df = aplicar_esquema(cargar_csv(ruta, usar_cache=usar_cache))
+        registro['filas'] = len(df)
+        opciones = {'usar_cache': usar_cache, 'dpi': dpi, 'remuestras_bootstrap': remuestras_bootstrap,
+                    'permutaciones_maximas': permutaciones_maximas}
+        hojas, figura = _hojas(df, set(pasos), list(variables), opciones)
+
+        if figura is not None:
+            ruta_figura = f"{base_salida}_graficas.png"
+            with open(ruta_figura, 'wb') as archivo:
+                archivo.write(figura)
+            salidas.append(ruta_figura)
+
+        ruta_excel = f"{base_salida}_resultados.xlsx"
+        if hojas or 'excel' in salidas_datos:
+            with LibroExcel(ruta_excel) as libro:
+                if 'excel' in salidas_datos:
+                    libro.agregar_datos((etiquetas_originales(bloque) for bloque in bloques_dataframe(df)),
+                                        'Datos_Originales')
+                for nombre, tabla, index in hojas:
+                    libro.agregar_tabla(tabla, nombre, index=index)
+            salidas.append(ruta_excel)
+
+        for formato in salidas_datos:
+            if formato != 'excel':
+                bloques = (etiquetas_originales(bloque) for bloque in bloques_dataframe(df))
+                salidas.append(exportar_datos(bloques, ruta_datos(ruta_excel, formato), formato))
+    except Exception as error:
+        registro['estado'] = 'error'
+        registro['error'] = f"{type(error).__name__}: {error}"
+    registro['segundos'] = time.perf_counter() - inicio
+    registro['salidas'] = ';'.join(salidas)
+    return registro
+
+
+# =============================================================================
+# LOTE DE ARCHIVOS
+# =============================================================================
+
+def nombres_salida(rutas):
+    """Nombre base de los resultados de cada archivo: el nombre del CSV sin
+    extensión o, si dos archivos se llaman igual en carpetas distintas, su
+    ruta relativa a la carpeta común con '/' reemplazado por '_'."""
+    bases = [os.path.splitext(os.path.basename(ruta))[0] for ruta in rutas]
+    if len(set(bases)) == len(bases):
+        return bases
+    comun = os.path.commonpath([os.path.abspath(os.path.dirname(ruta)) for ruta in rutas])
+    return [os.path.splitext(os.path.relpath(os.path.abspath(ruta), comun))[0].replace(os.sep, '_')
+            for ruta in rutas]
+
+
+def ejecutar_lote(rutas, directorio_salida, pasos=PASOS_POR_DEFECTO, procesos=None, silencioso=False,
+                  **opciones):
+    """Analiza cada archivo de `rutas` (hasta `procesos` a la vez, None = uno
+    por núcleo) y guarda el resumen del lote. Devuelve el resumen como
+    DataFrame, en el orden de `rutas`."""
+    os.makedirs(directorio_salida, exist_ok=True)
+    bases = [os.path.join(directorio_salida, nombre) for nombre in nombres_salida(rutas)]
+
+    def informar(registro):
+        if registro['estado'] != 'ok':
+            print(f"✗ {registro['archivo']}: {registro['error']}", file=sys.stderr)
+        elif not silencioso:
+            print(f"✓ {registro['archivo']} ({registro['filas']} filas, {registro['segundos']:.2f} s)")
+
+    procesos = min(procesos or os.cpu_count() or 1, max(len(rutas), 1))
+    registros = {}
+    if procesos == 1:
+        for ruta, base in zip(rutas, bases):
+            registros[ruta] = analizar_archivo(ruta, base, pasos, **opciones)
+            informar(registros[ruta])
+    else:
+        with ProcessPoolExecutor(max_workers=procesos, mp_context=_contexto_procesos()) as ejecutor:
+            futuros = {ejecutor.submit(analizar_archivo, ruta, base, pasos, **opciones): ruta
+                       for ruta, base in zip(rutas, bases)}
+            for futuro in as_completed(futuros):
+                registros[futuros[futuro]] = futuro.result()
+                informar(registros[futuros[futuro]])
+
+    resumen = pd.DataFrame([registros[ruta] for ruta in rutas], columns=COLUMNAS_RESUMEN).astype({'filas': 'Int64'})
+    resumen.to_csv(os.path.join(directorio_salida, ARCHIVO_RESUMEN), index=False)
+    return resumen
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(
+        description="Análisis estadístico en lote de varios archivos CSV, sin gráficas en pantalla",
+        epilog="Pasos: " + "; ".join(f"{paso} ({descripcion})" for paso, descripcion in PASOS_LOTE.items())
+    )
+    parser.add_argument('entradas', nargs='+', help="Archivos o patrones (por ejemplo 'datos/sede_*.csv')")
+    parser.add_argument('--salida', required=True, help="Directorio donde se guardan los resultados")
+    parser.add_argument('--pasos', nargs='+', choices=list(PASOS_LOTE), default=PASOS_POR_DEFECTO)
+    parser.add_argument('--procesos', type=int, default=None,
+                        help="Archivos analizados a la vez (por defecto, uno por núcleo)")
+    parser.add_argument('--variables', nargs='+', default=VARIABLES_NUMERICAS)
+    parser.add_argument('--datos', nargs='+', choices=FORMATOS_DATOS, default=[],
+                        help="Guardar también los datos originales (hoja de Excel, Parquet o CSV comprimido)")
+    parser.add_argument('--dpi', type=int, default=300, help="Resolución de las gráficas")
+    parser.add_argument('--remuestras-bootstrap', type=int, default=REMUESTRAS_BOOTSTRAP)
+    parser.add_argument('--permutaciones', type=int, default=PERMUTACIONES_MAXIMAS,
+                        help="Máximo de permutaciones por prueba")
+    parser.add_argument('--sin-cache', action='store_true',
+                        help="No usar ni crear las cachés columnar y de gráficas")
+    parser.add_argument('--silencioso', action='store_true', help="Mostrar solo los errores")
+    argumentos = parser.parse_args(argumentos)
+
+    try:
+        rutas = expandir_rutas(argumentos.entradas)
+    except FileNotFoundError as error:
+        parser.error(str(error))
+
+    inicio = time.perf_counter()
+    resumen = ejecutar_lote(
+        rutas, argumentos.salida, argumentos.pasos, argumentos.procesos, argumentos.silencioso,
+        variables=argumentos.variables, salidas_datos=argumentos.datos, usar_cache=not argumentos.sin_cache,
+        dpi=argumentos.dpi, remuestras_bootstrap=argumentos.remuestras_bootstrap,
+        permutaciones_maximas=argumentos.permutaciones
+    )
+    errores = int((resumen['estado'] != 'ok').sum())
+    if not argumentos.silencioso:
+        print(f"\n{len(resumen) - errores} de {len(resumen)} archivos analizados en "
+              f"{time.perf_counter() - inicio:.1f} s; resumen en "
+              f"{os.path.join(argumentos.salida, ARCHIVO_RESUMEN)}")
+    return 1 if errores else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -11,10 +11,32 @@ Fecha: Enero 2026
 import streamlit as st
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
-from scipy import stats
 import io
+import os
+import time
+import uuid
+
+from acumuladores import analizar_csv_por_bloques
+from agrupado import calcular_por_grupos
+from carga_datos import (ESQUEMA_ANALISIS, MAXIMO_SUBIDAS, abrir_columnar, cargar_csv, columnas_analisis,
+                         convertir_a_columnar, huella_archivo, huella_contenido, limpiar_subidas, ruta_subida)
+from consultas import MOTORES, analizar_con_duckdb, motor_disponible
+from asociacion import calcular_asociaciones
+from atipicos import METODOS_ATIPICOS, NOMBRES_METODOS, detectar_atipicos
+from bootstrap import METODOS_INTERVALO, calcular_bootstrap
+from correlaciones import calcular_correlaciones
+from esquema import ETIQUETAS_BOOLEANAS, VARIABLES_NUMERICAS, aplicar_esquema, uso_memoria
+from estadisticas import MEDIDAS_RESUMEN, calcular_resumen
+from filtros import MAXIMO_VALORES_INDICE, bitmap_rango_datos, construir_indice
+from graficas import generar_figura
+from instrumentacion import Instrumentacion
+from permutaciones import LIMITE_FILAS_PERMUTACION, calcular_pruebas, fisher_exacto
+from trabajos import GestorTrabajos, esperar_primeros
+
+# Arranque en frío: en el nivel superior solo se importan módulos ligeros.
+# scipy.stats, matplotlib y seaborn se importan dentro de las funciones que
+# los usan, al llegar a su sección, y la figura del PASO 10 se dibuja en
+# segundo plano (ver `python benchmark.py --arranque`)
 
 # =============================================================================
 # CONFIGURACIÓN DE STREAMLIT
@@ -25,9 +47,27 @@ st.set_page_config(
     layout="wide"
 )
 
-# Configurar estilo de gráficas (igual que el notebook)
-plt.style.use('seaborn-v0_8-darkgrid')
-sns.set_palette("husl")
+# Instrumentación: tiempo real, tiempo de CPU y memoria de cada PASO en esta
+# ejecución de la app (se muestra al final de la página)
+PASOS_APP = [
+    'PASO 1', 'PASO 2', 'PASO 3', 'PASO 4', 'PASO 5', 'PASO 6',
+    'PASO 7', 'PASO 8', 'PASO 9', 'PASO 10', 'PASO 11', 'PASO 12'
+]
+mostrar_instrumentacion = st.sidebar.checkbox(
+    "Mostrar tiempo y memoria por paso",
+    value=False,
+    help="Tiempo real, tiempo de CPU y memoria de cada PASO en esta ejecución."
+)
+perfilar_paso = st.sidebar.selectbox(
+    "Perfilar paso (cProfile)",
+    options=['(ninguno)'] + PASOS_APP,
+    disabled=not mostrar_instrumentacion
+)
+instrumentacion = Instrumentacion(
+    activa=mostrar_instrumentacion,
+    perfilar=None if perfilar_paso == '(ninguno)' else perfilar_paso
+)
+inicio_ejecucion = time.time()
 
 # =============================================================================
 # TÍTULO PRINCIPAL
@@ -47,29 +87,261 @@ st.divider()
 # =============================================================================
 # 1. IMPORTACIÓN DE LIBRERÍAS NECESARIAS
 # =============================================================================
+instrumentacion.marcar('PASO 1: Importación de librerías')
 st.header("PASO 1: Importando librerías necesarias...")
 st.success("✓ Librerías importadas correctamente")
+st.caption("scipy, matplotlib y seaborn se cargan al llegar a la sección que los usa.")
 
 # =============================================================================
 # 2. CARGA DE DATOS DESDE ARCHIVO CSV
 # =============================================================================
+instrumentacion.marcar('PASO 2: Carga de datos')
 st.header("PASO 2: Cargando datos desde archivo CSV...")
 
-@st.cache_data
-def cargar_datos():
+RUTA_DATOS = 'estudiantes_datos.csv'
+
+# Cachés de resultados: la carga, el resumen, los grupos y el bootstrap se
+# guardan por separado con la huella del CSV (tamaño y fecha de modificación)
+# como clave; las correlaciones, el Chi-cuadrado y la figura, en los trabajos
+# en segundo plano de los PASOS 7 a 10, con la misma huella. Las recargas de la página y
+# las sesiones de otros usuarios reutilizan el mismo resultado; si el CSV
+# cambia, cambia la huella y se recalcula. Streamlit no usa como clave los
+# argumentos que empiezan con '_' (los datos ya están representados por la huella).
+#
+# Un CSV subido se convierte por bloques (validando el esquema) en un archivo
+# columnar en .cache_columnar/subidas/, con una barra de progreso, y todas las
+# secciones trabajan sobre ese archivo abierto con memoria mapeada. El
+# archivo se nombra con la huella del contenido (volver a subirlo reutiliza
+# la conversión) y solo se conservan los MAXIMO_SUBIDAS usados más
+# recientemente: se limpian al arrancar el servidor y después de cada
+# conversión. El tamaño máximo de la subida se configura en
+# .streamlit/config.toml.
+@st.cache_resource
+def limpiar_subidas_al_arrancar():
+    return limpiar_subidas()
+
+@st.cache_data(max_entries=MAXIMO_SUBIDAS, show_spinner="Calculando la huella del archivo...")
+def huella_subida(identificador_subida, _archivo):
+    return huella_contenido(_archivo)
+
+limpiar_subidas_al_arrancar()
+archivo_subido = st.sidebar.file_uploader(
+    "Analizar un CSV propio",
+    type='csv',
+    help="Debe tener las columnas de estudiantes_datos.csv. Se convierte una sola vez a formato columnar."
+)
+if archivo_subido is not None:
+    huella_contenido_subida = huella_subida(archivo_subido.file_id, archivo_subido)
+    huella_datos = f"subida:{huella_contenido_subida}"
+    ruta_columnar = ruta_subida(huella_contenido_subida)
+    try:
+        # Marca el archivo como usado recientemente para la limpieza
+        os.utime(ruta_columnar)
+    except FileNotFoundError:
+        archivo_subido.seek(0)
+        barra_progreso = st.progress(0.0, text=f"Convirtiendo '{archivo_subido.name}'...")
+
+        def mostrar_avance(leidos, total):
+            barra_progreso.progress(min(leidos / total, 1.0),
+                                    text=f"Convirtiendo '{archivo_subido.name}': "
+                                         f"{leidos / 2**20:,.0f} de {total / 2**20:,.0f} MB")
+
+        try:
+            convertir_a_columnar(archivo_subido, ruta_columnar, progreso=mostrar_avance,
+                                 tamano_total=archivo_subido.size)
+        except ValueError as error:
+            st.error(f"❌ El archivo '{archivo_subido.name}' no cumple el esquema de datos: {error}")
+            st.stop()
+        barra_progreso.empty()
+        limpiar_subidas(excluir=[ruta_columnar])
+else:
     try:
-        df = pd.read_csv('estudiantes_datos.csv')
-        return df
-    except:
+        huella_datos = huella_archivo(RUTA_DATOS)
+    except FileNotFoundError:
         st.error("❌ No se encontró el archivo 'estudiantes_datos.csv'")
-        st.info("📝 Por favor, suba el archivo CSV en su repositorio de GitHub")
+        st.info("📝 Suba un archivo CSV desde la barra lateral o agréguelo a su repositorio de GitHub")
         st.stop()
 
-df = cargar_datos()
+@st.cache_data
+def cargar_datos(huella):
+    # Usa la caché columnar (.cache_columnar/) para evitar reinterpretar el CSV
+    # leyendo solo las columnas del análisis, y aplica el esquema validado con
+    # tipos compactos (esquema.py)
+    df = cargar_csv(RUTA_DATOS, columnas=columnas_analisis(RUTA_DATOS))
+    memoria_original = uso_memoria(df)
+    df = aplicar_esquema(df, ESQUEMA_ANALISIS)
+    return df, memoria_original, uso_memoria(df)
+
+# cache_resource y no cache_data: el DataFrame del archivo subido queda
+# respaldado por el archivo mapeado y no se copia en cada ejecución
+@st.cache_resource(show_spinner="Abriendo el archivo convertido...", max_entries=MAXIMO_SUBIDAS)
+def abrir_subida(ruta_columnar):
+    return abrir_columnar(ruta_columnar)
+
+# Modo streaming: el CSV se lee en bloques y los PASOS 4 a 9 se calculan con
+# acumuladores combinables, sin cargar el archivo completo en memoria
+modo_streaming = st.sidebar.checkbox(
+    "Modo streaming (archivos grandes)",
+    value=False,
+    help="Lee el CSV por bloques. Las gráficas del PASO 10 no están disponibles en este modo.",
+    disabled=archivo_subido is not None
+)
+tamano_bloque = 100_000
+
+# Motor de cálculo: 'duckdb' (si está instalado) calcula los PASOS 3 a 9 y 11
+# con consultas sobre el CSV, sin cargarlo completo en memoria (consultas.py)
+motor = st.sidebar.selectbox(
+    "Motor de cálculo",
+    options=[m for m in MOTORES if motor_disponible(m)],
+    help="'duckdb' ejecuta consultas de agregación sobre el CSV (o su copia Parquet) con varios hilos. "
+         "Como el modo streaming, no incluye gráficas, grupos ni bootstrap.",
+    disabled=archivo_subido is not None
+)
+if archivo_subido is not None:
+    # El archivo subido ya está en formato columnar y se analiza con pandas
+    modo_streaming, motor = False, 'pandas'
+
+# Cuantiles (mediana, Q1, Q3 y bigotes del box plot): exactos o aproximados
+# con un sketch KLL de memoria constante
+backend_cuantiles = st.sidebar.selectbox(
+    "Cálculo de cuantiles",
+    options=['exacto', 'kll'],
+    help="'kll' aproxima mediana y cuartiles con un sketch de memoria constante."
+)
+error_cuantiles = 0.01
+
+# Seleccionar variables numéricas para análisis (igual que en el notebook y el script)
+variables_numericas = list(VARIABLES_NUMERICAS)
+LIMITE_FILAS_ATIPICOS = 1000  # registros atípicos que se muestran en el PASO 6
+
+@st.cache_data
+def analizar_por_bloques(huella, variables, tamano_bloque, error_cuantiles):
+    return analizar_csv_por_bloques(
+        RUTA_DATOS, variables,
+        par_contingencia=('Nivel_Socioeconomico', 'Aprobado'),
+        tamano_bloque=tamano_bloque,
+        error_cuantiles=error_cuantiles
+    )
+
+@st.cache_data(show_spinner="Consultando con DuckDB...")
+def consultar_con_duckdb(huella, variables):
+    return analizar_con_duckdb(RUTA_DATOS, variables, par_contingencia=('Nivel_Socioeconomico', 'Aprobado'))
+
+if motor == 'duckdb':
+    estado = consultar_con_duckdb(huella_datos, variables_numericas)
+    df = estado.muestra  # Solo las primeras filas, para mostrarlas
+    n_registros = estado.n_registros
+elif modo_streaming:
+    estado = analizar_por_bloques(huella_datos, variables_numericas, tamano_bloque, error_cuantiles)
+    df = estado.muestra  # Solo las primeras filas, para mostrarlas
+    n_registros = estado.n_registros
+elif archivo_subido is not None:
+    df = abrir_subida(ruta_columnar)
+    n_registros = len(df)
+else:
+    df, memoria_original, memoria_compacta = cargar_datos(huella_datos)
+    n_registros = len(df)
+# Las secciones que recorren todas las filas del DataFrame solo se muestran en memoria
+datos_en_memoria = motor == 'pandas' and not modo_streaming
+
+# Filtros de la barra lateral: el índice de bitmaps se construye una vez por
+# archivo (filtros.py) y cada combinación de filtros se resuelve con AND/OR de
+# bitmaps. Solo las filas seleccionadas pasan a los PASOS siguientes; los
+# filtros forman parte de la huella, así que cada combinación se calcula una vez.
+# Una columna con demasiados valores distintos para el índice (por ejemplo,
+# una Edad continua en un CSV subido) se filtra por rango con una máscara
+# booleana si es numérica; si no, su filtro no se muestra.
+@st.cache_resource(show_spinner="Indexando columnas para los filtros...", max_entries=4)
+def indice_en_cache(huella, _df):
+    return construir_indice(_df, omitir_excedidas=True)
+
+def avisar_sin_filtro(columna):
+    st.sidebar.info(f"Sin filtro de {columna}: tiene {indice.omitidas[columna]:,} valores distintos "
+                    f"(el índice admite hasta {MAXIMO_VALORES_INDICE}).")
+
+st.sidebar.subheader("Filtros")
+if datos_en_memoria:
+    indice = indice_en_cache(huella_datos, _df=df)
+    filtros_valores, filtros_rangos, filtros_mascara = {}, {}, {}
+    for columna, etiqueta, formato in [
+        ('Nivel_Socioeconomico', "Nivel socioeconómico", str),
+        ('Aprobado', "Aprobado", lambda valor: ETIQUETAS_BOOLEANAS.get(valor, str(valor)))
+    ]:
+        if columna in indice.omitidas:
+            avisar_sin_filtro(columna)
+            continue
+        elegidos = st.sidebar.multiselect(etiqueta, indice.valores[columna], default=indice.valores[columna],
+                                          format_func=formato)
+        # Un filtro con todos los valores no se aplica (conserva las filas con nulos)
+        if len(elegidos) < len(indice.valores[columna]):
+            filtros_valores[columna] = elegidos
+
+    if 'Edad' not in indice.omitidas:
+        edades = indice.valores['Edad']
+        rango_edad = (st.sidebar.select_slider("Edad", options=edades, value=(edades[0], edades[-1]))
+                      if len(edades) > 1 else None)
+        if rango_edad and tuple(rango_edad) != (edades[0], edades[-1]):
+            filtros_rangos['Edad'] = tuple(rango_edad)
+    elif pd.api.types.is_numeric_dtype(df['Edad'].dtype):
+        extremos_edad = (float(df['Edad'].min()), float(df['Edad'].max()))
+        rango_edad = st.sidebar.slider("Edad", *extremos_edad, value=extremos_edad)
+        if tuple(rango_edad) != extremos_edad:
+            filtros_mascara['Edad'] = tuple(rango_edad)
+    else:
+        avisar_sin_filtro('Edad')
+
+    if filtros_valores or filtros_rangos or filtros_mascara:
+        seleccion = indice.seleccionar(filtros_valores, filtros_rangos, [
+            bitmap_rango_datos(df[columna].to_numpy(dtype=np.float64), *limites)
+            for columna, limites in filtros_mascara.items()
+        ])
+        n_registros = indice.contar(seleccion)
+        st.sidebar.caption(f"{n_registros:,} de {indice.n_filas:,} registros")
+        if n_registros == 0:
+            st.warning("⚠️ Ningún registro cumple los filtros de la barra lateral")
+            st.stop()
+        df = df.take(indice.filas(seleccion))
+        huella_datos = f"{huella_datos}|filtros:{filtros_valores}{filtros_rangos}{filtros_mascara}"
+else:
+    st.sidebar.caption("Los filtros requieren el motor pandas sin modo streaming.")
+
+# Todas las medidas se calculan una sola vez (un ordenamiento por columna)
+# y los PASOS 4, 5, 6 y 11 se muestran a partir de este mismo resultado
+@st.cache_data
+def resumen_en_cache(huella, variables, backend_cuantiles, error_cuantiles, _df):
+    return calcular_resumen(_df, variables, backend_cuantiles, error_cuantiles)
+
+# Atípicos (PASO 6): las marcas salen de los cuartiles, la mediana y los
+# momentos del resumen en caché de los mismos datos (ver atipicos.py)
+@st.cache_data(show_spinner="Detectando valores atípicos...")
+def atipicos_en_cache(huella, variables, backend_cuantiles, error_cuantiles, _df):
+    resumen = resumen_en_cache(huella, variables, backend_cuantiles, error_cuantiles, _df=_df)
+    return detectar_atipicos(_df, resumen, variables)
+
+# Exclusión de atípicos (se elige en el PASO 6): se quitan las filas marcadas
+# en los datos sin excluir, con su máscara en caché, sin volver a detectarlas.
+# Las secciones siguientes usan las filas restantes, con su propia huella
+df_con_atipicos, huella_con_atipicos = df, huella_datos
+excluir_atipicos = st.session_state.get('excluir_atipicos', []) if datos_en_memoria else []
+if excluir_atipicos:
+    atipicos = atipicos_en_cache(huella_datos, variables_numericas, backend_cuantiles, error_cuantiles, _df=df)
+    df = df[~atipicos.marcadas(excluir_atipicos)]
+    n_registros = len(df)
+    huella_datos = f"{huella_datos}|sin_atipicos:{excluir_atipicos}"
+    if n_registros == 0:
+        st.warning("⚠️ Todos los registros están marcados como atípicos por los métodos elegidos en el PASO 6")
+        st.stop()
+instrumentacion.registrar_filas(n_registros)
 
 st.success("✓ Datos cargados exitosamente")
-st.write(f"✓ Número de registros: {len(df)}")
+st.write(f"✓ Número de registros: {n_registros}")
 st.write(f"✓ Número de variables: {len(df.columns)}")
+if archivo_subido is not None:
+    st.write(f"✓ Archivo: '{archivo_subido.name}' ({archivo_subido.size / 2**20:,.1f} MB de texto -> "
+             f"{os.path.getsize(ruta_columnar) / 2**20:,.1f} MB en formato columnar, con memoria mapeada)")
+elif datos_en_memoria:
+    st.write(f"✓ Memoria del dataset: {memoria_original / 1024:.1f} KB -> {memoria_compacta / 1024:.1f} KB "
+             f"({1 - memoria_compacta / memoria_original:.1%} menos)")
 
 st.subheader("Primeros registros del dataset:")
 st.dataframe(df.head(10))
@@ -77,50 +349,62 @@ st.dataframe(df.head(10))
 # =============================================================================
 # 3. EXPLORACIÓN INICIAL DE LOS DATOS
 # =============================================================================
+instrumentacion.marcar('PASO 3: Exploración inicial', filas=n_registros)
 st.header("PASO 3: Exploración inicial de los datos")
 
 st.subheader("Tipos de datos por columna:")
 st.write(df.dtypes)
 
-st.subheader("Información general del dataset:")
-buffer = io.StringIO()
-df.info(buf=buffer)
-st.text(buffer.getvalue())
+if datos_en_memoria:
+    st.subheader("Información general del dataset:")
+    buffer = io.StringIO()
+    df.info(buf=buffer)
+    st.text(buffer.getvalue())
 
 st.subheader("Verificación de valores nulos:")
-st.write(df.isnull().sum())
+st.write(df.isnull().sum() if datos_en_memoria else estado.nulos)
 
 # =============================================================================
 # 4. MEDIDAS DE POSICIÓN (TENDENCIA CENTRAL)
 # =============================================================================
+instrumentacion.marcar('PASO 4: Medidas de posición', filas=n_registros)
 st.header("PASO 4: MEDIDAS DE POSICIÓN (TENDENCIA CENTRAL)")
 
-# Seleccionar variables numéricas para análisis (igual que en el notebook)
-variables_numericas = ['Edad', 'Calificacion_Matematicas', 'Calificacion_Ciencias', 'Horas_Estudio']
+if motor == 'duckdb':
+    resumen_estadistico = estado.resumen()
+elif modo_streaming:
+    resumen_estadistico = estado.resumen('kll' if backend_cuantiles == 'kll' else 'auto')
+else:
+    resumen_estadistico = resumen_en_cache(huella_datos, variables_numericas, backend_cuantiles,
+                                           error_cuantiles, _df=df)
+
+st.caption(f"Cuantiles: {resumen_estadistico.descripcion_cuantiles()}")
 
 for variable in variables_numericas:
     st.subheader(f"--- Análisis de: {variable} ---")
     
+    medidas = resumen_estadistico.medidas(variable)
+
     # 4.1 PROMEDIO (Media aritmética)
-    promedio = df[variable].mean()
+    promedio = medidas['Media']
     st.write(f"**Promedio (Media):** {promedio:.2f}")
     st.write(f"  *Interpretación:* El valor promedio de {variable} es {promedio:.2f}")
     
     # 4.2 MEDIANA (Percentil 50)
-    mediana = df[variable].median()
+    mediana = medidas['Mediana']
     st.write(f"**Mediana:** {mediana:.2f}")
     st.write(f"  *Interpretación:* El 50% de los datos están por debajo de {mediana:.2f}")
     
     # 4.3 MODA (Valor más frecuente)
-    moda = df[variable].mode()
-    if len(moda) > 0:
-        st.write(f"**Moda:** {moda.values[0]:.2f}")
-        st.write(f"  *Interpretación:* El valor más frecuente es {moda.values[0]:.2f}")
+    moda = medidas['Moda']
+    if not np.isnan(moda):
+        st.write(f"**Moda:** {moda:.2f}")
+        st.write(f"  *Interpretación:* El valor más frecuente es {moda:.2f}")
     
     # 4.4 CUANTILES (Q1, Q2, Q3)
-    q1 = df[variable].quantile(0.25)
-    q2 = df[variable].quantile(0.50)
-    q3 = df[variable].quantile(0.75)
+    q1 = medidas['Q1 (25%)']
+    q2 = mediana  # igual a la mediana
+    q3 = medidas['Q3 (75%)']
     
     st.write(f"**Cuartil 1 (Q1 - 25%):** {q1:.2f}")
     st.write(f"  *Interpretación:* El 25% de los datos están por debajo de {q1:.2f}")
@@ -133,35 +417,36 @@ for variable in variables_numericas:
 # =============================================================================
 # 5. MEDIDAS DE VARIABILIDAD (DISPERSIÓN)
 # =============================================================================
+instrumentacion.marcar('PASO 5: Medidas de variabilidad', filas=n_registros)
 st.header("PASO 5: MEDIDAS DE VARIABILIDAD (DISPERSIÓN)")
 
 for variable in variables_numericas:
     st.subheader(f"--- Análisis de dispersión: {variable} ---")
     
     # 5.1 MÍNIMO Y MÁXIMO
-    minimo = df[variable].min()
-    maximo = df[variable].max()
+    medidas = resumen_estadistico.medidas(variable)
+    minimo = medidas['Mínimo']
+    maximo = medidas['Máximo']
     st.write(f"**Mínimo:** {minimo:.2f}")
     st.write(f"**Máximo:** {maximo:.2f}")
     
     # 5.2 RANGO
-    rango = maximo - minimo
+    rango = medidas['Rango']
     st.write(f"**Rango:** {rango:.2f}")
     st.write(f"  *Interpretación:* La diferencia entre el valor máximo y mínimo es {rango:.2f}")
     
     # 5.3 VARIANZA
-    varianza = df[variable].var()
+    varianza = medidas['Varianza']
     st.write(f"**Varianza:** {varianza:.2f}")
     st.write(f"  *Interpretación:* Medida de dispersión promedio al cuadrado")
     
     # 5.4 DESVIACIÓN ESTÁNDAR
-    desviacion_std = df[variable].std()
+    desviacion_std = medidas['Desv. Estándar']
     st.write(f"**Desviación Estándar:** {desviacion_std:.2f}")
     st.write(f"  *Interpretación:* En promedio, los datos se desvían {desviacion_std:.2f} unidades de la media")
     
     # 5.5 COEFICIENTE DE VARIACIÓN (CV)
-    promedio = df[variable].mean()
-    coef_variacion = (desviacion_std / promedio) * 100
+    coef_variacion = medidas['Coef. Variación (%)']
     st.write(f"**Coeficiente de Variación (CV):** {coef_variacion:.2f}%")
     st.write(f"  *Interpretación:* La desviación estándar representa el {coef_variacion:.2f}% de la media")
     if coef_variacion < 15:
@@ -176,15 +461,47 @@ for variable in variables_numericas:
 # =============================================================================
 # 6. RESUMEN ESTADÍSTICO COMPLETO
 # =============================================================================
+instrumentacion.marcar('PASO 6: Resumen estadístico', filas=n_registros)
 st.header("PASO 6: RESUMEN ESTADÍSTICO COMPLETO")
 
 st.subheader("Estadísticas descriptivas de todas las variables numéricas:")
-resumen = df[variables_numericas].describe()
+resumen = resumen_estadistico.tabla_describe()
 st.dataframe(resumen)
 
+# Atípicos de todas las variables con tres métodos: IQR (los mismos límites
+# que el box plot del PASO 10), puntaje z y MAD. Se muestran los de los datos
+# sin excluir, para poder volver a incluirlos
+st.subheader("Valores atípicos:")
+if not datos_en_memoria:
+    st.info("La detección de atípicos requiere los datos completos en memoria: desactive el modo streaming "
+            "y use el motor pandas para verla.")
+else:
+    atipicos = atipicos_en_cache(huella_con_atipicos, variables_numericas, backend_cuantiles, error_cuantiles,
+                                 _df=df_con_atipicos)
+    st.dataframe(atipicos.conteos.rename(columns=NOMBRES_METODOS))
+    st.multiselect("Excluir del análisis las filas marcadas por", METODOS_ATIPICOS, key='excluir_atipicos',
+                   format_func=NOMBRES_METODOS.get,
+                   help="Todas las secciones se recalculan sin esas filas; la detección no se repite.")
+    if excluir_atipicos:
+        st.write(f"✓ {len(df_con_atipicos) - n_registros} registros excluidos: el análisis usa los "
+                 f"{n_registros} restantes")
+    with st.expander("Ver registros marcados"):
+        metodos_vista = st.multiselect("Marcados por", METODOS_ATIPICOS, default=METODOS_ATIPICOS,
+                                       format_func=NOMBRES_METODOS.get)
+        st.write(f"**Registros marcados:** {atipicos.marcadas(metodos_vista).sum()} "
+                 f"(se muestran hasta {LIMITE_FILAS_ATIPICOS})")
+        st.dataframe(atipicos.detalle(df_con_atipicos, metodos_vista, maximo_filas=LIMITE_FILAS_ATIPICOS))
+        st.write("**Límites de cada método:**")
+        st.dataframe(atipicos.limites)
+
 # =============================================================================
 # 7. MEDIDAS DE ASOCIACIÓN - CORRELACIÓN DE PEARSON
 # =============================================================================
+# En memoria, los PASOS 7 a 10 solo envían sus trabajos en segundo plano y
+# reservan su lugar en la página: sus marcas miden ese envío, y el tiempo de
+# cada trabajo (en su hilo) se registra aparte cuando termina
+sufijo_envio = ' (envío a segundo plano)' if datos_en_memoria else ''
+instrumentacion.marcar('PASO 7: Correlación de Pearson' + sufijo_envio, filas=n_registros)
 st.header("PASO 7: MEDIDAS DE ASOCIACIÓN - CORRELACIÓN DE PEARSON")
 
 st.write("""
@@ -193,38 +510,98 @@ Rango: -1 (correlación negativa perfecta) a +1 (correlación positiva perfecta)
 Cerca de 0: no hay correlación lineal
 """)
 
-# Calcular matriz de correlación de Pearson
-matriz_correlacion = df[variables_numericas].corr(method='pearson')
-
-st.subheader("Matriz de Correlación de Pearson:")
-st.dataframe(matriz_correlacion)
-
-# Ejemplo específico: correlación entre Matemáticas y Ciencias
-correlacion_mat_cie, p_valor = stats.pearsonr(
-    df['Calificacion_Matematicas'], 
-    df['Calificacion_Ciencias']
-)
-
-st.subheader("--- Ejemplo detallado ---")
-st.write("Correlación entre Calificación de Matemáticas y Ciencias:")
-st.write(f"**Coeficiente de Pearson (r):** {correlacion_mat_cie:.4f}")
-st.write(f"**P-valor:** {p_valor:.6f}")
+# Trabajos en segundo plano (trabajos.py): las correlaciones (PASOS 7 y 8),
+# el Chi-cuadrado con las pruebas exactas (PASO 9) y la figura (PASO 10) se
+# calculan en un grupo de hilos compartido por todas las sesiones. Cada
+# sección reserva su lugar con st.empty() y se completa al final de la página,
+# a medida que terminan sus trabajos. Las solicitudes iguales de otras sesiones
+# reutilizan el mismo trabajo y, si cambian las entradas, el trabajo anterior
+# de esta sesión se cancela (si nadie más lo espera y no empezó).
+@st.cache_resource
+def gestor_trabajos():
+    return GestorTrabajos()
+
+gestor = gestor_trabajos()
+sesion = st.session_state.setdefault('id_sesion', uuid.uuid4().hex)
+SECCIONES_SEGUNDO_PLANO = ['correlaciones', 'asociacion', 'figura']
+NOMBRES_TRABAJOS = {
+    'correlaciones': 'PASOS 7 y 8: Correlaciones',
+    'asociacion': 'PASO 9: Chi-cuadrado',
+    'figura': 'PASO 10: Visualizaciones'
+}
+INTERVALO_ESPERA = 0.25  # segundos entre actualizaciones del aviso de espera
+secciones_diferidas = []
+
+def mostrar_seccion(contenedor, mostrar, *resultados):
+    with contenedor.container():
+        mostrar(*resultados)
+
+def registrar_trabajo(trabajo):
+    nombre = NOMBRES_TRABAJOS[trabajo.seccion]
+    if trabajo.terminado < inicio_ejecucion:
+        # Terminó antes de esta ejecución (recarga u otra sesión): no costó nada ahora
+        instrumentacion.registrar(f"{nombre} (resultado ya calculado)", 0.0, 0.0, filas=n_registros)
+    else:
+        instrumentacion.registrar(f"{nombre} (trabajo en segundo plano)", trabajo.segundos,
+                                  trabajo.segundos_cpu, filas=n_registros)
+
+def completar_trabajo(trabajo, destinos):
+    registrar_trabajo(trabajo)
+    for contenedor, mostrar in destinos:
+        if trabajo.estado == 'error':
+            contenedor.error(f"❌ Falló el trabajo {trabajo.id}: {trabajo.futuro.exception()!r}")
+        else:
+            mostrar_seccion(contenedor, mostrar, trabajo.resultado())
+
+def diferir(trabajo, *destinos):
+    # Si el trabajo ya terminó (por ejemplo, en una recarga) se muestra ahora
+    if trabajo.futuro.done():
+        completar_trabajo(trabajo, destinos)
+        return
+    for contenedor, _ in destinos:
+        contenedor.info(f"⏳ Calculando en segundo plano (trabajo {trabajo.id})...")
+    secciones_diferidas.append((trabajo, destinos))
+
+if not datos_en_memoria:
+    for seccion in SECCIONES_SEGUNDO_PLANO:
+        gestor.soltar(sesion, seccion)
+
+# Matrices de Pearson y Spearman (PASO 8) con sus p-valores e intervalos de
+# confianza en una sola pasada vectorizada (ver correlaciones.py)
+def mostrar_pearson(correlaciones):
+    matriz_correlacion = correlaciones['pearson'].matriz()
+
+    st.subheader("Matriz de Correlación de Pearson:")
+    st.dataframe(matriz_correlacion)
+
+    # Ejemplo específico: correlación entre Matemáticas y Ciencias
+    correlacion_mat_cie, p_valor = correlaciones['pearson'].par('Calificacion_Matematicas', 'Calificacion_Ciencias')
+    ic_inferior, ic_superior = correlaciones['pearson'].intervalo('Calificacion_Matematicas', 'Calificacion_Ciencias')
+
+    st.subheader("--- Ejemplo detallado ---")
+    st.write("Correlación entre Calificación de Matemáticas y Ciencias:")
+    st.write(f"**Coeficiente de Pearson (r):** {correlacion_mat_cie:.4f}")
+    st.write(f"**P-valor:** {p_valor:.6f}")
+    st.write(f"**Intervalo de confianza 95%:** [{ic_inferior:.4f}, {ic_superior:.4f}]")
+
+    if p_valor < 0.05:
+        st.success(f"✓ La correlación ES estadísticamente significativa (p < 0.05)")
+    else:
+        st.error(f"✗ La correlación NO es estadísticamente significativa (p >= 0.05)")
 
-if p_valor < 0.05:
-    st.success(f"✓ La correlación ES estadísticamente significativa (p < 0.05)")
-else:
-    st.error(f"✗ La correlación NO es estadísticamente significativa (p >= 0.05)")
+    if abs(correlacion_mat_cie) < 0.3:
+        st.write(f"*Interpretación:* Correlación débil")
+    elif abs(correlacion_mat_cie) < 0.7:
+        st.write(f"*Interpretación:* Correlación moderada")
+    else:
+        st.write(f"*Interpretación:* Correlación fuerte")
 
-if abs(correlacion_mat_cie) < 0.3:
-    st.write(f"*Interpretación:* Correlación débil")
-elif abs(correlacion_mat_cie) < 0.7:
-    st.write(f"*Interpretación:* Correlación moderada")
-else:
-    st.write(f"*Interpretación:* Correlación fuerte")
+contenedor_pearson = st.empty()
 
 # =============================================================================
 # 8. MEDIDAS DE ASOCIACIÓN - RHO DE SPEARMAN
 # =============================================================================
+instrumentacion.marcar('PASO 8: Rho de Spearman' + sufijo_envio, filas=n_registros)
 st.header("PASO 8: MEDIDAS DE ASOCIACIÓN - RHO DE SPEARMAN")
 
 st.write("""
@@ -233,31 +610,46 @@ Se basa en rangos ordenados de los datos.
 Útil cuando los datos no siguen una distribución normal.
 """)
 
-# Calcular matriz de correlación de Spearman
-matriz_spearman = df[variables_numericas].corr(method='spearman')
+def mostrar_spearman(correlaciones, aproximados=()):
+    # Matriz de correlación de Spearman (calculada junto con la de Pearson)
+    matriz_spearman = correlaciones['spearman'].matriz()
 
-st.subheader("Matriz de Correlación de Spearman:")
-st.dataframe(matriz_spearman)
+    st.subheader("Matriz de Correlación de Spearman:")
+    st.dataframe(matriz_spearman)
+    if aproximados:
+        st.info("ℹ️ Rho de Spearman aproximado (valores agrupados en intervalos de cuantiles) en: "
+                + ", ".join(f"{variable_a} / {variable_b}" for variable_a, variable_b in aproximados))
 
-# Ejemplo específico
-spearman_mat_horas, p_valor_sp = stats.spearmanr(
-    df['Calificacion_Matematicas'], 
-    df['Horas_Estudio']
-)
+    # Ejemplo específico
+    spearman_mat_horas, p_valor_sp = correlaciones['spearman'].par('Calificacion_Matematicas', 'Horas_Estudio')
+    ic_inferior_sp, ic_superior_sp = correlaciones['spearman'].intervalo('Calificacion_Matematicas', 'Horas_Estudio')
 
-st.subheader("--- Ejemplo detallado ---")
-st.write("Correlación entre Calificación de Matemáticas y Horas de Estudio:")
-st.write(f"**Coeficiente de Spearman (ρ):** {spearman_mat_horas:.4f}")
-st.write(f"**P-valor:** {p_valor_sp:.6f}")
+    st.subheader("--- Ejemplo detallado ---")
+    st.write("Correlación entre Calificación de Matemáticas y Horas de Estudio:")
+    st.write(f"**Coeficiente de Spearman (ρ):** {spearman_mat_horas:.4f}")
+    st.write(f"**P-valor:** {p_valor_sp:.6f}")
+    st.write(f"**Intervalo de confianza 95%:** [{ic_inferior_sp:.4f}, {ic_superior_sp:.4f}]")
+
+    if p_valor_sp < 0.05:
+        st.success(f"✓ La correlación ES estadísticamente significativa (p < 0.05)")
+    else:
+        st.error(f"✗ La correlación NO es estadísticamente significativa (p >= 0.05)")
 
-if p_valor_sp < 0.05:
-    st.success(f"✓ La correlación ES estadísticamente significativa (p < 0.05)")
+contenedor_spearman = st.empty()
+
+if not datos_en_memoria:
+    correlaciones = estado.correlaciones()
+    mostrar_seccion(contenedor_pearson, mostrar_pearson, correlaciones)
+    mostrar_seccion(contenedor_spearman, mostrar_spearman, correlaciones, estado.spearman_aproximado())
 else:
-    st.error(f"✗ La correlación NO es estadísticamente significativa (p >= 0.05)")
+    trabajo_correlaciones = gestor.enviar('correlaciones', (huella_datos, tuple(variables_numericas)),
+                                          calcular_correlaciones, df, variables_numericas, sesion=sesion)
+    diferir(trabajo_correlaciones, (contenedor_pearson, mostrar_pearson), (contenedor_spearman, mostrar_spearman))
 
 # =============================================================================
 # 9. MEDIDAS DE ASOCIACIÓN - CHI-CUADRADO (χ²)
 # =============================================================================
+instrumentacion.marcar('PASO 9: Chi-cuadrado' + sufijo_envio, filas=n_registros)
 st.header("PASO 9: MEDIDAS DE ASOCIACIÓN - CHI-CUADRADO (χ²)")
 
 st.write("""
@@ -266,172 +658,186 @@ H0: Las variables son independientes
 H1: Las variables están asociadas
 """)
 
-# Crear tabla de contingencia entre Nivel Socioeconómico y Aprobado
-tabla_contingencia = pd.crosstab(
-    df['Nivel_Socioeconomico'], 
-    df['Aprobado']
-)
-
-st.subheader("Tabla de Contingencia (Nivel Socioeconómico vs Aprobado):")
-st.dataframe(tabla_contingencia)
-
-# Realizar prueba de Chi-cuadrado
-chi2, p_valor_chi, grados_libertad, frecuencias_esperadas = stats.chi2_contingency(tabla_contingencia)
-
-st.subheader("Resultados de la prueba Chi-cuadrado:")
-st.write(f"**Estadístico Chi-cuadrado (χ²):** {chi2:.4f}")
-st.write(f"**P-valor:** {p_valor_chi:.6f}")
-st.write(f"**Grados de libertad:** {grados_libertad}")
-
-st.subheader("Frecuencias esperadas (si fueran independientes):")
-freq_esp_df = pd.DataFrame(
-    frecuencias_esperadas, 
-    index=tabla_contingencia.index, 
-    columns=tabla_contingencia.columns
-)
-st.dataframe(freq_esp_df)
-
-if p_valor_chi < 0.05:
-    st.success(f"✓ Rechazamos H0: Las variables SÍ están asociadas (p < 0.05)")
-    st.write(f"  Existe relación entre el Nivel Socioeconómico y Aprobar")
+# Tabla de contingencia entre Nivel Socioeconómico y Aprobado, prueba
+# Chi-cuadrado, cribado de todos los pares de variables categóricas
+# (Chi-cuadrado y V de Cramér, ver asociacion.py) y, con pocas filas,
+# p-valores por permutación (con parada temprana) y prueba exacta de Fisher,
+# más fiables que los asintóticos con muestras pequeñas (ver permutaciones.py)
+def analizar_asociacion(df, variables):
+    from scipy.stats import chi2_contingency
+
+    tabla = pd.crosstab(
+        df['Nivel_Socioeconomico'], 
+        df['Aprobado']
+    ).rename(columns=ETIQUETAS_BOOLEANAS)
+    pruebas = None
+    if len(df) <= LIMITE_FILAS_PERMUTACION:
+        # Con filtros, la tabla puede quedar con una sola fila o columna; si es
+        # demasiado grande para Fisher queda el p-valor por permutación
+        p_valor_fisher = np.nan
+        if 2 in tabla.shape:
+            try:
+                p_valor_fisher = fisher_exacto(tabla)
+            except ValueError:
+                pass
+        pruebas = (p_valor_fisher, calcular_pruebas(df, variables))
+    return tabla, tuple(chi2_contingency(tabla)), calcular_asociaciones(df), pruebas
+
+def mostrar_chi_cuadrado(resultado):
+    tabla_contingencia, resultado_chi2, asociaciones, pruebas = resultado
+
+    st.subheader("Tabla de Contingencia (Nivel Socioeconómico vs Aprobado):")
+    st.dataframe(tabla_contingencia)
+
+    # Resultado de la prueba de Chi-cuadrado
+    chi2, p_valor_chi, grados_libertad, frecuencias_esperadas = resultado_chi2
+
+    st.subheader("Resultados de la prueba Chi-cuadrado:")
+    st.write(f"**Estadístico Chi-cuadrado (χ²):** {chi2:.4f}")
+    st.write(f"**P-valor:** {p_valor_chi:.6f}")
+    st.write(f"**Grados de libertad:** {grados_libertad}")
+
+    st.subheader("Frecuencias esperadas (si fueran independientes):")
+    freq_esp_df = pd.DataFrame(
+        frecuencias_esperadas, 
+        index=tabla_contingencia.index, 
+        columns=tabla_contingencia.columns
+    )
+    st.dataframe(freq_esp_df)
+
+    if p_valor_chi < 0.05:
+        st.success(f"✓ Rechazamos H0: Las variables SÍ están asociadas (p < 0.05)")
+        st.write(f"  Existe relación entre el Nivel Socioeconómico y Aprobar")
+    else:
+        st.error(f"✗ No rechazamos H0: Las variables son independientes (p >= 0.05)")
+        st.write(f"  No hay evidencia de relación entre Nivel Socioeconómico y Aprobar")
+
+    # Cribado de asociación, ordenado de mayor a menor asociación
+    if asociaciones is not None:
+        st.subheader("Cribado de asociación entre variables categóricas:")
+        st.dataframe(asociaciones.pares)
+
+    if pruebas is not None:
+        p_valor_fisher, pruebas_significancia = pruebas
+        st.subheader("P-valores por permutación y prueba exacta de Fisher:")
+        if np.isnan(p_valor_fisher):
+            st.write("**Prueba exacta de Fisher (Nivel Socioeconómico vs Aprobado):** no aplica, "
+                     "la tabla de contingencia no es 2xK o es demasiado grande (ver el p-valor por permutación)")
+        else:
+            st.write(f"**Prueba exacta de Fisher (Nivel Socioeconómico vs Aprobado):** p = {p_valor_fisher:.6f}")
+        st.dataframe(pruebas_significancia.pruebas)
+
+contenedor_chi_cuadrado = st.empty()
+if not datos_en_memoria:
+    from scipy.stats import chi2_contingency
+
+    tabla_contingencia = estado.tabla_contingencia()
+    asociaciones = estado.asociaciones if motor == 'duckdb' else None
+    mostrar_seccion(contenedor_chi_cuadrado, mostrar_chi_cuadrado,
+                    (tabla_contingencia, chi2_contingency(tabla_contingencia), asociaciones, None))
 else:
-    st.error(f"✗ No rechazamos H0: Las variables son independientes (p >= 0.05)")
-    st.write(f"  No hay evidencia de relación entre Nivel Socioeconómico y Aprobar")
+    trabajo_asociacion = gestor.enviar('asociacion', (huella_datos, tuple(variables_numericas)),
+                                       analizar_asociacion, df, variables_numericas, sesion=sesion)
+    diferir(trabajo_asociacion, (contenedor_chi_cuadrado, mostrar_chi_cuadrado))
 
 # =============================================================================
 # 10. VISUALIZACIONES GRÁFICAS
 # =============================================================================
+instrumentacion.marcar('PASO 10: Visualizaciones' + sufijo_envio, filas=n_registros)
 st.header("PASO 10: Generando visualizaciones gráficas...")
 
-# Crear figura con múltiples subgráficas (IGUAL QUE EN EL NOTEBOOK)
-fig = plt.figure(figsize=(16, 12))
-
-# 10.1 HISTOGRAMA - Distribución de Calificaciones de Matemáticas
-ax1 = plt.subplot(3, 3, 1)
-plt.hist(df['Calificacion_Matematicas'], bins=15, color='skyblue', edgecolor='black', alpha=0.7)
-plt.axvline(df['Calificacion_Matematicas'].mean(), color='red', linestyle='--', linewidth=2, label='Media')
-plt.axvline(df['Calificacion_Matematicas'].median(), color='green', linestyle='--', linewidth=2, label='Mediana')
-plt.xlabel('Calificación')
-plt.ylabel('Frecuencia')
-plt.title('Distribución de Calificaciones de Matemáticas')
-plt.legend()
-plt.grid(True, alpha=0.3)
-
-# 10.2 BOX PLOT - Comparación de calificaciones
-ax2 = plt.subplot(3, 3, 2)
-datos_boxplot = [df['Calificacion_Matematicas'], df['Calificacion_Ciencias']]
-plt.boxplot(datos_boxplot, labels=['Matemáticas', 'Ciencias'])
-plt.ylabel('Calificación')
-plt.title('Box Plot - Comparación de Calificaciones')
-plt.grid(True, alpha=0.3)
-
-# 10.3 SCATTER PLOT - Correlación Matemáticas vs Ciencias
-ax3 = plt.subplot(3, 3, 3)
-plt.scatter(df['Calificacion_Matematicas'], df['Calificacion_Ciencias'], 
-            alpha=0.6, s=50, color='purple')
-plt.xlabel('Calificación Matemáticas')
-plt.ylabel('Calificación Ciencias')
-plt.title(f'Correlación Matemáticas vs Ciencias\n(r = {correlacion_mat_cie:.3f})')
-z = np.polyfit(df['Calificacion_Matematicas'], df['Calificacion_Ciencias'], 1)
-p = np.poly1d(z)
-plt.plot(df['Calificacion_Matematicas'].sort_values(), 
-         p(df['Calificacion_Matematicas'].sort_values()), 
-         "r--", alpha=0.8, linewidth=2)
-plt.grid(True, alpha=0.3)
-
-# 10.4 HISTOGRAMA - Distribución de Horas de Estudio
-ax4 = plt.subplot(3, 3, 4)
-plt.hist(df['Horas_Estudio'], bins=8, color='lightcoral', edgecolor='black', alpha=0.7)
-plt.axvline(df['Horas_Estudio'].mean(), color='red', linestyle='--', linewidth=2, label='Media')
-plt.xlabel('Horas de Estudio')
-plt.ylabel('Frecuencia')
-plt.title('Distribución de Horas de Estudio')
-plt.legend()
-plt.grid(True, alpha=0.3)
-
-# 10.5 MAPA DE CALOR - Matriz de Correlación de Pearson
-ax5 = plt.subplot(3, 3, 5)
-sns.heatmap(matriz_correlacion, annot=True, cmap='coolwarm', center=0, 
-            square=True, linewidths=1, cbar_kws={"shrink": 0.8}, fmt='.3f')
-plt.title('Mapa de Calor - Correlación de Pearson')
-
-# 10.6 SCATTER PLOT - Horas de Estudio vs Calificación
-ax6 = plt.subplot(3, 3, 6)
-plt.scatter(df['Horas_Estudio'], df['Calificacion_Matematicas'], 
-            alpha=0.6, s=50, color='green')
-plt.xlabel('Horas de Estudio')
-plt.ylabel('Calificación Matemáticas')
-plt.title(f'Horas de Estudio vs Calificación\n(ρ = {spearman_mat_horas:.3f})')
-plt.grid(True, alpha=0.3)
-
-# 10.7 GRÁFICO DE BARRAS - Aprobados por Nivel Socioeconómico
-ax7 = plt.subplot(3, 3, 7)
-conteo = pd.crosstab(df['Nivel_Socioeconomico'], df['Aprobado'])
-conteo.plot(kind='bar', ax=ax7, color=['salmon', 'lightgreen'], alpha=0.7)
-plt.xlabel('Nivel Socioeconómico')
-plt.ylabel('Cantidad de Estudiantes')
-plt.title('Distribución de Aprobados por Nivel Socioeconómico')
-plt.xticks(rotation=0)
-plt.legend(title='Aprobado')
-plt.grid(True, alpha=0.3, axis='y')
-
-# 10.8 VIOLIN PLOT - Distribución de calificaciones por aprobado
-ax8 = plt.subplot(3, 3, 8)
-datos_violin = [
-    df[df['Aprobado']=='Si']['Calificacion_Matematicas'],
-    df[df['Aprobado']=='No']['Calificacion_Matematicas']
-]
-parts = plt.violinplot(datos_violin, positions=[1, 2], showmeans=True, showmedians=True)
-plt.xticks([1, 2], ['Aprobado: Sí', 'Aprobado: No'])
-plt.ylabel('Calificación Matemáticas')
-plt.title('Distribución de Calificaciones por Estado de Aprobación')
-plt.grid(True, alpha=0.3)
-
-# 10.9 MAPA DE CALOR - Matriz de Correlación de Spearman
-ax9 = plt.subplot(3, 3, 9)
-sns.heatmap(matriz_spearman, annot=True, cmap='viridis', center=0, 
-            square=True, linewidths=1, cbar_kws={"shrink": 0.8}, fmt='.3f')
-plt.title('Mapa de Calor - Correlación de Spearman')
-
-# Ajustar el espaciado entre gráficas
-plt.tight_layout()
-
-# MOSTRAR EN STREAMLIT (en lugar de plt.show())
-st.pyplot(fig)
-plt.close()
-
-st.success("✓ Gráficas generadas exitosamente")
+def dibujar_figura(trabajo_correlaciones, df, resumen):
+    # Figura de 9 gráficas como PNG ya renderizado; los paneles también se
+    # guardan en la caché de disco de graficas.py, que sobrevive a reinicios
+    # del servidor. Se dibuja en este proceso (sin abrir procesos hijos). El
+    # trabajo de correlaciones se envió antes, así que ya empezó o terminó
+    return generar_figura(df, resumen, trabajo_correlaciones.resultado(), dpi=200, procesos=1)
+
+def mostrar_figura(figura):
+    # MOSTRAR EN STREAMLIT (en lugar de plt.show()), a partir del PNG
+    st.image(figura, width='stretch')
+    st.success("✓ Gráficas generadas exitosamente")
+
+# La figura (matplotlib y seaborn) es lo más lento de la página: se dibuja en
+# segundo plano y ocupa este lugar cuando termina
+contenedor_graficas = st.empty()
+if not datos_en_memoria:
+    contenedor_graficas.info("Las gráficas requieren los datos completos en memoria: desactive el modo streaming "
+                             "y use el motor pandas para verlas.")
+else:
+    trabajo_figura = gestor.enviar('figura', (huella_datos, tuple(variables_numericas), backend_cuantiles,
+                                              error_cuantiles),
+                                   dibujar_figura, trabajo_correlaciones, df, resumen_estadistico, sesion=sesion)
+    diferir(trabajo_figura, (contenedor_graficas, mostrar_figura))
 
 # =============================================================================
 # 11. TABLA RESUMEN DE TODAS LAS MEDIDAS CALCULADAS
 # =============================================================================
+instrumentacion.marcar('PASO 11: Tabla resumen final', filas=n_registros)
 st.header("PASO 11: TABLA RESUMEN FINAL")
 
-# Crear un resumen personalizado (IGUAL QUE EN EL NOTEBOOK)
-resumen_completo = pd.DataFrame()
-
-for variable in variables_numericas:
-    resumen_completo[variable] = {
-        'Media': df[variable].mean(),
-        'Mediana': df[variable].median(),
-        'Moda': df[variable].mode().values[0] if len(df[variable].mode()) > 0 else np.nan,
-        'Mínimo': df[variable].min(),
-        'Máximo': df[variable].max(),
-        'Rango': df[variable].max() - df[variable].min(),
-        'Q1 (25%)': df[variable].quantile(0.25),
-        'Q3 (75%)': df[variable].quantile(0.75),
-        'Varianza': df[variable].var(),
-        'Desv. Estándar': df[variable].std(),
-        'Coef. Variación (%)': (df[variable].std() / df[variable].mean()) * 100
-    }
-
-resumen_completo = resumen_completo.T
+# Resumen personalizado a partir de las medidas calculadas en el PASO 4
+resumen_completo = resumen_estadistico.tabla()
 st.subheader("RESUMEN ESTADÍSTICO COMPLETO:")
 st.dataframe(resumen_completo.round(2))
 
+# Resumen por grupos: se calcula una vez (en caché) y los filtros solo
+# seleccionan filas de las tablas largas, sin volver a calcular
+@st.cache_data(show_spinner="Calculando resumen por grupos...")
+def grupos_en_cache(huella, variables, _df):
+    return calcular_por_grupos(_df, variables)
+
+st.subheader("RESUMEN POR GRUPOS:")
+if not datos_en_memoria:
+    st.info("El resumen por grupos requiere los datos completos en memoria: desactive el modo streaming "
+            "y use el motor pandas para verlo.")
+else:
+    analisis_grupos = grupos_en_cache(huella_datos, variables_numericas, _df=df)
+    col1, col2 = st.columns(2)
+    with col1:
+        agrupacion = st.selectbox("Agrupar por", analisis_grupos.agrupaciones())
+    with col2:
+        medida = st.selectbox("Medida", MEDIDAS_RESUMEN)
+    st.dataframe(analisis_grupos.tabla(agrupacion, medida).round(2))
+
+    grupo = st.selectbox("Grupo", analisis_grupos.grupos(agrupacion))
+    st.write(f"**Resumen completo del grupo {grupo}:**")
+    st.dataframe(analisis_grupos.resumen(agrupacion, grupo).round(2))
+    metodo = st.radio("Correlación", ['pearson', 'spearman'], format_func=str.capitalize, horizontal=True)
+    st.dataframe(analisis_grupos.matriz(agrupacion, grupo, metodo).round(3))
+
+    with st.expander("Tabla larga de medidas por grupo"):
+        st.dataframe(analisis_grupos.medidas)
+
+# Intervalos bootstrap (opcionales): se calculan en este proceso y quedan en
+# caché por datos, remuestras y método
+@st.cache_data(show_spinner="Calculando intervalos bootstrap...")
+def bootstrap_en_cache(huella, variables, remuestras, metodo, _df):
+    return calcular_bootstrap(_df, variables, remuestras, metodo=metodo, procesos=1)
+
+st.subheader("INTERVALOS BOOTSTRAP:")
+if not datos_en_memoria:
+    st.info("Los intervalos bootstrap requieren los datos completos en memoria: desactive el modo streaming "
+            "y use el motor pandas para verlos.")
+elif st.checkbox("Calcular intervalos bootstrap", value=False):
+    col1, col2 = st.columns(2)
+    with col1:
+        remuestras = st.number_input("Remuestras", min_value=100, max_value=20_000, value=1000, step=100)
+    with col2:
+        metodo_intervalo = st.selectbox("Intervalo", METODOS_INTERVALO, index=METODOS_INTERVALO.index('bca'),
+                                        format_func=lambda m: 'BCa' if m == 'bca' else 'Percentil')
+    resultado_bootstrap = bootstrap_en_cache(huella_datos, variables_numericas, int(remuestras),
+                                             metodo_intervalo, _df=df)
+    st.write(f"**{resultado_bootstrap.descripcion()}:**")
+    st.dataframe(resultado_bootstrap.texto_resumen())
+    metodo = st.radio("Correlación con intervalo", ['pearson', 'spearman'], format_func=str.capitalize,
+                      horizontal=True)
+    st.dataframe(resultado_bootstrap.texto_matriz(metodo))
+
 # =============================================================================
 # 12. CONCLUSIONES FINALES
 # =============================================================================
+instrumentacion.marcar('PASO 12: Conclusiones', filas=n_registros)
 st.header("CONCLUSIONES DEL ANÁLISIS")
 
 st.info("""
@@ -456,6 +862,37 @@ interpretación de los resultados.
 
 st.success("✓ ANÁLISIS COMPLETADO EXITOSAMENTE")
 
+# Secciones en segundo plano (PASOS 7 a 10): cada una ocupa su lugar reservado
+# a medida que termina su trabajo. El aviso se actualiza en cada espera, lo que
+# permite a Streamlit interrumpir esta ejecución si el usuario cambia algo
+if secciones_diferidas:
+    instrumentacion.marcar('Espera de los trabajos en segundo plano', filas=n_registros)
+    aviso_trabajos = st.empty()
+    while secciones_diferidas:
+        aviso_trabajos.caption(f"⏳ Secciones en segundo plano: "
+                               f"{', '.join(trabajo.id for trabajo, _ in secciones_diferidas)}")
+        terminados = esperar_primeros([trabajo for trabajo, _ in secciones_diferidas], timeout=INTERVALO_ESPERA)
+        for trabajo, destinos in [diferida for diferida in secciones_diferidas if diferida[0] in terminados]:
+            completar_trabajo(trabajo, destinos)
+        secciones_diferidas = [diferida for diferida in secciones_diferidas if diferida[0] not in terminados]
+    aviso_trabajos.empty()
+
+# Tiempo y memoria de cada PASO en esta ejecución
+instrumentacion.finalizar()
+if mostrar_instrumentacion:
+    with st.expander("Tiempo y memoria por paso", expanded=True):
+        tabla_instrumentacion = instrumentacion.tabla()
+        st.dataframe(tabla_instrumentacion.round(3))
+        st.download_button(
+            "Descargar traza (CSV)",
+            data=tabla_instrumentacion.to_csv(index=False),
+            file_name='traza_pasos.csv',
+            mime='text/csv'
+        )
+        for paso_perfilado in instrumentacion.perfiles:
+            st.write(f"Perfil de {paso_perfilado}:")
+            st.code(instrumentacion.texto_perfil(paso_perfilado))
+
 # Footer
 st.markdown("---")
 st.markdown("""
@@ -0,0 +1,192 @@
+"""
+CRIBADO DE ASOCIACIÓN ENTRE VARIABLES CATEGÓRICAS
+=========================================================
+
+Extiende la prueba Chi-cuadrado del PASO 9 (un solo par de variables) a
+todos los pares de columnas categóricas del dataset: las de tipo
+categórico o booleano y las de texto con pocos valores distintos (campos
+de encuestas), ver `columnas_categoricas`.
+
+- Cada columna se codifica una única vez como enteros (códigos 0..k-1).
+- Las tablas de contingencia de todos los pares salen de un solo
+  `np.bincount` sobre índices de celda, en lugar de un `pd.crosstab` por par.
+- Chi-cuadrado, p-valor, grados de libertad y V de Cramér se calculan de
+  forma vectorizada sobre todas las celdas de todas las tablas.
+
+Los resultados coinciden con `stats.chi2_contingency` (incluida la
+corrección de Yates cuando hay un grado de libertad). La V de Cramér usa
+el Chi-cuadrado sin corrección, como `stats.contingency.association`.
+"""
+
+from dataclasses import dataclass
+from itertools import combinations
+
+import numpy as np
+import pandas as pd
+
+# Máximo de índices de celda que se cuentan en cada llamada a bincount
+_MAXIMO_INDICES = 1 << 24
+
+# Una columna de texto entra en el cribado si tiene a lo sumo
+# MAXIMO_CATEGORIAS valores distintos y, en promedio, al menos
+# MINIMO_FILAS_POR_CATEGORIA filas por valor (así quedan fuera los
+# identificadores, como 'Estudiante', aunque haya pocas filas)
+MAXIMO_CATEGORIAS = 20
+MINIMO_FILAS_POR_CATEGORIA = 2
+
+
+@dataclass
+class AsociacionCategoricas:
+    """Resultado del cribado: una fila por par de variables en `pares`,
+    ordenada de mayor a menor asociación (V de Cramér)."""
+
+    variables: list
+    pares: pd.DataFrame
+
+    def matriz(self, medida='V_Cramer'):
+        """Matriz cuadrada simétrica de `medida` ('V_Cramer', 'Chi2',
+        'P_valor', ...) entre todas las variables; la diagonal queda vacía."""
+        matriz = pd.DataFrame(np.nan, index=self.variables, columns=self.variables)
+        for fila in self.pares.itertuples(index=False):
+            valor = getattr(fila, medida)
+            matriz.loc[fila.Variable_1, fila.Variable_2] = valor
+            matriz.loc[fila.Variable_2, fila.Variable_1] = valor
+        return matriz
+
+    def significativos(self, alfa=0.05):
+        """Pares con p-valor menor que `alfa`."""
+        return self.pares[self.pares['P_valor'] < alfa]
+
+
+def es_texto_categorico(n_distintos, n_validos, maximo_categorias=MAXIMO_CATEGORIAS):
+    """Si una columna de texto con `n_distintos` valores distintos entre
+    `n_validos` no nulos cuenta como categórica en el cribado."""
+    return 0 < n_distintos <= maximo_categorias and n_distintos * MINIMO_FILAS_POR_CATEGORIA <= n_validos
+
+
+def columnas_categoricas(df, maximo_categorias=MAXIMO_CATEGORIAS):
+    """Columnas de `df` que entran en el cribado: las de tipo categórico o
+    booleano y las de texto (object o string) de baja cardinalidad."""
+    columnas = []
+    for columna, tipo in df.dtypes.items():
+        if isinstance(tipo, pd.CategoricalDtype) or pd.api.types.is_bool_dtype(tipo):
+            columnas.append(columna)
+        elif pd.api.types.is_object_dtype(tipo) or pd.api.types.is_string_dtype(tipo):
+            serie = df[columna]
+            if es_texto_categorico(serie.nunique(), serie.count(), maximo_categorias):
+                columnas.append(columna)
+    return columnas
+
+
+def codificar_categoricas(df, columnas):
+    """Códigos enteros (-1 para nulos) y categorías de cada columna. Las
+    columnas categóricas conservan su orden; el resto se ordena como en
+    `pd.crosstab`."""
+    codigos, categorias = [], []
+    for columna in columnas:
+        serie = df[columna]
+        if isinstance(serie.dtype, pd.CategoricalDtype):
+            codigos.append(serie.cat.codes.to_numpy(dtype=np.int64))
+            categorias.append(list(serie.cat.categories))
+        else:
+            codigo, valores = pd.factorize(serie, sort=True)
+            codigos.append(codigo.astype(np.int64))
+            categorias.append(list(valores))
+    return np.column_stack(codigos) if codigos else np.empty((len(df), 0), dtype=np.int64), categorias
+
+
+def _contar_celdas(codigos, tamanos, pares, desplazamientos, total_celdas, pesos=None):
+    """Conteos de todas las tablas de contingencia, concatenadas en un
+    único arreglo plano (la tabla del par p empieza en desplazamientos[p]).
+    Con `pesos`, cada fila cuenta como `pesos[fila]` observaciones."""
+    conteos = np.zeros(total_celdas, dtype=np.int64 if pesos is None else np.float64)
+    n_filas = max(len(codigos), 1)
+    paso = max(1, _MAXIMO_INDICES // n_filas)
+    for inicio in range(0, len(pares), paso):
+        grupo = pares[inicio:inicio + paso]
+        a, b = grupo[:, 0], grupo[:, 1]
+        filas, columnas = codigos[:, a], codigos[:, b]
+        validas = (filas >= 0) & (columnas >= 0)
+        indices = desplazamientos[inicio:inicio + paso] + filas * tamanos[b] + columnas
+        if pesos is None:
+            conteos += np.bincount(indices[validas], minlength=total_celdas)
+        else:
+            conteos += np.bincount(indices[validas], weights=np.broadcast_to(pesos[:, None], validas.shape)[validas],
+                                   minlength=total_celdas)
+    return conteos
+
+
+def calcular_asociaciones(df, columnas=None, correccion=True, pesos=None):
+    """Chi-cuadrado, p-valor, grados de libertad y V de Cramér de todos los
+    pares de `columnas` (por defecto, `columnas_categoricas(df)`).
+    Las filas con nulos en alguna de las dos columnas se excluyen del par.
+
+    `pesos` (opcional) es la frecuencia de cada fila: permite pasar las
+    combinaciones distintas de valores ya contadas en lugar de los datos."""
+    from scipy import stats
+
+    if columnas is None:
+        columnas = columnas_categoricas(df)
+    columnas = list(columnas)
+    codigos, categorias = codificar_categoricas(df, columnas)
+    tamanos = np.array([len(c) for c in categorias], dtype=np.int64)
+    pares = np.array(list(combinations(range(len(columnas)), 2)), dtype=np.int64).reshape(-1, 2)
+
+    celdas_por_par = tamanos[pares[:, 0]] * tamanos[pares[:, 1]]
+    desplazamientos = np.concatenate([[0], np.cumsum(celdas_por_par)[:-1]]).astype(np.int64)
+    total_celdas = int(celdas_por_par.sum())
+    if pesos is not None:
+        pesos = np.asarray(pesos, dtype=np.float64)
+    observados = _contar_celdas(codigos, tamanos, pares, desplazamientos, total_celdas, pesos).astype(np.float64)
+
+    # Para cada celda: a qué par, fila y columna de su tabla pertenece
+    par_celda = np.repeat(np.arange(len(pares)), celdas_por_par)
+    local = np.arange(total_celdas) - desplazamientos[par_celda]
+    tamano_b = tamanos[pares[par_celda, 1]]
+    fila_celda = np.concatenate([[0], np.cumsum(tamanos[pares[:, 0]])[:-1]])[par_celda] + local // tamano_b
+    columna_celda = np.concatenate([[0], np.cumsum(tamanos[pares[:, 1]])[:-1]])[par_celda] + local % tamano_b
+
+    # Marginales de todas las tablas con tres bincount ponderados
+    n = np.bincount(par_celda, weights=observados, minlength=len(pares))
+    marginal_filas = np.bincount(fila_celda, weights=observados)
+    marginal_columnas = np.bincount(columna_celda, weights=observados)
+
+    # Como crosstab, las filas y columnas sin observaciones no cuentan
+    filas_no_vacias = np.bincount(par_celda, weights=(marginal_filas[fila_celda] > 0) / tamano_b,
+                                  minlength=len(pares))
+    columnas_no_vacias = np.bincount(par_celda, weights=(marginal_columnas[columna_celda] > 0)
+                                     / tamanos[pares[par_celda, 0]], minlength=len(pares))
+    filas_no_vacias = np.rint(filas_no_vacias).astype(np.int64)
+    columnas_no_vacias = np.rint(columnas_no_vacias).astype(np.int64)
+    grados_libertad = np.maximum(filas_no_vacias - 1, 0) * np.maximum(columnas_no_vacias - 1, 0)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        esperados = marginal_filas[fila_celda] * marginal_columnas[columna_celda] / n[par_celda]
+        usadas = esperados > 0
+        diferencia = np.where(usadas, observados - esperados, 0.0)
+        chi2_sin_correccion = np.bincount(par_celda, weights=np.where(usadas, diferencia ** 2 / esperados, 0.0),
+                                          minlength=len(pares))
+        if correccion:
+            # Corrección de Yates (como chi2_contingency) en las tablas 2x2
+            ajuste = np.where(grados_libertad[par_celda] == 1, np.minimum(0.5, np.abs(diferencia)), 0.0)
+            diferencia = np.sign(diferencia) * (np.abs(diferencia) - ajuste)
+            chi2 = np.bincount(par_celda, weights=np.where(usadas, diferencia ** 2 / esperados, 0.0),
+                               minlength=len(pares))
+        else:
+            chi2 = chi2_sin_correccion
+        v_cramer = np.sqrt(chi2_sin_correccion / (n * (np.minimum(filas_no_vacias, columnas_no_vacias) - 1)))
+
+    p_valor = np.where(grados_libertad > 0, stats.chi2.sf(chi2, np.maximum(grados_libertad, 1)), 1.0)
+    chi2 = np.where(grados_libertad > 0, chi2, 0.0)
+
+    tabla = pd.DataFrame({
+        'Variable_1': [columnas[a] for a in pares[:, 0]],
+        'Variable_2': [columnas[b] for b in pares[:, 1]],
+        'Chi2': chi2,
+        'P_valor': np.where(n > 0, p_valor, np.nan),
+        'Grados_libertad': grados_libertad,
+        'V_Cramer': np.where(grados_libertad > 0, v_cramer, np.nan),
+        'N': n.astype(np.int64)
+    })
+    tabla = tabla.sort_values(['V_Cramer', 'Chi2'], ascending=False, na_position='last', kind='stable')
+    return AsociacionCategoricas(variables=columnas, pares=tabla.reset_index(drop=True))
@@ -0,0 +1,160 @@
+"""
+DETECCIÓN DE VALORES ATÍPICOS
+=========================================================
+
+Marca los registros atípicos de todas las variables numéricas con tres
+métodos a la vez, a partir de las medidas que ya calculó `calcular_resumen`
+(PASOS 4 y 5):
+
+- 'iqr': fuera de [Q1 - 1.5·IQR, Q3 + 1.5·IQR], los mismos límites que los
+  bigotes del box plot del PASO 10.
+- 'zscore': |x - media| / desviación estándar > 3.
+- 'mad': 0.6745·|x - mediana| / MAD > 3.5 (Iglewicz y Hoaglin), donde MAD
+  es la mediana de las desviaciones absolutas respecto de la mediana; es
+  la única medida nueva que se calcula.
+
+Cada método se reduce a un límite inferior y uno superior por variable, y
+todas las filas se comparan con todos los límites en una sola operación
+vectorizada (por bloques de filas). El resultado es una máscara de bits
+por fila (un bit por variable y método) y los conteos por variable.
+
+Los valores nulos nunca se marcan. Si la desviación estándar o la MAD de
+una variable es 0 (o no se puede calcular), ese método no marca nada en
+esa variable.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+METODOS_ATIPICOS = ['iqr', 'zscore', 'mad']
+# Nombres para mostrar de los métodos y de la columna 'cualquiera' de los conteos
+NOMBRES_METODOS = {'iqr': 'IQR (box plot)', 'zscore': 'Puntaje z', 'mad': 'MAD robusto', 'cualquiera': 'Cualquier método'}
+
+FACTOR_IQR = 1.5
+UMBRAL_Z = 3.0
+UMBRAL_MAD = 3.5
+CONSTANTE_MAD = 0.6745  # Percentil 75 de la normal estándar
+
+# Filas que se comparan a la vez con los límites
+FILAS_POR_BLOQUE = 1 << 20
+
+
+@dataclass
+class AtipicosDetectados:
+    """Marcas de atípicos: `mascara[fila]` tiene encendido el bit
+    `bit(variable, metodo)` si la fila es atípica en esa variable según ese
+    método. `limites` tiene una fila por variable y método (límites
+    inferior y superior) y `conteos` las filas marcadas por variable (una
+    columna por método y 'cualquiera')."""
+
+    variables: list
+    metodos: list
+    mascara: np.ndarray
+    limites: pd.DataFrame
+    conteos: pd.DataFrame
+
+    def bit(self, variable, metodo):
+        return self.metodos.index(metodo) * len(self.variables) + self.variables.index(variable)
+
+    def bits(self, metodos=None, variables=None):
+        """Máscara con los bits de `metodos` y `variables` (todos por defecto)."""
+        metodos = self.metodos if metodos is None else metodos
+        variables = self.variables if variables is None else variables
+        seleccion = sum(1 << self.bit(variable, metodo) for metodo in metodos for variable in variables)
+        return self.mascara.dtype.type(seleccion)
+
+    def marcadas(self, metodos=None, variables=None):
+        """Arreglo booleano (uno por fila) de las filas atípicas en alguna de
+        `variables` según alguno de `metodos`."""
+        return (self.mascara & self.bits(metodos, variables)) != 0
+
+    def detalle(self, df, metodos=None, maximo_filas=None):
+        """Filas marcadas de `df` (el mismo DataFrame de la detección), hasta
+        `maximo_filas`, con una columna 'Atipico_<variable>' por variable que
+        indica los métodos que la marcaron."""
+        metodos = self.metodos if metodos is None else metodos
+        filas = np.flatnonzero(self.marcadas(metodos))[:maximo_filas]
+        detalle = df.iloc[filas].copy()
+        mascara = self.mascara[filas]
+        for variable in self.variables:
+            marcas = [np.where((mascara & self.bits([metodo], [variable])) != 0, metodo, '') for metodo in metodos]
+            detalle[f"Atipico_{variable}"] = [', '.join(filter(None, fila)) for fila in zip(*marcas)]
+        return detalle
+
+
+def _mad(datos, mediana):
+    with np.errstate(invalid='ignore'):
+        return np.array([np.nanmedian(np.abs(datos[:, j] - mediana[j])) if np.isfinite(mediana[j]) else np.nan
+                         for j in range(datos.shape[1])])
+
+
+def limites_atipicos(resumen, variables, datos=None, metodos=METODOS_ATIPICOS):
+    """Límites inferior y superior (arreglos de forma métodos x variables)
+    de cada método, a partir de las medidas de `resumen`. `datos` (filas x
+    variables) solo se usa para la MAD."""
+    posiciones = [resumen.variables.index(variable) for variable in variables]
+    q1, q3, media, mediana, desviacion = (
+        np.asarray(medida, dtype=np.float64)[posiciones]
+        for medida in (resumen.q1, resumen.q3, resumen.media, resumen.mediana, resumen.desviacion_std)
+    )
+    inferior, superior = [], []
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for metodo in metodos:
+            if metodo == 'iqr':
+                rango_iq = q3 - q1
+                inferior.append(q1 - FACTOR_IQR * rango_iq)
+                superior.append(q3 + FACTOR_IQR * rango_iq)
+            elif metodo == 'zscore':
+                desviacion = np.where(desviacion > 0, desviacion, np.nan)
+                inferior.append(media - UMBRAL_Z * desviacion)
+                superior.append(media + UMBRAL_Z * desviacion)
+            elif metodo == 'mad':
+                mad = _mad(datos, mediana)
+                escala = np.where(mad > 0, UMBRAL_MAD * mad / CONSTANTE_MAD, np.nan)
+                inferior.append(mediana - escala)
+                superior.append(mediana + escala)
+            else:
+                raise ValueError(f"Método de atípicos desconocido: '{metodo}' (use {METODOS_ATIPICOS})")
+    return np.array(inferior, dtype=np.float64), np.array(superior, dtype=np.float64)
+
+
+def detectar_atipicos(df, resumen, variables=None, metodos=METODOS_ATIPICOS,
+                      filas_por_bloque=FILAS_POR_BLOQUE):
+    """Marca los atípicos de `variables` (por defecto las de `resumen`) en
+    `df` con `metodos`, usando las medidas ya calculadas en `resumen`."""
+    variables = list(resumen.variables if variables is None else variables)
+    metodos = list(metodos)
+    n_bits = len(metodos) * len(variables)
+    ancho = next((bits for bits in (8, 16, 32, 64) if bits >= n_bits), None)
+    if ancho is None:
+        raise ValueError(f"Demasiadas combinaciones de variable y método ({n_bits}); el máximo es 64")
+
+    datos = df[variables].to_numpy(dtype=np.float64)
+    inferior, superior = limites_atipicos(resumen, variables, datos, metodos)
+
+    n = len(datos)
+    mascara = np.empty(n, dtype=f'<u{ancho // 8}')
+    conteos = np.zeros(n_bits, dtype=np.int64)
+    conteos_cualquiera = np.zeros(len(variables), dtype=np.int64)
+    for inicio in range(0, n, filas_por_bloque):
+        bloque = datos[inicio:inicio + filas_por_bloque, None, :]
+        # (filas, métodos, variables): todas las comparaciones en una sola operación
+        fuera = (bloque < inferior) | (bloque > superior)
+        conteos += fuera.sum(axis=0).ravel()
+        conteos_cualquiera += fuera.any(axis=1).sum(axis=0)
+        bits = np.zeros((len(fuera), ancho), dtype=bool)
+        bits[:, :n_bits] = fuera.reshape(len(fuera), n_bits)
+        mascara[inicio:inicio + len(fuera)] = np.packbits(bits, axis=1, bitorder='little').view(mascara.dtype)[:, 0]
+
+    tabla_conteos = pd.DataFrame(conteos.reshape(len(metodos), len(variables)).T, index=variables, columns=metodos)
+    tabla_conteos['cualquiera'] = conteos_cualquiera
+    limites = pd.DataFrame({
+        'Variable': np.tile(variables, len(metodos)),
+        'Metodo': np.repeat(metodos, len(variables)),
+        'Limite_inferior': inferior.ravel(),
+        'Limite_superior': superior.ravel()
+    })
+    return AtipicosDetectados(variables=variables, metodos=metodos, mascara=mascara,
+                              limites=limites, conteos=tabla_conteos)
@@ -0,0 +1,390 @@
+"""
+BENCHMARK DEL ANÁLISIS ESTADÍSTICO
+=========================================================
+
+Mide cómo escala cada PASO de `analisis_estadistico.py` con el número de
+filas, usando datos sintéticos con el mismo esquema que
+`estudiantes_datos.csv` y correlaciones realistas (más horas de estudio
+-> mejor calificación en Matemáticas -> mejor calificación en Ciencias;
+el nivel socioeconómico y la edad influyen en las horas de estudio).
+
+Para cada tamaño se genera (una sola vez, con semilla fija) un CSV en
+`.benchmark_datos/` y se mide el tiempo y el pico de memoria de:
+
+- PASO 2     carga del CSV y aplicación del esquema
+- PASO 4-6   medidas de posición y dispersión (resumen completo)
+- PASO 7-8   correlaciones de Pearson y Spearman
+- PASO 9     Chi-cuadrado y cribado de asociación
+- PASO 10    figura con las 9 gráficas
+- PASO 12    exportación a Excel
+
+Por encima de `--limite-memoria` filas los PASOS 2 a 9 se miden en modo
+streaming (lectura por bloques) y se omiten las gráficas y el Excel.
+
+Los resultados se guardan en JSON para comparar versiones:
+
+    python benchmark.py --tamanos 1e3 1e4 1e5 1e6
+    python benchmark.py --tamanos 1e7 1e8 --salida grandes.json
+    python benchmark.py --comparar base.json resultados_benchmark.json
+
+Con `--arranque` se mide el arranque en frío de `app.py`: el tiempo de
+sus importaciones de módulo en un intérprete nuevo (lo que paga cada
+proceso de Streamlit antes de mostrar el primer elemento). Falla si supera
+`PRESUPUESTO_ARRANQUE` o si carga alguno de `MODULOS_PESADOS`, que solo
+deben importarse al llegar a la sección que los usa:
+
+    python benchmark.py --arranque
+"""
+
+import argparse
+import ast
+import gc
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from esquema import VARIABLES_NUMERICAS
+
+# Datos sintéticos
+DIRECTORIO_DATOS = '.benchmark_datos'
+FILAS_POR_BLOQUE = 1_000_000
+NIVELES = ['Bajo', 'Medio', 'Alto']
+PROBABILIDAD_NIVELES = [0.38, 0.36, 0.26]
+HORAS_POR_NIVEL = np.array([2.6, 5.0, 7.3])
+# Calificación mínima para aprobar (en el CSV original: No <= 60, Si >= 62)
+NOTA_APROBACION = 61
+
+TAMANOS_POR_DEFECTO = [1_000, 10_000, 100_000, 1_000_000]
+LIMITE_MEMORIA = 10_000_000
+# Las gráficas pasan al modo de datos grandes (tiempo casi constante) y se
+# miden en todos los tamaños que caben en memoria
+LIMITE_GRAFICAS = LIMITE_MEMORIA
+LIMITE_EXCEL = 100_000
+ARCHIVO_RESULTADOS = 'resultados_benchmark.json'
+
+# Un paso se considera más lento si tarda más de este factor respecto a la base
+UMBRAL_REGRESION = 1.2
+
+# Arranque en frío de la app: segundos máximos de importación y módulos que
+# no deben cargarse antes de la primera sección
+APP = 'app.py'
+PRESUPUESTO_ARRANQUE = 1.5
+MODULOS_PESADOS = ['scipy.stats', 'matplotlib', 'seaborn']
+
+
+# =============================================================================
+# GENERADOR DE DATOS SINTÉTICOS
+# =============================================================================
+
+def generar_estudiantes(n_filas, semilla=0, inicio=0):
+    """DataFrame sintético con el esquema de `estudiantes_datos.csv`.
+    `inicio` es el número del primer estudiante (para generar por bloques)."""
+    rng = np.random.default_rng(semilla)
+    nivel = rng.choice(len(NIVELES), size=n_filas, p=PROBABILIDAD_NIVELES)
+    horas = np.clip(np.rint(HORAS_POR_NIVEL[nivel] + rng.normal(0, 1.0, n_filas)), 1, 10)
+    matematicas = np.clip(np.rint(51.8 + 5.7 * horas + rng.normal(0, 3.0, n_filas)), 0, 100)
+    ciencias = np.clip(np.rint(11.4 + 0.86 * matematicas + rng.normal(0, 2.0, n_filas)), 0, 100)
+    # Los estudiantes mayores estudian menos horas (r ≈ -0.5 en el CSV original)
+    edad = np.clip(np.rint(19.9 - 0.2 * horas + rng.normal(0, 0.7, n_filas)), 18, 20)
+    return pd.DataFrame({
+        'Estudiante': [f"Estudiante_{i}" for i in range(inicio, inicio + n_filas)],
+        'Edad': edad.astype(np.int64),
+        'Calificacion_Matematicas': matematicas.astype(np.int64),
+        'Calificacion_Ciencias': ciencias.astype(np.int64),
+        'Horas_Estudio': horas.astype(np.int64),
+        'Nivel_Socioeconomico': np.array(NIVELES)[nivel],
+        'Aprobado': np.where(matematicas >= NOTA_APROBACION, 'Si', 'No')
+    })
+
+
+def generar_csv(n_filas, semilla=0, directorio=DIRECTORIO_DATOS):
+    """Escribe (si no existe) el CSV sintético de `n_filas` filas por bloques
+    y devuelve su ruta. Cada bloque usa su propia semilla derivada."""
+    os.makedirs(directorio, exist_ok=True)
+    ruta = os.path.join(directorio, f"estudiantes_{n_filas}_s{semilla}.csv")
+    if os.path.exists(ruta):
+        return ruta
+    temporal = f"{ruta}.tmp"
+    with open(temporal, 'w', encoding='utf-8', newline='') as archivo:
+        for numero, inicio in enumerate(range(0, n_filas, FILAS_POR_BLOQUE)):
+            filas = min(FILAS_POR_BLOQUE, n_filas - inicio)
+            bloque = generar_estudiantes(filas, semilla=[semilla, numero], inicio=inicio)
+            bloque.to_csv(archivo, index=False, header=(numero == 0))
+    os.replace(temporal, ruta)
+    return ruta
+
+
+# =============================================================================
+# MEDICIÓN
+# =============================================================================
+
+def _medir(funcion, repeticiones, medir_memoria):
+    """Ejecuta `funcion` y devuelve (resultado, segundos, pico de memoria en
+    MB). El tiempo es el mínimo de `repeticiones` ejecuciones sin
+    tracemalloc; la memoria se mide en una ejecución aparte."""
+    tiempos = []
+    resultado = None
+    for _ in range(max(1, repeticiones)):
+        gc.collect()
+        inicio = time.perf_counter()
+        resultado = funcion()
+        tiempos.append(time.perf_counter() - inicio)
+    pico = None
+    if medir_memoria:
+        gc.collect()
+        tracemalloc.start()
+        funcion()
+        pico = tracemalloc.get_traced_memory()[1] / 2 ** 20
+        tracemalloc.stop()
+    return resultado, min(tiempos), pico
+
+
+def _figura_completa(df, resumen, correlaciones):
+    """Las 9 gráficas del PASO 10 a 300 dpi, dibujadas sin la caché de disco
+    (se mide el costo de dibujar, no el de leer la caché)."""
+    import matplotlib
+    matplotlib.use('Agg')
+
+    from graficas import generar_figura
+
+    return len(generar_figura(df, resumen, correlaciones, dpi=300, usar_cache=False))
+
+
+def _exportar_excel(df, resumen, correlaciones, tabla_contingencia, asociaciones, limite_excel):
+    from esquema import etiquetas_originales
+    from exportacion import LibroExcel, bloques_dataframe
+
+    with tempfile.TemporaryDirectory() as directorio:
+        ruta = os.path.join(directorio, 'benchmark.xlsx')
+        with LibroExcel(ruta) as libro:
+            if len(df) <= limite_excel:
+                libro.agregar_datos((etiquetas_originales(b) for b in bloques_dataframe(df)), 'Datos_Originales')
+            libro.agregar_tabla(resumen.tabla(), 'Resumen_Estadistico')
+            libro.agregar_tabla(correlaciones['pearson'].matriz(), 'Correlacion_Pearson')
+            libro.agregar_tabla(correlaciones['spearman'].matriz(), 'Correlacion_Spearman')
+            libro.agregar_tabla(tabla_contingencia, 'Tabla_Contingencia')
+            libro.agregar_tabla(asociaciones.pares, 'Asociacion_Categoricas', index=False)
+        return os.path.getsize(ruta)
+
+
+def medir_tamano(ruta, n_filas, repeticiones=1, medir_memoria=True, limite_memoria=LIMITE_MEMORIA,
+                 limite_graficas=LIMITE_GRAFICAS, limite_excel=LIMITE_EXCEL):
+    """Mide cada PASO del análisis sobre el CSV `ruta`. Devuelve una lista de
+    diccionarios {filas, paso, modo, segundos, memoria_pico_mb}."""
+    from scipy import stats
+
+    from acumuladores import analizar_csv_por_bloques
+    from asociacion import calcular_asociaciones
+    from carga_datos import cargar_csv
+    from correlaciones import calcular_correlaciones
+    from esquema import ETIQUETAS_BOOLEANAS, aplicar_esquema
+    from estadisticas import calcular_resumen
+
+    resultados = []
+
+    def registrar(paso, modo, funcion):
+        resultado, segundos, pico = _medir(funcion, repeticiones, medir_memoria)
+        resultados.append({
+            'filas': n_filas,
+            'paso': paso,
+            'modo': modo,
+            'segundos': segundos,
+            'memoria_pico_mb': pico
+        })
+        memoria = f", pico {pico:.1f} MB" if pico is not None else ""
+        print(f"  {paso:<28} {segundos:10.4f} s{memoria}")
+        return resultado
+
+    if n_filas > limite_memoria:
+        estado = registrar('PASO 2-9 lectura por bloques', 'streaming',
+                           lambda: analizar_csv_por_bloques(ruta, VARIABLES_NUMERICAS))
+        registrar('PASO 4-6 resumen', 'streaming', lambda: estado.resumen().tabla())
+        registrar('PASO 7-8 correlacion', 'streaming', estado.correlaciones)
+        registrar('PASO 9 chi_cuadrado', 'streaming',
+                  lambda: stats.chi2_contingency(estado.tabla_contingencia()))
+        return resultados
+
+    df = registrar('PASO 2 carga', 'memoria',
+                   lambda: aplicar_esquema(cargar_csv(ruta, usar_cache=False)))
+    resumen = registrar('PASO 4-6 resumen', 'memoria',
+                        lambda: calcular_resumen(df, VARIABLES_NUMERICAS))
+    correlaciones = registrar('PASO 7-8 correlacion', 'memoria',
+                              lambda: calcular_correlaciones(df, VARIABLES_NUMERICAS))
+
+    def chi_cuadrado():
+        tabla = pd.crosstab(df['Nivel_Socioeconomico'], df['Aprobado']).rename(columns=ETIQUETAS_BOOLEANAS)
+        stats.chi2_contingency(tabla)
+        return tabla, calcular_asociaciones(df)
+
+    tabla_contingencia, asociaciones = registrar('PASO 9 chi_cuadrado', 'memoria', chi_cuadrado)
+
+    if n_filas <= limite_graficas:
+        registrar('PASO 10 graficas', 'memoria', lambda: _figura_completa(df, resumen, correlaciones))
+    registrar('PASO 12 exportacion_excel', 'memoria',
+              lambda: _exportar_excel(df, resumen, correlaciones, tabla_contingencia, asociaciones, limite_excel))
+    return resultados
+
+
+def _version_codigo():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def metadatos():
+    """Versión del código y del entorno, para comparar resultados."""
+    import matplotlib
+    import scipy
+
+    return {
+        'fecha': datetime.now().isoformat(timespec='seconds'),
+        'version_codigo': _version_codigo(),
+        'python': platform.python_version(),
+        'plataforma': platform.platform(),
+        'nucleos': os.cpu_count(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'scipy': scipy.__version__,
+        'matplotlib': matplotlib.__version__
+    }
+
+
+def ejecutar_benchmark(tamanos=TAMANOS_POR_DEFECTO, semilla=0, repeticiones=1, medir_memoria=True,
+                       directorio=DIRECTORIO_DATOS, **limites):
+    """Genera los datos y mide todos los tamaños. Devuelve el diccionario
+    que se guarda en JSON ({'metadatos': ..., 'resultados': [...]})."""
+    resultados = []
+    for n_filas in tamanos:
+        print(f"\n{n_filas:,} filas")
+        inicio = time.perf_counter()
+        ruta = generar_csv(n_filas, semilla, directorio)
+        print(f"  {'(datos sintéticos)':<28} {time.perf_counter() - inicio:10.4f} s")
+        resultados.extend(medir_tamano(ruta, n_filas, repeticiones, medir_memoria, **limites))
+    return {
+        'metadatos': {**metadatos(), 'semilla': semilla, 'repeticiones': repeticiones},
+        'resultados': resultados
+    }
+
+
+def comparar(ruta_base, ruta_nueva, umbral=UMBRAL_REGRESION):
+    """Tabla con el cociente de tiempos nueva/base por tamaño y paso; marca
+    como regresión los pasos más lentos que `umbral` veces la base."""
+    with open(ruta_base, encoding='utf-8') as archivo:
+        base = pd.DataFrame(json.load(archivo)['resultados'])
+    with open(ruta_nueva, encoding='utf-8') as archivo:
+        nueva = pd.DataFrame(json.load(archivo)['resultados'])
+    tabla = base.merge(nueva, on=['filas', 'paso', 'modo'], suffixes=('_base', '_nueva'))
+    tabla['cociente'] = tabla['segundos_nueva'] / tabla['segundos_base']
+    tabla['regresion'] = tabla['cociente'] > umbral
+    return tabla[['filas', 'paso', 'modo', 'segundos_base', 'segundos_nueva', 'cociente', 'regresion']]
+
+
+# =============================================================================
+# ARRANQUE EN FRÍO DE LA APP
+# =============================================================================
+
+def _importaciones_modulo(ruta_app):
+    # Las importaciones del nivel superior de la app, en su orden: es lo que
+    # se ejecuta antes del primer elemento de la página
+    with open(ruta_app, encoding='utf-8') as archivo:
+        arbol = ast.parse(archivo.read(), filename=ruta_app)
+    return [ast.unparse(nodo) for nodo in arbol.body if isinstance(nodo, (ast.Import, ast.ImportFrom))]
+
+
+def medir_arranque(ruta_app=APP, repeticiones=3, presupuesto=PRESUPUESTO_ARRANQUE):
+    """Tiempo de las importaciones de módulo de `ruta_app`, cada vez en un
+    intérprete nuevo (se informa el menor), y módulos pesados que quedan
+    cargados. `dentro_presupuesto` es False si el tiempo supera
+    `presupuesto` o si se carga alguno de `MODULOS_PESADOS`."""
+    codigo = '\n'.join([
+        'import json, sys, time',
+        'inicio = time.perf_counter()',
+        *_importaciones_modulo(ruta_app),
+        'segundos = time.perf_counter() - inicio',
+        f'pesados = [m for m in {MODULOS_PESADOS!r} if m in sys.modules]',
+        "print(json.dumps({'segundos': segundos, 'pesados': pesados}))"
+    ])
+    mediciones = []
+    for _ in range(repeticiones):
+        salida = subprocess.run([sys.executable, '-c', codigo], capture_output=True, text=True, check=True,
+                                cwd=os.path.dirname(os.path.abspath(ruta_app)))
+        mediciones.append(json.loads(salida.stdout.strip().splitlines()[-1]))
+    segundos = min(m['segundos'] for m in mediciones)
+    pesados = sorted({m for medicion in mediciones for m in medicion['pesados']})
+    return {
+        'app': ruta_app,
+        'segundos': segundos,
+        'presupuesto': presupuesto,
+        'modulos_pesados': pesados,
+        'dentro_presupuesto': segundos <= presupuesto and not pesados
+    }
+
+
+def _entero(texto):
+    # Acepta notación científica: 1e6 -> 1000000
+    return int(float(texto))
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Benchmark de los PASOS del análisis estadístico")
+    parser.add_argument('--tamanos', type=_entero, nargs='+', default=TAMANOS_POR_DEFECTO,
+                        help="Números de filas a medir (por ejemplo 1e3 1e5 1e8)")
+    parser.add_argument('--semilla', type=int, default=0)
+    parser.add_argument('--repeticiones', type=int, default=1,
+                        help="Ejecuciones por paso; se informa el menor tiempo")
+    parser.add_argument('--sin-memoria', action='store_true',
+                        help="No medir el pico de memoria (evita una ejecución extra por paso)")
+    parser.add_argument('--limite-memoria', type=_entero, default=LIMITE_MEMORIA,
+                        help="Por encima de estas filas se usa el modo streaming")
+    parser.add_argument('--limite-graficas', type=_entero, default=LIMITE_GRAFICAS)
+    parser.add_argument('--limite-excel', type=_entero, default=LIMITE_EXCEL,
+                        help="Máximo de filas de la hoja Datos_Originales")
+    parser.add_argument('--directorio', default=DIRECTORIO_DATOS)
+    parser.add_argument('--salida', default=ARCHIVO_RESULTADOS)
+    parser.add_argument('--comparar', nargs=2, metavar=('BASE', 'NUEVA'),
+                        help="Compara dos archivos de resultados en lugar de medir")
+    parser.add_argument('--arranque', action='store_true',
+                        help="Mide el arranque en frío de la app en lugar de los PASOS")
+    parser.add_argument('--presupuesto-arranque', type=float, default=PRESUPUESTO_ARRANQUE,
+                        help="Segundos máximos de importación de la app")
+    argumentos = parser.parse_args(argumentos)
+
+    if argumentos.arranque:
+        arranque = medir_arranque(APP, max(argumentos.repeticiones, 3), argumentos.presupuesto_arranque)
+        print(f"Importaciones de {arranque['app']}: {arranque['segundos']:.3f} s "
+              f"(presupuesto {arranque['presupuesto']:.2f} s)")
+        if arranque['modulos_pesados']:
+            print(f"✗ Módulos pesados cargados al arrancar: {', '.join(arranque['modulos_pesados'])}")
+        print("✓ Dentro del presupuesto" if arranque['dentro_presupuesto'] else "✗ Fuera del presupuesto")
+        return 0 if arranque['dentro_presupuesto'] else 1
+
+    if argumentos.comparar:
+        tabla = comparar(*argumentos.comparar)
+        with pd.option_context('display.width', 120):
+            print(tabla.to_string(index=False))
+        return 1 if tabla['regresion'].any() else 0
+
+    resultado = ejecutar_benchmark(
+        argumentos.tamanos, argumentos.semilla, argumentos.repeticiones, not argumentos.sin_memoria,
+        argumentos.directorio, limite_memoria=argumentos.limite_memoria,
+        limite_graficas=argumentos.limite_graficas, limite_excel=argumentos.limite_excel
+    )
+    with open(argumentos.salida, 'w', encoding='utf-8') as archivo:
+        json.dump(resultado, archivo, indent=2, ensure_ascii=False)
+    print(f"\n✓ Resultados guardados en: {argumentos.salida}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,424 @@
+"""
+INTERVALOS DE CONFIANZA BOOTSTRAP
+=========================================================
+
+Intervalos bootstrap (percentil o BCa) para todas las medidas de
+`resumen_completo` y para los coeficientes de Pearson y Spearman de todos
+los pares de variables.
+
+- Las B remuestras se sortean como matrices de índices (remuestras x filas),
+  por bloques, y cada bloque se evalúa con NumPy vectorizado: todas las
+  medidas y correlaciones de todas las remuestras del bloque de una vez.
+- Se trabaja sobre las columnas compactas del DataFrame (int8, int16, ...,
+  ver esquema.py) sin copiar `df`. En las columnas enteras de pocos valores
+  distintos cada remuestra se reduce a un conteo de frecuencias
+  (`np.bincount`): de ahí salen media, varianza, cuantiles, moda y rangos de
+  Spearman sin ordenar nada. Las demás columnas se ordenan por remuestra.
+- Los bloques se pueden repartir en varios procesos; cada bloque tiene su
+  propia semilla, así el resultado no depende del número de procesos.
+- El intervalo BCa corrige el sesgo con la proporción de remuestras por
+  debajo de la estimación y la asimetría con un jackknife (exacto hasta
+  GRUPOS_JACKKNIFE filas; con más filas, eliminando grupos de filas).
+
+Las filas con nulos en alguna de las variables se excluyen.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from correlaciones import NIVEL_CONFIANZA
+from estadisticas import MEDIDAS_RESUMEN, _cuantiles_ordenados
+
+REMUESTRAS_BOOTSTRAP = 1000
+METODOS_INTERVALO = ['percentil', 'bca']
+SEMILLA_BOOTSTRAP = 0
+
+# Valores remuestreados por columna en cada bloque (remuestras x filas)
+VALORES_POR_BLOQUE = 1_000_000
+
+# Columnas enteras con hasta este rango de valores se resumen por conteo
+LIMITE_VALORES_CONTEO = 4096
+
+# Muestras del jackknife para la aceleración del intervalo BCa
+GRUPOS_JACKKNIFE = 200
+
+COLUMNAS_INTERVALOS = [
+    'Estadistico', 'Variable_1', 'Variable_2', 'Valor', 'Error_Estandar', 'IC_inferior', 'IC_superior'
+]
+
+# Columnas del bloque que recibe cada proceso hijo
+_COLUMNAS_TRABAJADOR = None
+
+
+@dataclass
+class ResultadoBootstrap:
+    """Estimaciones e intervalos bootstrap en formato largo, una fila por
+    estadístico: Estadistico (una medida de MEDIDAS_RESUMEN, 'pearson' o
+    'spearman'), Variable_1, Variable_2 (vacía en las medidas), Valor,
+    Error_Estandar, IC_inferior, IC_superior."""
+
+    variables: list
+    remuestras: int
+    metodo: str
+    nivel_confianza: float
+    n: int
+    intervalos: pd.DataFrame
+
+    def descripcion(self):
+        nombre = 'BCa' if self.metodo == 'bca' else 'percentil'
+        return (f"Intervalos bootstrap {nombre} al {self.nivel_confianza:.0%} "
+                f"({self.remuestras} remuestras de {self.n} filas)")
+
+    def tabla_resumen(self):
+        """`resumen_completo` con el intervalo junto a cada medida: columnas
+        'Media', 'Media IC inf', 'Media IC sup', 'Mediana', ..."""
+        medidas = self.intervalos[self.intervalos['Estadistico'].isin(MEDIDAS_RESUMEN)]
+        tabla = pd.DataFrame(index=self.variables)
+        for medida in MEDIDAS_RESUMEN:
+            filas = medidas[medidas['Estadistico'] == medida].set_index('Variable_1').reindex(self.variables)
+            tabla[medida] = filas['Valor']
+            tabla[f"{medida} IC inf"] = filas['IC_inferior']
+            tabla[f"{medida} IC sup"] = filas['IC_superior']
+        return tabla
+
+    def matrices(self, metodo='pearson'):
+        """(coeficientes, límites inferiores, límites superiores) de un
+        método de correlación, como matrices con diagonal 1."""
+        filas = self.intervalos[self.intervalos['Estadistico'] == metodo]
+        resultado = []
+        for columna in ('Valor', 'IC_inferior', 'IC_superior'):
+            matriz = pd.DataFrame(np.eye(len(self.variables)), index=self.variables, columns=self.variables)
+            for fila in filas.itertuples(index=False):
+                valor = getattr(fila, columna)
+                matriz.loc[fila.Variable_1, fila.Variable_2] = valor
+                matriz.loc[fila.Variable_2, fila.Variable_1] = valor
+            resultado.append(matriz)
+        return tuple(resultado)
+
+    def texto_resumen(self, decimales=2):
+        """`resumen_completo` como texto 'valor [inferior, superior]'."""
+        tabla = self.tabla_resumen()
+        return pd.DataFrame({
+            medida: [_con_intervalo(v, i, s, decimales) for v, i, s in
+                     zip(tabla[medida], tabla[f"{medida} IC inf"], tabla[f"{medida} IC sup"])]
+            for medida in MEDIDAS_RESUMEN
+        }, index=self.variables)
+
+    def texto_matriz(self, metodo='pearson', decimales=3):
+        """Matriz de correlación como texto 'r [inferior, superior]'."""
+        valores, inferiores, superiores = self.matrices(metodo)
+        texto = pd.DataFrame('', index=self.variables, columns=self.variables)
+        for a in self.variables:
+            for b in self.variables:
+                if a == b:
+                    texto.loc[a, b] = f"{1:.{decimales}f}"
+                else:
+                    texto.loc[a, b] = _con_intervalo(valores.loc[a, b], inferiores.loc[a, b],
+                                                     superiores.loc[a, b], decimales)
+        return texto
+
+
+def _con_intervalo(valor, inferior, superior, decimales):
+    if np.isnan(valor):
+        return 'NaN'
+    if np.isnan(inferior) or np.isnan(superior):
+        return f"{valor:.{decimales}f}"
+    return f"{valor:.{decimales}f} [{inferior:.{decimales}f}, {superior:.{decimales}f}]"
+
+
+# =============================================================================
+# ESTADÍSTICOS DE UN BLOQUE DE REMUESTRAS
+# =============================================================================
+
+def _preparar_columnas(df, variables):
+    """Columnas de `df` (sin copiar si no hay nulos) y, para las enteras de
+    pocos valores distintos, su mínimo y su rango de valores."""
+    valores = [df[variable].to_numpy() for variable in variables]
+    validas = np.ones(len(df), dtype=bool)
+    for columna in valores:
+        if columna.dtype.kind == 'f':
+            validas &= ~np.isnan(columna)
+    if not validas.all():
+        valores = [columna[validas] for columna in valores]
+
+    columnas = []
+    for columna in valores:
+        if columna.dtype.kind == 'b':
+            columna = columna.view(np.uint8)
+        minimo = distintos = None
+        if columna.dtype.kind in 'iu' and len(columna):
+            minimo, maximo = int(columna.min()), int(columna.max())
+            if maximo - minimo < LIMITE_VALORES_CONTEO:
+                distintos = maximo - minimo + 1
+            else:
+                minimo = None
+        columnas.append({'valores': columna, 'minimo': minimo, 'distintos': distintos})
+    return columnas
+
+
+def _medidas(media, mediana, moda, minimo, maximo, q1, q3, varianza):
+    """Matriz (remuestras, medidas) en el orden de MEDIDAS_RESUMEN."""
+    desviacion = np.sqrt(varianza)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        coef_variacion = desviacion / media * 100
+    return np.column_stack([media, mediana, moda, minimo, maximo, maximo - minimo, q1, q3, varianza,
+                            desviacion, coef_variacion])
+
+
+def _medidas_conteos(muestra, minimo, distintos):
+    """Medidas y rangos de Spearman de cada fila de `muestra` (remuestras x
+    filas, enteros) a partir del conteo de cada valor en la fila."""
+    b, m = muestra.shape
+    # Código de cada valor en una tabla de conteos (remuestras x distintos)
+    celdas = muestra.astype(np.intp) + (distintos * np.arange(b)[:, None] - minimo)
+    conteos = np.bincount(celdas.ravel(), minlength=b * distintos).reshape(b, distintos)
+    valores = np.arange(minimo, minimo + distintos, dtype=np.float64)
+    acumulados = np.cumsum(conteos, axis=1)
+
+    media = conteos @ valores / m
+    with np.errstate(divide='ignore', invalid='ignore'):
+        varianza = (conteos * (valores - media[:, None]) ** 2).sum(axis=1) / (m - 1)
+
+    def valor_en(posiciones):
+        # Valor que ocupa cada posición (0..m-1) de la fila ordenada
+        return valores[(acumulados <= posiciones[:, None]).sum(axis=1)]
+
+    def cuantil(q):
+        posicion = (m - 1) * q
+        inferior = int(np.floor(posicion))
+        bajo = valor_en(np.full(b, inferior))
+        alto = valor_en(np.full(b, min(inferior + 1, m - 1)))
+        return bajo + (alto - bajo) * (posicion - inferior)
+
+    presentes = conteos > 0
+    minimos = valores[np.argmax(presentes, axis=1)]
+    maximos = valores[distintos - 1 - np.argmax(presentes[:, ::-1], axis=1)]
+    # argmax devuelve el primer máximo: ante empates, el menor valor
+    moda = valores[np.argmax(conteos, axis=1)]
+
+    # Rango promedio de cada valor (como rankdata 'average')
+    rango_valor = acumulados - conteos + (conteos + 1) / 2
+    rangos = rango_valor.ravel()[celdas]
+
+    medidas = _medidas(media, cuantil(0.5), moda, minimos, maximos, cuantil(0.25), cuantil(0.75),
+                       varianza if m > 1 else np.full(b, np.nan))
+    return medidas, rangos
+
+
+def _medidas_ordenadas(muestra):
+    """Medidas y rangos de Spearman de cada fila de `muestra` ordenándola."""
+    b, m = muestra.shape
+    muestra = muestra.astype(np.float64, copy=False)
+    orden = np.argsort(muestra, axis=1, kind='stable')
+    ordenados = np.take_along_axis(muestra, orden, axis=1)
+
+    def cuantil(q):
+        posicion = (m - 1) * q
+        inferior = int(np.floor(posicion))
+        bajo, alto = ordenados[:, inferior], ordenados[:, min(inferior + 1, m - 1)]
+        return bajo + (alto - bajo) * (posicion - inferior)
+
+    # Rachas de valores iguales de cada fila (la primera columna siempre
+    # empieza una racha, así ninguna cruza de una fila a otra)
+    cambios = np.ones((b, m), dtype=bool)
+    cambios[:, 1:] = ordenados[:, 1:] != ordenados[:, :-1]
+    inicios = np.flatnonzero(cambios)
+    largos = np.diff(np.r_[inicios, b * m])
+    fila_racha = inicios // m
+
+    # Moda: la racha más larga de cada fila; ante empates la primera (el menor valor)
+    elegidas = np.lexsort((inicios, -largos, fila_racha))
+    primera = np.r_[True, fila_racha[elegidas][1:] != fila_racha[elegidas][:-1]]
+    moda = ordenados.ravel()[inicios[elegidas][primera]]
+
+    rangos_ordenados = np.repeat(inicios % m + (largos + 1) / 2, largos).reshape(b, m)
+    rangos = np.empty((b, m))
+    np.put_along_axis(rangos, orden, rangos_ordenados, axis=1)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        varianza = muestra.var(axis=1, ddof=1) if m > 1 else np.full(b, np.nan)
+    medidas = _medidas(muestra.mean(axis=1), cuantil(0.5), moda, ordenados[:, 0], ordenados[:, -1],
+                       cuantil(0.25), cuantil(0.75), varianza)
+    return medidas, rangos
+
+
+def _correlaciones(datos):
+    """Coeficientes de Pearson de cada remuestra para cada par (i < j):
+    datos (p, remuestras, filas) -> (remuestras, pares). Centra `datos` en
+    el mismo arreglo."""
+    datos -= datos.mean(axis=2, keepdims=True)
+    varianza = np.einsum('pbm,pbm->pb', datos, datos)
+    i, k = np.triu_indices(len(datos), k=1)
+    if len(i) == 0:
+        return np.empty((datos.shape[1], 0))
+    covarianza = np.column_stack([np.einsum('bm,bm->b', datos[a], datos[c]) for a, c in zip(i, k)])
+    with np.errstate(divide='ignore', invalid='ignore'):
+        r = covarianza / np.sqrt(varianza[i].T * varianza[k].T)
+    return np.clip(r, -1.0, 1.0)
+
+
+def _estadisticos(columnas, indices):
+    """Todos los estadísticos de las remuestras dadas por `indices`
+    (remuestras x filas): las medidas de cada variable en el orden de
+    MEDIDAS_RESUMEN y luego Pearson y Spearman de cada par (i < j)."""
+    b, m = indices.shape
+    p = len(columnas)
+    medidas = np.empty((b, p, len(MEDIDAS_RESUMEN)))
+    # Una matriz contigua (remuestras x filas) por variable
+    datos = np.empty((p, b, m))
+    rangos = np.empty((p, b, m))
+    for j, columna in enumerate(columnas):
+        muestra = columna['valores'][indices]
+        if columna['distintos'] is not None:
+            medidas[:, j], rangos[j] = _medidas_conteos(muestra, columna['minimo'], columna['distintos'])
+        else:
+            medidas[:, j], rangos[j] = _medidas_ordenadas(muestra)
+        datos[j] = muestra
+
+    return np.concatenate([medidas.reshape(b, -1), _correlaciones(datos), _correlaciones(rangos)], axis=1)
+
+
+def _bloque_remuestras(columnas, semilla, numero, remuestras):
+    """Estadísticos de un bloque de remuestras; cada bloque tiene su propia
+    secuencia aleatoria, derivada de la semilla y del número de bloque."""
+    n = len(columnas[0]['valores'])
+    generador = np.random.default_rng([semilla, numero])
+    return _estadisticos(columnas, generador.integers(0, n, size=(remuestras, n)))
+
+
+def _iniciar_trabajador(columnas):
+    # Con 'fork' las columnas se heredan del proceso principal sin copiarlas
+    global _COLUMNAS_TRABAJADOR
+    _COLUMNAS_TRABAJADOR = columnas
+
+
+def _bloque_trabajador(tarea):
+    return _bloque_remuestras(_COLUMNAS_TRABAJADOR, *tarea)
+
+
+def _jackknife(columnas, semilla, grupos=GRUPOS_JACKKNIFE):
+    """Estadísticos de las muestras jackknife: cada una quita uno de
+    `grupos` grupos de d filas (d = 1 si hay hasta `grupos` filas)."""
+    n = len(columnas[0]['valores'])
+    grupos = min(n, grupos)
+    d = n // grupos
+    # Los grupos se arman sobre una permutación fija, por si el archivo está ordenado
+    permutacion = np.random.default_rng(semilla).permutation(n)
+    base = np.arange(n - d)
+    inicio = d * np.arange(grupos)[:, None]
+    posiciones = np.where(base >= inicio, base + d, base)
+    filas_por_bloque = max(1, VALORES_POR_BLOQUE // max(n, 1))
+    return np.concatenate([
+        _estadisticos(columnas, permutacion[posiciones[g:g + filas_por_bloque]])
+        for g in range(0, grupos, filas_por_bloque)
+    ])
+
+
+# =============================================================================
+# INTERVALOS
+# =============================================================================
+
+def _intervalos(remuestreo, estimacion, jackknife, metodo, nivel_confianza):
+    """Límites inferior y superior de cada estadístico (columnas de
+    `remuestreo`); se ignoran las remuestras en que el estadístico no
+    está definido (por ejemplo, una correlación con una columna constante)."""
+    from scipy import stats
+
+    alfa = (1 - nivel_confianza) / 2
+    ordenados = np.sort(remuestreo, axis=0)
+    validas = (~np.isnan(remuestreo)).sum(axis=0)
+    q_inferior = np.full(remuestreo.shape[1], alfa)
+    q_superior = np.full(remuestreo.shape[1], 1 - alfa)
+
+    if metodo == 'bca':
+        # Sesgo: proporción de remuestras por debajo de la estimación (los
+        # empates cuentan la mitad, frecuentes en medidas de datos enteros)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            proporcion = ((remuestreo < estimacion).sum(axis=0)
+                          + 0.5 * (remuestreo == estimacion).sum(axis=0)) / validas
+            proporcion = np.clip(proporcion, 0.5 / validas, 1 - 0.5 / validas)
+            z0 = stats.norm.ppf(proporcion)
+
+            # Aceleración a partir de la asimetría del jackknife
+            desvios = np.nanmean(jackknife, axis=0) - jackknife
+            suma_cuadrados = np.nansum(desvios ** 2, axis=0)
+            aceleracion = np.where(suma_cuadrados > 0,
+                                   np.nansum(desvios ** 3, axis=0) / (6 * suma_cuadrados ** 1.5), 0.0)
+            for q in (q_inferior, q_superior):
+                z = z0 + stats.norm.ppf(q)
+                q[:] = stats.norm.cdf(z0 + z / (1 - aceleracion * z))
+
+    inferior = _cuantiles_ordenados(ordenados, validas, np.nan_to_num(q_inferior, nan=alfa))
+    superior = _cuantiles_ordenados(ordenados, validas, np.nan_to_num(q_superior, nan=1 - alfa))
+    sin_intervalo = np.isnan(estimacion) | (validas == 0)
+    return np.where(sin_intervalo, np.nan, inferior), np.where(sin_intervalo, np.nan, superior)
+
+
+# =============================================================================
+# BOOTSTRAP COMPLETO
+# =============================================================================
+
+def calcular_bootstrap(df, variables, remuestras=REMUESTRAS_BOOTSTRAP, metodo='bca',
+                       nivel_confianza=NIVEL_CONFIANZA, semilla=SEMILLA_BOOTSTRAP, procesos=1,
+                       valores_por_bloque=VALORES_POR_BLOQUE):
+    """Intervalos bootstrap de las medidas de `resumen_completo` y de las
+    correlaciones de Pearson y Spearman de `variables`.
+
+    - metodo: 'percentil' o 'bca'
+    - procesos: procesos entre los que se reparten los bloques de remuestras
+      (None = uno por núcleo; 1 = todo en este proceso)
+    - valores_por_bloque: tamaño de cada bloque (remuestras x filas)"""
+    if metodo not in METODOS_INTERVALO:
+        raise ValueError(f"Método de intervalo desconocido: '{metodo}' (use {', '.join(METODOS_INTERVALO)})")
+    variables = list(variables)
+    columnas = _preparar_columnas(df, variables)
+    n = len(columnas[0]['valores']) if columnas else 0
+    if n < 2:
+        raise ValueError("El bootstrap requiere al menos 2 filas sin nulos")
+
+    estimacion = _estadisticos(columnas, np.arange(n)[None, :])[0]
+
+    por_bloque = max(1, valores_por_bloque // n)
+    tareas = [(semilla, numero, min(por_bloque, remuestras - inicio))
+              for numero, inicio in enumerate(range(0, remuestras, por_bloque))]
+    procesos = min(procesos or os.cpu_count() or 1, len(tareas))
+    if procesos == 1:
+        bloques = [_bloque_remuestras(columnas, *tarea) for tarea in tareas]
+    else:
+        from paralelo import _contexto_procesos
+
+        with ProcessPoolExecutor(max_workers=procesos, mp_context=_contexto_procesos(),
+                                 initializer=_iniciar_trabajador, initargs=(columnas,)) as ejecutor:
+            bloques = list(ejecutor.map(_bloque_trabajador, tareas))
+    remuestreo = np.concatenate(bloques)
+
+    jackknife = _jackknife(columnas, semilla) if metodo == 'bca' else None
+    inferior, superior = _intervalos(remuestreo, estimacion, jackknife, metodo, nivel_confianza)
+    with np.errstate(invalid='ignore'):
+        error_estandar = np.nanstd(remuestreo, axis=0, ddof=1) if remuestras > 1 else np.full(len(estimacion), np.nan)
+
+    p = len(variables)
+    i, k = np.triu_indices(p, k=1)
+    pares = len(i)
+    intervalos = pd.DataFrame({
+        'Estadistico': list(np.tile(MEDIDAS_RESUMEN, p)) + ['pearson'] * pares + ['spearman'] * pares,
+        'Variable_1': list(np.repeat(variables, len(MEDIDAS_RESUMEN))) + [variables[x] for x in i] * 2,
+        'Variable_2': [''] * (p * len(MEDIDAS_RESUMEN)) + [variables[y] for y in k] * 2,
+        'Valor': estimacion,
+        'Error_Estandar': error_estandar,
+        'IC_inferior': inferior,
+        'IC_superior': superior
+    }, columns=COLUMNAS_INTERVALOS)
+
+    return ResultadoBootstrap(
+        variables=variables,
+        remuestras=remuestras,
+        metodo=metodo,
+        nivel_confianza=nivel_confianza,
+        n=n,
+        intervalos=intervalos
+    )
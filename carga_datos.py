@@ -0,0 +1,282 @@
+"""
+CARGA DE DATOS CON CACHÉ COLUMNAR
+=========================================================
+
+`pd.read_csv` interpreta el texto completo en cada ejecución del script y
+en cada arranque de la app de Streamlit. La primera lectura guarda una
+copia tipada del CSV en formato Feather (Arrow, sin compresión) dentro de
+`.cache_columnar/`; las siguientes lecturas abren esa copia con memoria
+mapeada y leen solo las columnas pedidas, sin volver a interpretar texto.
+
+La caché se invalida cuando cambian la fecha de modificación o el tamaño
+del CSV (y, opcionalmente, su huella SHA-256). Requiere `pyarrow`; si no
+está instalado se lee el CSV directamente.
+
+Los CSV subidos a la app se convierten con `convertir_a_columnar`: el
+texto se lee por bloques, cada bloque se valida con el esquema y se agrega
+al archivo columnar en disco, sin tener nunca el texto completo y un
+DataFrame a la vez. `abrir_columnar` lo abre con memoria mapeada.
+"""
+
+import hashlib
+import os
+
+import numpy as np
+import pandas as pd
+
+from esquema import ESQUEMA_ESTUDIANTES, VARIABLES_NUMERICAS, aplicar_esquema
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+except ImportError:  # pragma: no cover - pyarrow es opcional
+    pa = None
+
+# Columnas que usa el análisis (PASOS 4 a 11): la app y el script cargan solo
+# estas y las que no están en el esquema (ver `columnas_analisis`);
+# 'Estudiante' se copia del CSV al exportar los datos originales
+COLUMNAS_ANALISIS = VARIABLES_NUMERICAS + ['Nivel_Socioeconomico', 'Aprobado']
+ESQUEMA_ANALISIS = {columna: ESQUEMA_ESTUDIANTES[columna] for columna in COLUMNAS_ANALISIS}
+
+DIRECTORIO_CACHE = '.cache_columnar'
+
+# Archivos subidos a la app, ya convertidos, cuántos se conservan en disco y
+# filas por bloque al convertir
+DIRECTORIO_SUBIDAS = 'subidas'
+MAXIMO_SUBIDAS = 4
+FILAS_POR_BLOQUE_CONVERSION = 200_000
+
+_CLAVE_HUELLA = b'huella_csv'
+
+
+def huella_archivo(ruta_archivo, verificar_contenido=False):
+    """Huella del CSV que cambia cuando se modifica el archivo: tamaño y fecha
+    de modificación o, con `verificar_contenido=True`, tamaño y SHA-256.
+    Sirve también como clave de las cachés de resultados de la app."""
+    info = os.stat(ruta_archivo)
+    if not verificar_contenido:
+        return f"{info.st_size}:{info.st_mtime_ns}"
+    with open(ruta_archivo, 'rb') as archivo:
+        return huella_contenido(archivo)
+
+
+def huella_contenido(archivo):
+    """Tamaño y SHA-256 de un archivo binario abierto (por ejemplo, una
+    subida), leído por bloques desde el inicio; deja la posición al inicio."""
+    sha = hashlib.sha256()
+    tamano = 0
+    archivo.seek(0)
+    for datos in iter(lambda: archivo.read(1 << 20), b''):
+        sha.update(datos)
+        tamano += len(datos)
+    archivo.seek(0)
+    return f"{tamano}:{sha.hexdigest()}"
+
+
+def ruta_cache(ruta_archivo, directorio_cache=None, extension='feather'):
+    """Ruta del archivo Feather (o con otra `extension`) que corresponde a un CSV."""
+    ruta_absoluta = os.path.abspath(ruta_archivo)
+    directorio = directorio_cache or os.path.join(os.path.dirname(ruta_absoluta), DIRECTORIO_CACHE)
+    sufijo = hashlib.sha1(ruta_absoluta.encode()).hexdigest()[:10]
+    nombre = os.path.splitext(os.path.basename(ruta_absoluta))[0]
+    return os.path.join(directorio, f"{nombre}.{sufijo}.{extension}")
+
+
+def _leer_cache(ruta, huella, columnas):
+    if not os.path.exists(ruta):
+        return None
+    try:
+        with pa.memory_map(ruta) as archivo:
+            esquema = pa.ipc.open_file(archivo).schema
+        if (esquema.metadata or {}).get(_CLAVE_HUELLA) != huella:
+            return None
+        return feather.read_table(ruta, columns=columnas, memory_map=True).to_pandas()
+    except (OSError, pa.ArrowException):
+        return None
+
+
+def _escribir_cache(df, ruta, huella):
+    os.makedirs(os.path.dirname(ruta), exist_ok=True)
+    tabla = pa.Table.from_pandas(df, preserve_index=False)
+    tabla = tabla.replace_schema_metadata({**(tabla.schema.metadata or {}), _CLAVE_HUELLA: huella})
+    temporal = f"{ruta}.tmp"
+    # Sin compresión para que las columnas numéricas se lean sin copiar
+    feather.write_feather(tabla, temporal, compression='uncompressed')
+    os.replace(temporal, ruta)
+
+
+def columnas_analisis(ruta_archivo):
+    """COLUMNAS_ANALISIS más las columnas del CSV que no están en el esquema
+    (por ejemplo campos extra de una encuesta), que pueden entrar en el
+    cribado de asociación (asociacion.py). Solo lee el encabezado."""
+    encabezado = pd.read_csv(ruta_archivo, nrows=0).columns
+    return COLUMNAS_ANALISIS + [columna for columna in encabezado if columna not in ESQUEMA_ESTUDIANTES]
+
+
+def cargar_csv(ruta_archivo, columnas=None, usar_cache=True, verificar_contenido=False,
+               directorio_cache=None):
+    """Carga el CSV (o solo `columnas`) usando la caché columnar.
+
+    Con `verificar_contenido=True` la caché también se invalida si cambia el
+    contenido aunque se conserven la fecha y el tamaño (lee el archivo para
+    calcular su SHA-256, lo que sigue siendo mucho más rápido que interpretarlo)."""
+    if not usar_cache or pa is None:
+        return pd.read_csv(ruta_archivo, usecols=columnas)
+
+    huella = huella_archivo(ruta_archivo, verificar_contenido).encode()
+    ruta = ruta_cache(ruta_archivo, directorio_cache)
+    df = _leer_cache(ruta, huella, columnas)
+    if df is not None:
+        return df
+
+    df = pd.read_csv(ruta_archivo)
+    try:
+        _escribir_cache(df, ruta, huella)
+    except OSError:
+        # Sin permisos de escritura: se sigue sin caché
+        pass
+    return df if columnas is None else df[list(columnas)]
+
+
+# =============================================================================
+# CONVERSIÓN POR BLOQUES (ARCHIVOS SUBIDOS)
+# =============================================================================
+
+def ruta_subida(huella, directorio_cache=DIRECTORIO_CACHE):
+    """Ruta del archivo columnar de un CSV subido, según la huella de su
+    contenido (`huella_contenido`): volver a subir el mismo archivo reutiliza
+    la conversión."""
+    nombre = hashlib.sha1(str(huella).encode()).hexdigest()[:16]
+    return os.path.join(directorio_cache, DIRECTORIO_SUBIDAS, f"{nombre}.feather")
+
+
+def limpiar_subidas(conservar=MAXIMO_SUBIDAS, directorio_cache=DIRECTORIO_CACHE, excluir=()):
+    """Borra los archivos convertidos de subidas salvo los `conservar` usados
+    más recientemente (por fecha de modificación) y los de `excluir`.
+    Devuelve las rutas borradas."""
+    directorio = os.path.join(directorio_cache, DIRECTORIO_SUBIDAS)
+    try:
+        nombres = os.listdir(directorio)
+    except FileNotFoundError:
+        return []
+    excluir = {os.path.abspath(ruta) for ruta in excluir}
+    rutas = []
+    for nombre in nombres:
+        if not nombre.endswith('.feather'):
+            continue  # Conversiones en curso (.tmp)
+        ruta = os.path.join(directorio, nombre)
+        try:
+            rutas.append((os.stat(ruta).st_mtime, ruta))
+        except OSError:
+            continue
+    borradas = []
+    for _, ruta in sorted(rutas, reverse=True)[conservar:]:
+        if os.path.abspath(ruta) in excluir:
+            continue
+        try:
+            os.remove(ruta)
+            borradas.append(ruta)
+        except OSError:
+            # En uso (Windows) o ya borrado por otro proceso: queda para la próxima limpieza
+            pass
+    return borradas
+
+
+def _lote_arrow(bloque, esquema_arrow=None):
+    # Los números quedan en float64 con NaN (sin máscara de nulos) para que
+    # se lean sin copiar; el texto siempre como large_string
+    arreglos = []
+    for i, columna in enumerate(bloque.columns):
+        serie = bloque[columna]
+        if esquema_arrow is not None:
+            tipo = esquema_arrow.field(i).type
+        elif pd.api.types.is_float_dtype(serie.dtype):
+            tipo = pa.float64()
+        elif isinstance(serie.dtype, pd.CategoricalDtype) or pd.api.types.is_bool_dtype(serie.dtype):
+            tipo = None
+        else:
+            tipo = pa.large_string()
+        if tipo == pa.float64():
+            arreglos.append(pa.array(serie.to_numpy(dtype=np.float64), type=tipo, from_pandas=False))
+        elif tipo == pa.large_string():
+            arreglos.append(pa.array(serie.astype(object).where(serie.notna(), None), type=tipo))
+        else:
+            arreglos.append(pa.array(serie, type=tipo, from_pandas=True))
+    if esquema_arrow is None:
+        return pa.RecordBatch.from_arrays(arreglos, names=[str(c) for c in bloque.columns])
+    return pa.RecordBatch.from_arrays(arreglos, schema=esquema_arrow)
+
+
+def convertir_a_columnar(origen, ruta_destino, esquema=ESQUEMA_ESTUDIANTES,
+                         filas_por_bloque=FILAS_POR_BLOQUE_CONVERSION, progreso=None, tamano_total=None):
+    """Convierte un CSV (ruta o archivo binario abierto, como el de una
+    subida) en un archivo columnar Feather en `ruta_destino`, bloque a
+    bloque. Cada bloque se valida y se convierte con `esquema` (números
+    en float64, categorías y booleanos); las columnas fuera del esquema se
+    guardan como números si lo son en el primer bloque o como texto.
+
+    `progreso(bytes_leidos, bytes_totales)` se llama después de cada bloque.
+    Lanza ValueError (con las filas del bloque) si algún valor no cumple el
+    esquema; en ese caso no queda ningún archivo. Devuelve el número de filas."""
+    if pa is None:
+        raise ImportError("La conversión a formato columnar requiere pyarrow: pip install pyarrow")
+    archivo = open(origen, 'rb') if isinstance(origen, (str, os.PathLike)) else origen
+    if tamano_total is None and archivo.seekable():
+        posicion = archivo.tell()
+        tamano_total = archivo.seek(0, os.SEEK_END) - posicion
+        archivo.seek(posicion)
+
+    os.makedirs(os.path.dirname(os.path.abspath(ruta_destino)), exist_ok=True)
+    temporal = f"{ruta_destino}.tmp"
+    escritor = esquema_arrow = None
+    filas = 0
+    try:
+        for bloque in pd.read_csv(archivo, chunksize=filas_por_bloque):
+            try:
+                bloque = aplicar_esquema(bloque, esquema, compactar=False)
+            except ValueError as error:
+                if len(bloque):
+                    error = f"Filas {filas + 1} a {filas + len(bloque)}: {error}"
+                raise ValueError(str(error)) from None
+            if escritor is None:
+                numericas = [c for c in bloque.columns if c not in esquema
+                             and pd.api.types.is_numeric_dtype(bloque[c].dtype)]
+                bloque = bloque.astype({c: np.float64 for c in numericas})
+                lote = _lote_arrow(bloque)
+                esquema_arrow = lote.schema
+                escritor = pa.ipc.new_file(temporal, esquema_arrow)
+            else:
+                try:
+                    lote = _lote_arrow(bloque, esquema_arrow)
+                except (pa.ArrowException, ValueError, TypeError) as error:
+                    raise ValueError(f"Filas {filas + 1} a {filas + len(bloque)}: tipos distintos a los "
+                                     f"de las primeras filas ({error})") from None
+            escritor.write_batch(lote)
+            filas += len(bloque)
+            if progreso is not None and tamano_total:
+                progreso(archivo.tell(), tamano_total)
+        if filas == 0:
+            raise ValueError("El archivo no tiene filas de datos")
+        escritor.close()
+        escritor = None
+        os.replace(temporal, ruta_destino)
+    finally:
+        if escritor is not None:
+            escritor.close()
+        if os.path.exists(temporal):
+            os.remove(temporal)
+        if archivo is not origen:
+            archivo.close()
+    return filas
+
+
+def abrir_columnar(ruta, columnas=None):
+    """DataFrame de un archivo columnar abierto con memoria mapeada: las
+    columnas numéricas sin nulos se leen sin copiar (las páginas se cargan
+    del disco a medida que se usan). Los booleanos con nulos quedan como
+    booleano nullable, igual que con `aplicar_esquema` (Arrow los devuelve
+    como object)."""
+    tabla = feather.read_table(ruta, columns=columnas, memory_map=True)
+    nullables = {campo.name: pd.BooleanDtype() for campo, columna in zip(tabla.schema, tabla.columns)
+                 if pa.types.is_boolean(campo.type) and columna.null_count}
+    return tabla.to_pandas(split_blocks=True, self_destruct=True).astype(nullables)
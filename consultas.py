@@ -0,0 +1,495 @@
+"""
+MOTOR DE CONSULTAS COLUMNAR (DuckDB)
+=========================================================
+
+Motor alternativo para los PASOS 4 a 9 y 11: en lugar de cargar el CSV
+completo en un DataFrame, cada resultado sale de una consulta de
+agregación que DuckDB ejecuta directamente sobre el CSV (o sobre su copia
+Parquet en `.cache_columnar/`), leyendo solo las columnas necesarias, con
+varios hilos y volcando a disco (`temp_directory`) lo que no cabe en
+`limite_memoria`.
+
+- Conteos, nulos, media, varianza, mínimo, máximo y cuartiles exactos
+  (`quantile_cont`, interpolación lineal como pandas) en una sola consulta
+- Moda: conteo por valor; ante empates, el menor (como `Series.mode`)
+- Pearson por pares con `corr` y `regr_count` (nulos excluidos por par)
+- Spearman: rango promedio de cada valor distinto (frecuencias acumuladas)
+  unido a las filas; las columnas con nulos se vuelven a contar solo con
+  las filas completas de cada par
+- Tabla de contingencia y cribado de asociación: las combinaciones
+  distintas de las columnas categóricas se cuentan en DuckDB y solo esas
+  filas (con su frecuencia) pasan a `calcular_asociaciones`
+
+El motor de pandas (`estadisticas.py`, `correlaciones.py`) sigue siendo la
+referencia: `comparar_motores` ejecuta ambos y compara cada resultado.
+
+    python consultas.py estudiantes_datos.csv
+    python consultas.py --filas 1e6 --tolerancia 1e-9
+
+Requiere `duckdb` (opcional: `pip install duckdb`).
+"""
+
+import argparse
+import importlib.util
+import os
+import sys
+import time
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from asociacion import AsociacionCategoricas, calcular_asociaciones, es_texto_categorico
+from carga_datos import huella_archivo, ruta_cache
+from correlaciones import NIVEL_CONFIANZA, resultado_correlacion
+from esquema import ESQUEMA_ESTUDIANTES, ETIQUETAS_BOOLEANAS, VARIABLES_NUMERICAS, aplicar_esquema
+from estadisticas import ResumenDescriptivo
+
+# Motores de cálculo disponibles; 'pandas' es la referencia
+MOTORES = ['pandas', 'duckdb']
+
+# Memoria que DuckDB usa antes de volcar a disco y carpeta de volcado
+LIMITE_MEMORIA = '2GB'
+DIRECTORIO_TEMPORAL = '.duckdb_temporal'
+
+# Filas iniciales que se conservan para mostrar (PASO 2)
+FILAS_MUESTRA = 10
+
+# Diferencia relativa máxima aceptada entre los dos motores
+TOLERANCIA_PARIDAD = 1e-9
+
+_CLAVE_HUELLA = 'huella_csv'
+
+
+def motor_disponible(motor):
+    """True si el motor se puede usar en este entorno (sin importarlo)."""
+    return motor == 'pandas' or importlib.util.find_spec(motor) is not None
+
+
+def _identificador(nombre):
+    return '"' + str(nombre).replace('"', '""') + '"'
+
+
+def _literal(texto):
+    return "'" + str(texto).replace("'", "''") + "'"
+
+
+def _lista(rutas):
+    return '[' + ', '.join(_literal(ruta) for ruta in rutas) + ']'
+
+
+# =============================================================================
+# CONEXIÓN Y FUENTE DE DATOS
+# =============================================================================
+
+def conectar(hilos=None, limite_memoria=LIMITE_MEMORIA, directorio_temporal=DIRECTORIO_TEMPORAL):
+    """Conexión de DuckDB en memoria con `hilos` (None = uno por núcleo),
+    límite de memoria y carpeta para volcar a disco."""
+    try:
+        import duckdb
+    except ImportError:
+        raise ImportError("El motor 'duckdb' requiere el paquete duckdb: pip install duckdb") from None
+    configuracion = {
+        'memory_limit': limite_memoria,
+        'temp_directory': directorio_temporal,
+        # Sin orden de inserción las agregaciones pueden volcar a disco
+        'preserve_insertion_order': False
+    }
+    if hilos:
+        configuracion['threads'] = int(hilos)
+    return duckdb.connect(config=configuracion)
+
+
+def cache_parquet(conexion, ruta_archivo, directorio_cache=None):
+    """Ruta de la copia Parquet del CSV en la caché columnar; se crea (sin
+    pasar por pandas) si no existe o si el CSV cambió desde que se creó."""
+    ruta = ruta_cache(ruta_archivo, directorio_cache, extension='parquet')
+    huella = huella_archivo(ruta_archivo)
+    if os.path.exists(ruta):
+        try:
+            guardada = conexion.execute(
+                f"SELECT value FROM parquet_kv_metadata({_literal(ruta)}) WHERE key = {_literal(_CLAVE_HUELLA)}"
+            ).fetchone()
+        except Exception:  # Archivo dañado: se vuelve a crear
+            guardada = None
+        if guardada is not None and bytes(guardada[0]).decode() == huella:
+            return ruta
+
+    os.makedirs(os.path.dirname(ruta), exist_ok=True)
+    temporal = f"{ruta}.tmp"
+    conexion.execute(
+        f"COPY (SELECT * FROM read_csv({_literal(ruta_archivo)}, header = true)) TO {_literal(temporal)} "
+        f"(FORMAT parquet, KV_METADATA {{{_CLAVE_HUELLA}: {_literal(huella)}}})"
+    )
+    os.replace(temporal, ruta)
+    return ruta
+
+
+def registrar_fuente(conexion, rutas, usar_cache=True, directorio_cache=None):
+    """Crea la vista `datos` sobre uno o varios CSV (o sus copias Parquet)."""
+    rutas = [rutas] if isinstance(rutas, str) else list(rutas)
+    if usar_cache:
+        try:
+            parquets = [cache_parquet(conexion, ruta, directorio_cache) for ruta in rutas]
+            conexion.execute(f"CREATE OR REPLACE VIEW datos AS SELECT * FROM read_parquet({_lista(parquets)})")
+            return
+        except OSError:
+            # Sin permisos de escritura: se consulta el CSV directamente
+            pass
+    conexion.execute(f"CREATE OR REPLACE VIEW datos AS SELECT * FROM read_csv({_lista(rutas)}, header = true)")
+
+
+# =============================================================================
+# RESULTADO
+# =============================================================================
+
+@dataclass
+class ConsultaAnalisis:
+    """Resultados de los PASOS 3 a 9 calculados con DuckDB. Expone la misma
+    interfaz que `EstadoAnalisis` (modo streaming): `muestra`,
+    `n_registros`, `nulos`, `resumen()`, `correlaciones()` y
+    `tabla_contingencia()`, más el cribado de asociación."""
+
+    variables: list
+    n_registros: int
+    nulos: pd.Series
+    muestra: pd.DataFrame
+    resumen_estadistico: ResumenDescriptivo
+    r_pearson: np.ndarray
+    n_pearson: np.ndarray
+    r_spearman: np.ndarray
+    n_spearman: np.ndarray
+    contingencia: pd.DataFrame
+    asociaciones: AsociacionCategoricas = None
+
+    def resumen(self):
+        """Medidas de `resumen_completo` (PASOS 4, 5, 6 y 11); los cuantiles
+        siempre son exactos."""
+        return self.resumen_estadistico
+
+    def correlaciones(self, nivel_confianza=NIVEL_CONFIANZA):
+        """Igual que `calcular_correlaciones` (PASOS 7 y 8)."""
+        return {
+            'pearson': resultado_correlacion('pearson', self.variables, self.r_pearson, self.n_pearson,
+                                             nivel_confianza),
+            'spearman': resultado_correlacion('spearman', self.variables, self.r_spearman, self.n_spearman,
+                                              nivel_confianza)
+        }
+
+    def spearman_aproximado(self):
+        """Pares con Rho de Spearman aproximado: ninguno, DuckDB calcula los
+        rangos exactos."""
+        return []
+
+    def tabla_contingencia(self):
+        """Igual que `pd.crosstab` del par de variables categóricas (PASO 9)."""
+        return self.contingencia
+
+
+# =============================================================================
+# CONSULTAS
+# =============================================================================
+
+def _resumen(conexion, variables):
+    columnas = []
+    for variable in variables:
+        v = f"{_identificador(variable)}::DOUBLE"
+        columnas += [f"count({v})", f"avg({v})", f"var_samp({v})", f"min({v})", f"max({v})",
+                     f"quantile_cont({v}, [0.25, 0.5, 0.75])"]
+    fila = conexion.execute(f"SELECT {', '.join(columnas)} FROM datos").fetchone()
+    n, media, varianza, minimo, maximo, cuartiles = (list(fila[k::6]) for k in range(6))
+    cuartiles = np.array([c if c is not None else [np.nan] * 3 for c in cuartiles], dtype=np.float64)
+
+    # Moda: el valor más frecuente de cada variable y, ante empates, el menor
+    modas = dict(conexion.execute(" UNION ALL ".join(
+        f"SELECT {_literal(variable)}, valor FROM (SELECT {_identificador(variable)}::DOUBLE AS valor, "
+        f"count(*) AS n FROM datos WHERE {_identificador(variable)} IS NOT NULL GROUP BY ALL "
+        f"ORDER BY n DESC, valor LIMIT 1)"
+        for variable in variables
+    )).fetchall())
+
+    def arreglo(valores):
+        return np.array([np.nan if valor is None else valor for valor in valores], dtype=np.float64)
+
+    n = np.array(n, dtype=np.int64)
+    return ResumenDescriptivo(
+        variables=list(variables),
+        n=n,
+        media=arreglo(media),
+        mediana=cuartiles[:, 1],
+        moda=np.array([modas.get(variable, np.nan) for variable in variables], dtype=np.float64),
+        minimo=arreglo(minimo),
+        maximo=arreglo(maximo),
+        q1=cuartiles[:, 0],
+        q3=cuartiles[:, 2],
+        varianza=np.where(n > 1, arreglo(varianza), np.nan)
+    )
+
+
+def _matriz_pares(conexion, variables, consulta, filtro=''):
+    """Matrices (r, n) de `corr` y `regr_count` de todos los pares de columnas
+    de `consulta`; la diagonal vale 1 (si hay más de un dato) y su conteo."""
+    k = len(variables)
+    columnas = [f"c{i}" for i in range(k)]
+    pares = [(i, j) for i in range(k) for j in range(i + 1, k)]
+    expresiones = [f"count({c})" for c in columnas]
+    expresiones += [f"corr({columnas[i]}, {columnas[j]}), regr_count({columnas[i]}, {columnas[j]})" for i, j in pares]
+    fila = conexion.execute(f"SELECT {', '.join(expresiones)} FROM ({consulta}) {filtro}").fetchone()
+
+    n = np.diag(np.array(fila[:k], dtype=np.float64))
+    r = np.where(np.diag(n) > 1, 1.0, np.nan) * np.eye(k)
+    for p, (i, j) in enumerate(pares):
+        valor, conteo = fila[k + 2 * p], fila[k + 2 * p + 1]
+        r[i, j] = r[j, i] = np.nan if valor is None or conteo < 2 else np.clip(valor, -1.0, 1.0)
+        n[i, j] = n[j, i] = conteo
+    return r, n
+
+
+def _rangos(columnas, filtro=''):
+    # Rango promedio de cada valor (como rank(method='average')): se cuentan
+    # los valores distintos, se acumulan sus frecuencias y el rango se une a
+    # cada fila, sin ordenar todas las filas con una función de ventana
+    tablas = ", ".join(
+        f"r{i} AS (SELECT valor, sum(n) OVER (ORDER BY valor) - (n - 1) / 2 AS rango "
+        f"FROM (SELECT {c} AS valor, count(*) AS n FROM datos {filtro} GROUP BY ALL))"
+        for i, c in enumerate(columnas)
+    )
+    uniones = " ".join(f"JOIN r{i} ON {c} = r{i}.valor" for i, c in enumerate(columnas))
+    rangos = ", ".join(f"r{i}.rango AS c{i}" for i in range(len(columnas)))
+    return f"WITH {tablas} SELECT {rangos} FROM datos {uniones} {filtro}"
+
+
+def _correlaciones(conexion, variables, nulos):
+    identificadores = [f"{_identificador(v)}::DOUBLE" for v in variables]
+    r_pearson, n_pearson = _matriz_pares(conexion, variables, "SELECT " + ", ".join(
+        f"{c} AS c{i}" for i, c in enumerate(identificadores)) + " FROM datos")
+
+    # Spearman: sin nulos, todas las columnas se ordenan una vez; los pares
+    # con alguna columna incompleta se ordenan con sus propias filas completas
+    r_spearman, n_spearman = r_pearson * np.nan, n_pearson.copy()
+    completas = [i for i, variable in enumerate(variables) if nulos[variable] == 0]
+    if completas:
+        r, _ = _matriz_pares(conexion, [variables[i] for i in completas],
+                             _rangos([identificadores[i] for i in completas]))
+        r_spearman[np.ix_(completas, completas)] = r
+    for i in range(len(variables)):
+        for j in range(i + 1, len(variables)):
+            if i in completas and j in completas:
+                continue
+            par = [identificadores[i], identificadores[j]]
+            filtro = f"WHERE {par[0]} IS NOT NULL AND {par[1]} IS NOT NULL"
+            r, _ = _matriz_pares(conexion, [variables[i], variables[j]], _rangos(par, filtro))
+            r_spearman[i, j] = r_spearman[j, i] = r[0, 1]
+        r_spearman[i, i] = np.where(n_spearman[i, i] > 1, 1.0, np.nan)
+    return r_pearson, n_pearson, r_spearman, n_spearman
+
+
+def _combinaciones(conexion, columnas, esquema):
+    """Combinaciones distintas de `columnas` con su frecuencia y los tipos
+    del esquema (categorías ordenadas, booleanos)."""
+    seleccion = ", ".join(_identificador(c) for c in columnas)
+    conteos = conexion.execute(f"SELECT {seleccion}, count(*) AS frecuencia FROM datos GROUP BY ALL").df()
+    tipos = {c: esquema[c] for c in columnas if c in esquema}
+    return aplicar_esquema(conteos, tipos), conteos['frecuencia'].to_numpy(dtype=np.int64)
+
+
+def _texto_categorico(conexion, columnas):
+    """Columnas de texto de `columnas` con pocos valores distintos, con la
+    misma regla que `asociacion.columnas_categoricas`."""
+    if not columnas:
+        return []
+    conteos = conexion.execute(
+        "SELECT " + ", ".join(f"count(DISTINCT {_identificador(c)}), count({_identificador(c)})" for c in columnas)
+        + " FROM datos"
+    ).fetchone()
+    return [c for i, c in enumerate(columnas) if es_texto_categorico(conteos[2 * i], conteos[2 * i + 1])]
+
+
+def _contingencia(conexion, par_contingencia, esquema):
+    a, b = par_contingencia
+    combinaciones, frecuencias = _combinaciones(conexion, [a, b], esquema)
+    completas = (combinaciones[a].notna() & combinaciones[b].notna()).to_numpy()
+    combinaciones, frecuencias = combinaciones[completas], frecuencias[completas]
+    # Mismas filas, columnas y orden que pd.crosstab sobre los datos completos
+    tabla = pd.crosstab(combinaciones[a], combinaciones[b], values=frecuencias, aggfunc='sum')
+    tabla = tabla.fillna(0).astype(np.int64)
+    return tabla.loc[tabla.sum(axis=1) > 0, tabla.sum(axis=0) > 0].rename(columns=ETIQUETAS_BOOLEANAS)
+
+
+def analizar_con_duckdb(rutas, variables, par_contingencia=('Nivel_Socioeconomico', 'Aprobado'),
+                        usar_cache=True, hilos=None, limite_memoria=LIMITE_MEMORIA,
+                        directorio_temporal=DIRECTORIO_TEMPORAL, esquema=ESQUEMA_ESTUDIANTES):
+    """Ejecuta las consultas de los PASOS 3 a 9 sobre uno o varios CSV y
+    devuelve un ConsultaAnalisis. Con `usar_cache` se consulta la copia
+    Parquet de cada CSV (que se crea en la primera ejecución)."""
+    variables = list(variables)
+    conexion = conectar(hilos, limite_memoria, directorio_temporal)
+    try:
+        registrar_fuente(conexion, rutas, usar_cache)
+        descripcion = conexion.execute("DESCRIBE datos").fetchall()
+        columnas = [fila[0] for fila in descripcion]
+        faltantes = [c for c in [*variables, *par_contingencia] if c not in columnas]
+        if faltantes:
+            raise ValueError(f"Faltan columnas en los datos: {faltantes}")
+
+        conteos = conexion.execute(
+            "SELECT count(*), " + ", ".join(f"count({_identificador(c)})" for c in columnas) + " FROM datos"
+        ).fetchone()
+        n_registros = int(conteos[0])
+        nulos = pd.Series([n_registros - c for c in conteos[1:]], index=columnas, dtype=np.int64)
+        muestra = conexion.execute(f"SELECT * FROM datos LIMIT {FILAS_MUESTRA}").df()
+
+        resumen = _resumen(conexion, variables)
+        r_pearson, n_pearson, r_spearman, n_spearman = _correlaciones(conexion, variables, nulos)
+        contingencia = _contingencia(conexion, par_contingencia, esquema)
+
+        # Cribado de las columnas categóricas o booleanas del esquema y de las
+        # de texto fuera del esquema con pocos valores distintos (asociacion.py)
+        texto = _texto_categorico(conexion, [nombre for nombre, tipo, *_ in descripcion
+                                             if nombre not in esquema and tipo == 'VARCHAR'])
+        categoricas = [c for c in columnas if isinstance(esquema.get(c), (pd.CategoricalDtype, dict)) or c in texto]
+        asociaciones = None
+        if len(categoricas) > 1:
+            combinaciones, frecuencias = _combinaciones(conexion, categoricas, esquema)
+            asociaciones = calcular_asociaciones(combinaciones, categoricas, pesos=frecuencias)
+    finally:
+        conexion.close()
+
+    return ConsultaAnalisis(
+        variables=variables,
+        n_registros=n_registros,
+        nulos=nulos,
+        muestra=muestra,
+        resumen_estadistico=resumen,
+        r_pearson=r_pearson,
+        n_pearson=n_pearson.astype(np.int64),
+        r_spearman=r_spearman,
+        n_spearman=n_spearman.astype(np.int64),
+        contingencia=contingencia,
+        asociaciones=asociaciones
+    )
+
+
+# =============================================================================
+# PARIDAD CON EL MOTOR DE PANDAS
+# =============================================================================
+
+def _diferencia(referencia, valor):
+    """Mayor diferencia relativa entre dos arreglos; infinita si los NaN no
+    coinciden o si cambia la forma."""
+    referencia = np.asarray(referencia, dtype=np.float64)
+    valor = np.asarray(valor, dtype=np.float64)
+    if referencia.shape != valor.shape or not np.array_equal(np.isnan(referencia), np.isnan(valor)):
+        return np.inf
+    validos = ~np.isnan(referencia)
+    if not validos.any():
+        return 0.0
+    escala = np.maximum(np.abs(referencia[validos]), 1.0)
+    return float((np.abs(referencia[validos] - valor[validos]) / escala).max())
+
+
+def _mismas_etiquetas(a, b):
+    return (list(map(str, a.index)) == list(map(str, b.index))
+            and list(map(str, a.columns)) == list(map(str, b.columns)))
+
+
+def comparar_motores(rutas, variables=VARIABLES_NUMERICAS, par_contingencia=('Nivel_Socioeconomico', 'Aprobado'),
+                     tolerancia=TOLERANCIA_PARIDAD, **opciones):
+    """Ejecuta el análisis con pandas (referencia) y con DuckDB y compara
+    cada resultado. Devuelve (tabla, segundos por motor); la tabla tiene una
+    fila por resultado con la diferencia relativa máxima y si coincide."""
+    from correlaciones import calcular_correlaciones
+    from estadisticas import calcular_resumen
+
+    rutas = [rutas] if isinstance(rutas, str) else list(rutas)
+    inicio = time.perf_counter()
+    df = aplicar_esquema(pd.concat([pd.read_csv(ruta) for ruta in rutas], ignore_index=True))
+    resumen = calcular_resumen(df, variables)
+    correlaciones = calcular_correlaciones(df, variables)
+    contingencia = pd.crosstab(df[par_contingencia[0]], df[par_contingencia[1]]).rename(columns=ETIQUETAS_BOOLEANAS)
+    asociaciones = calcular_asociaciones(df)
+    segundos_pandas = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    consulta = analizar_con_duckdb(rutas, variables, par_contingencia, **opciones)
+    segundos_duckdb = time.perf_counter() - inicio
+    correlaciones_duckdb = consulta.correlaciones()
+
+    filas = [
+        ('Registros', 0.0 if consulta.n_registros == len(df) else np.inf),
+        ('Nulos por columna', _diferencia(df.isnull().sum().reindex(consulta.nulos.index), consulta.nulos)),
+        ('Resumen (N)', _diferencia(resumen.n, consulta.resumen().n))
+    ]
+    filas += [(f"Resumen ({medida})", _diferencia(resumen.tabla()[medida], consulta.resumen().tabla()[medida]))
+              for medida in resumen.tabla().columns]
+    for metodo in ('pearson', 'spearman'):
+        referencia, valor = correlaciones[metodo], correlaciones_duckdb[metodo]
+        nombre = metodo.capitalize()
+        filas += [
+            (f"{nombre} (r)", _diferencia(referencia.matriz(), valor.matriz())),
+            (f"{nombre} (p-valor)", _diferencia(referencia.matriz_p_valores(), valor.matriz_p_valores())),
+            (f"{nombre} (N por par)", _diferencia(referencia.n, valor.n)),
+            (f"{nombre} (IC)", max(_diferencia(referencia.ic_inferior, valor.ic_inferior),
+                                   _diferencia(referencia.ic_superior, valor.ic_superior)))
+        ]
+    tabla = consulta.tabla_contingencia()
+    filas.append(('Tabla de contingencia', _diferencia(contingencia, tabla) if _mismas_etiquetas(contingencia, tabla)
+                  else np.inf))
+    pares = consulta.asociaciones.pares if consulta.asociaciones is not None else None
+    columnas_pares = ['Chi2', 'P_valor', 'Grados_libertad', 'V_Cramer', 'N']
+    filas.append(('Cribado de asociación', np.inf if pares is None or len(pares) != len(asociaciones.pares)
+                  or not pares.iloc[:, :2].equals(asociaciones.pares.iloc[:, :2])
+                  else _diferencia(asociaciones.pares[columnas_pares], pares[columnas_pares])))
+
+    resultado = pd.DataFrame(filas, columns=['Resultado', 'Diferencia_maxima'])
+    resultado['Coincide'] = resultado['Diferencia_maxima'] <= tolerancia
+    return resultado, {'pandas': segundos_pandas, 'duckdb': segundos_duckdb}
+
+
+def _entero(texto):
+    # Acepta notación científica: 1e6 -> 1000000
+    return int(float(texto))
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(
+        description="Compara el motor de DuckDB con el de pandas (referencia) en los PASOS 4 a 9 y 11"
+    )
+    parser.add_argument('entradas', nargs='*', default=['estudiantes_datos.csv'],
+                        help="Archivos CSV o patrones (por ejemplo 'datos/*.csv')")
+    parser.add_argument('--filas', type=_entero,
+                        help="Usa datos sintéticos de este tamaño (ver benchmark.py) en lugar de las entradas")
+    parser.add_argument('--variables', nargs='+', default=VARIABLES_NUMERICAS)
+    parser.add_argument('--tolerancia', type=float, default=TOLERANCIA_PARIDAD,
+                        help="Diferencia relativa máxima aceptada")
+    parser.add_argument('--hilos', type=int, default=None, help="Hilos de DuckDB (por defecto, uno por núcleo)")
+    parser.add_argument('--limite-memoria', default=LIMITE_MEMORIA)
+    parser.add_argument('--sin-cache', action='store_true', help="Consulta el CSV sin crear la copia Parquet")
+    argumentos = parser.parse_args(argumentos)
+
+    if argumentos.filas:
+        from benchmark import generar_csv
+        rutas = [generar_csv(argumentos.filas)]
+    else:
+        from paralelo import expandir_rutas
+        try:
+            rutas = expandir_rutas(argumentos.entradas)
+        except FileNotFoundError as error:
+            parser.error(str(error))
+
+    tabla, segundos = comparar_motores(
+        rutas, argumentos.variables, tolerancia=argumentos.tolerancia, usar_cache=not argumentos.sin_cache,
+        hilos=argumentos.hilos, limite_memoria=argumentos.limite_memoria
+    )
+    with pd.option_context('display.width', 120):
+        print(tabla.to_string(index=False))
+    print(f"\npandas: {segundos['pandas']:.3f} s   duckdb: {segundos['duckdb']:.3f} s")
+    if tabla['Coincide'].all():
+        print("✓ Ambos motores dan los mismos resultados")
+        return 0
+    print(f"✗ Resultados distintos: {', '.join(tabla.loc[~tabla['Coincide'], 'Resultado'])}")
+    return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
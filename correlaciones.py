@@ -0,0 +1,179 @@
+"""
+MOTOR VECTORIZADO DE CORRELACIONES
+=========================================================
+
+Calcula en una sola llamada las matrices de correlación de Pearson
+(PASO 7) y de Spearman (PASO 8) junto con sus p-valores e intervalos de
+confianza para todos los pares de variables.
+
+Cada columna se estandariza (Pearson) o se convierte a rangos (Spearman)
+una única vez y todos los coeficientes salen de un producto de matrices,
+en lugar de llamar a `stats.pearsonr` o `stats.spearmanr` por cada par.
+Los "ejemplos detallados" y los mapas de calor leen del mismo resultado.
+
+- P-valor: prueba t con n - 2 grados de libertad (el mismo de pearsonr y
+  spearmanr).
+- Intervalo de confianza: transformación z de Fisher; para Spearman con
+  el error estándar de Fieller, Hartley y Pearson (sqrt(1.06 / (n - 3))).
+
+Los valores nulos se excluyen por pares, como en `DataFrame.corr`.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+NIVEL_CONFIANZA = 0.95
+
+# Varianza de z de Fisher (multiplicada por n - 3) para cada método
+_VARIANZA_FISHER = {'pearson': 1.0, 'spearman': 1.06}
+
+
+@dataclass
+class MatrizCorrelacion:
+    """Coeficientes, tamaños de muestra, p-valores e intervalos de confianza
+    de todos los pares de `variables`; cada campo es una matriz cuadrada."""
+
+    metodo: str
+    variables: list
+    r: np.ndarray
+    n: np.ndarray
+    p_valor: np.ndarray
+    ic_inferior: np.ndarray
+    ic_superior: np.ndarray
+    nivel_confianza: float = NIVEL_CONFIANZA
+
+    def _tabla(self, valores):
+        return pd.DataFrame(valores, index=self.variables, columns=self.variables)
+
+    def matriz(self):
+        """Matriz de coeficientes, igual que `df.corr(method=metodo)`."""
+        return self._tabla(self.r)
+
+    def matriz_p_valores(self):
+        return self._tabla(self.p_valor)
+
+    def par(self, x, y):
+        """(coeficiente, p-valor) de un par de variables, como
+        `stats.pearsonr` o `stats.spearmanr`."""
+        i, j = self.variables.index(x), self.variables.index(y)
+        return float(self.r[i, j]), float(self.p_valor[i, j])
+
+    def intervalo(self, x, y):
+        """(límite inferior, límite superior) del intervalo de confianza."""
+        i, j = self.variables.index(x), self.variables.index(y)
+        return float(self.ic_inferior[i, j]), float(self.ic_superior[i, j])
+
+
+def p_valores_correlacion(r, n):
+    """P-valores bilaterales (prueba t con n - 2 grados de libertad) para
+    arreglos de coeficientes `r` y tamaños de muestra `n`."""
+    from scipy import stats
+
+    r, n = np.broadcast_arrays(np.asarray(r, dtype=np.float64), np.asarray(n, dtype=np.float64))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        t = np.abs(r) * np.sqrt((n - 2) / (1 - r ** 2))
+        p_valor = 2 * stats.t.sf(t, n - 2)
+    p_valor = np.where(np.abs(r) >= 1, 0.0, p_valor)
+    return np.where((n < 3) | np.isnan(r), np.nan, p_valor)
+
+
+def intervalos_confianza(r, n, metodo='pearson', nivel_confianza=NIVEL_CONFIANZA):
+    """Límites (inferior, superior) del intervalo de confianza de cada
+    coeficiente con la transformación z de Fisher."""
+    from scipy import stats
+
+    r, n = np.broadcast_arrays(np.asarray(r, dtype=np.float64), np.asarray(n, dtype=np.float64))
+    z_critico = stats.norm.ppf(0.5 + nivel_confianza / 2)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        z = np.arctanh(r)
+        margen = z_critico * np.sqrt(_VARIANZA_FISHER[metodo] / (n - 3))
+        inferior, superior = np.tanh(z - margen), np.tanh(z + margen)
+    sin_datos = (n <= 3) | np.isnan(r)
+    return np.where(sin_datos, np.nan, inferior), np.where(sin_datos, np.nan, superior)
+
+
+def resultado_correlacion(metodo, variables, r, n, nivel_confianza=NIVEL_CONFIANZA):
+    """Arma la MatrizCorrelacion (con p-valores e intervalos) a partir de
+    las matrices de coeficientes y de tamaños de muestra."""
+    r = np.asarray(r, dtype=np.float64)
+    n = np.asarray(n, dtype=np.int64)
+    ic_inferior, ic_superior = intervalos_confianza(r, n, metodo, nivel_confianza)
+    return MatrizCorrelacion(
+        metodo=metodo,
+        variables=list(variables),
+        r=r,
+        n=n,
+        p_valor=p_valores_correlacion(r, n),
+        ic_inferior=ic_inferior,
+        ic_superior=ic_superior,
+        nivel_confianza=nivel_confianza
+    )
+
+
+def _correlacion_por_pares(datos):
+    """Coeficientes de Pearson de todas las columnas de `datos` con
+    exclusión de nulos por pares, usando productos de matrices."""
+    validos = ~np.isnan(datos)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # Centrar con la media de cada columna mejora la precisión numérica
+        media = np.where(validos, datos, 0.0).sum(axis=0) / validos.sum(axis=0)
+        centrados = np.where(validos, datos - media, 0.0)
+    mascara = validos.astype(np.float64)
+    n = mascara.T @ mascara
+
+    if validos.all():
+        # Caso sin nulos: columnas estandarizadas y un único producto
+        normas = np.sqrt((centrados ** 2).sum(axis=0))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            estandarizados = centrados / normas
+        r = estandarizados.T @ estandarizados
+    else:
+        # Sumas restringidas a las filas válidas de cada par: suma[i, j] es la
+        # suma de la columna i en las filas donde también es válida la j
+        suma = centrados.T @ mascara
+        suma_cuadrados = (centrados ** 2).T @ mascara
+        with np.errstate(divide='ignore', invalid='ignore'):
+            covarianza = centrados.T @ centrados - suma * suma.T / n
+            varianza = suma_cuadrados - suma ** 2 / n
+            r = covarianza / np.sqrt(varianza * varianza.T)
+        r = np.where(n > 1, r, np.nan)
+
+    r = np.clip(r, -1.0, 1.0)
+    diagonal = np.diag(r).copy()
+    np.fill_diagonal(r, np.where(np.isnan(diagonal), np.nan, 1.0))
+    return r, n.astype(np.int64)
+
+
+def calcular_correlaciones(df, variables, nivel_confianza=NIVEL_CONFIANZA):
+    """Matrices de Pearson y Spearman de `variables` con p-valores e
+    intervalos de confianza. Devuelve {'pearson': MatrizCorrelacion,
+    'spearman': MatrizCorrelacion}."""
+    variables = list(variables)
+    datos = df[variables].to_numpy(dtype=np.float64)
+    r_pearson, n = _correlacion_por_pares(datos)
+
+    # Rangos promedio (como spearmanr) calculados una sola vez por columna
+    rangos = df[variables].rank(method='average').to_numpy(dtype=np.float64)
+    r_spearman, _ = _correlacion_por_pares(rangos)
+
+    # Con nulos, Spearman ordena solo las filas completas de cada par: los
+    # pares con alguna columna incompleta se recalculan con sus propios rangos
+    con_nulos = np.flatnonzero(np.isnan(datos).any(axis=0))
+    for i in con_nulos:
+        for j in range(len(variables)):
+            if i == j:
+                continue
+            completas = ~np.isnan(datos[:, i]) & ~np.isnan(datos[:, j])
+            if completas.sum() > 1:
+                from scipy.stats import rankdata
+                par = rankdata(datos[completas][:, [i, j]], axis=0)
+                r_spearman[i, j] = r_spearman[j, i] = np.clip(np.corrcoef(par, rowvar=False)[0, 1], -1.0, 1.0)
+            else:
+                r_spearman[i, j] = r_spearman[j, i] = np.nan
+
+    return {
+        'pearson': resultado_correlacion('pearson', variables, r_pearson, n, nivel_confianza),
+        'spearman': resultado_correlacion('spearman', variables, r_spearman, n, nivel_confianza)
+    }
@@ -0,0 +1,150 @@
+"""
+CUANTILES APROXIMADOS CON SKETCH KLL
+=========================================================
+
+Backend opcional para la mediana, los cuartiles y los bigotes del box plot
+(PASO 10.2) cuando la columna no cabe en memoria o está repartida en varios
+bloques o archivos.
+
+El sketch KLL (Karnin, Lang y Liberty, 2016) guarda una muestra ponderada
+de los datos en niveles de compactación: ocupa memoria constante, se puede
+actualizar por bloques y combinar entre particiones. El error se expresa
+en rango normalizado: con error = 0.01, el cuantil 0.5 devuelto está entre
+los cuantiles 0.49 y 0.51 reales (con ~99% de confianza).
+"""
+
+import numpy as np
+
+# Error de rango normalizado por defecto (1%)
+ERROR_CUANTILES = 0.01
+
+# Capacidad mínima de un nivel de compactación
+_CAPACIDAD_MINIMA = 8
+
+# Valores que `actualizar` agrega al sketch de una vez: una columna completa
+# se incorpora por tramos, así cada compactación ordena a lo sumo este
+# número de valores (más los que ya guarda el nivel 0) en lugar de la
+# columna entera
+_BLOQUE_ACTUALIZACION = 1 << 16
+
+
+def k_para_error(error):
+    """Parámetro k del sketch que garantiza el error de rango indicado,
+    según la cota empírica de KLL: error ≈ 2.296 / k^0.9723."""
+    return int(np.ceil((2.296 / error) ** (1 / 0.9723)))
+
+
+def error_para_k(k):
+    """Error de rango normalizado esperado para un sketch con parámetro k."""
+    return 2.296 / k ** 0.9723
+
+
+class SketchKLL:
+    """Sketch de cuantiles combinable con error de rango `error`."""
+
+    def __init__(self, error=ERROR_CUANTILES, semilla=None):
+        self.k = k_para_error(error)
+        self.n = 0
+        self.minimo = np.nan
+        self.maximo = np.nan
+        self.niveles = [np.empty(0)]
+        self._rng = np.random.default_rng(semilla)
+
+    @property
+    def error(self):
+        return error_para_k(self.k)
+
+    def actualizar(self, valores):
+        valores = np.asarray(valores, dtype=np.float64)
+        for inicio in range(0, len(valores), _BLOQUE_ACTUALIZACION):
+            bloque = valores[inicio:inicio + _BLOQUE_ACTUALIZACION]
+            bloque = bloque[~np.isnan(bloque)]
+            if len(bloque) == 0:
+                continue
+            self.n += len(bloque)
+            self.minimo = np.fmin(self.minimo, bloque.min())
+            self.maximo = np.fmax(self.maximo, bloque.max())
+            self.niveles[0] = np.concatenate([self.niveles[0], bloque])
+            self._compactar()
+        return self
+
+    def combinar(self, otro):
+        self.k = min(self.k, otro.k)
+        self.n += otro.n
+        self.minimo = np.fmin(self.minimo, otro.minimo)
+        self.maximo = np.fmax(self.maximo, otro.maximo)
+        while len(self.niveles) < len(otro.niveles):
+            self.niveles.append(np.empty(0))
+        for nivel, items in enumerate(otro.niveles):
+            self.niveles[nivel] = np.concatenate([self.niveles[nivel], items])
+        self._compactar()
+        return self
+
+    def _capacidad(self, nivel):
+        profundidad = len(self.niveles) - nivel - 1
+        return max(_CAPACIDAD_MINIMA, int(np.ceil(self.k * (2 / 3) ** profundidad)))
+
+    def _compactar(self):
+        # Cada compactación ordena el nivel y promueve uno de cada dos
+        # elementos (empezando al azar) al nivel siguiente, con doble peso
+        nivel = 0
+        while nivel < len(self.niveles):
+            items = self.niveles[nivel]
+            if len(items) <= self._capacidad(nivel):
+                nivel += 1
+                continue
+            if nivel + 1 == len(self.niveles):
+                self.niveles.append(np.empty(0))
+            items = np.sort(items)
+            resto, items = items[:len(items) % 2], items[len(items) % 2:]
+            promovidos = items[self._rng.integers(2)::2]
+            self.niveles[nivel] = resto
+            self.niveles[nivel + 1] = np.concatenate([self.niveles[nivel + 1], promovidos])
+            # Al crecer la altura bajan las capacidades: se revisa desde abajo
+            nivel = 0
+
+    def _items_ponderados(self):
+        items = np.concatenate(self.niveles)
+        pesos = np.concatenate([np.full(len(v), 2.0 ** h) for h, v in enumerate(self.niveles)])
+        orden = np.argsort(items, kind='stable')
+        return items[orden], np.cumsum(pesos[orden])
+
+    def cuantiles(self, qs):
+        """Cuantiles aproximados para una lista de probabilidades."""
+        qs = np.atleast_1d(np.asarray(qs, dtype=np.float64))
+        if self.n == 0:
+            return np.full(len(qs), np.nan)
+        if len(self.niveles[0]) == self.n:
+            # Sin compactaciones el sketch guarda todos los datos: cuantil exacto
+            return np.quantile(self.niveles[0], qs)
+        items, acumulado = self._items_ponderados()
+        indices = np.searchsorted(acumulado, qs * acumulado[-1], side='left')
+        resultado = items[np.clip(indices, 0, len(items) - 1)]
+        # Los extremos se conocen con exactitud
+        resultado = np.where(qs <= 0, self.minimo, resultado)
+        return np.where(qs >= 1, self.maximo, resultado)
+
+    def cuantil(self, q):
+        return float(self.cuantiles([q])[0])
+
+
+def estadisticas_caja(sketch, etiqueta):
+    """Estadísticas de un box plot (formato de `Axes.bxp`) a partir de un
+    sketch: cuartiles aproximados y bigotes en el dato más extremo dentro
+    de 1.5 veces el rango intercuartílico."""
+    q1, mediana, q3 = sketch.cuantiles([0.25, 0.5, 0.75])
+    rango_iq = q3 - q1
+    items = np.concatenate(sketch.niveles + [np.array([sketch.minimo, sketch.maximo])])
+    en_rango = (items >= q1 - 1.5 * rango_iq) & (items <= q3 + 1.5 * rango_iq)
+    dentro = items[en_rango]
+    # Los atípicos solo se conocen si el sketch aún guarda todos los datos
+    exacto = len(sketch.niveles[0]) == sketch.n
+    return {
+        'label': etiqueta,
+        'med': mediana,
+        'q1': q1,
+        'q3': q3,
+        'whislo': dentro.min() if len(dentro) else q1,
+        'whishi': dentro.max() if len(dentro) else q3,
+        'fliers': np.unique(items[~en_rango]) if exacto else np.empty(0)
+    }
@@ -0,0 +1,133 @@
+"""
+ESQUEMA DE TIPOS DEL DATASET DE ESTUDIANTES
+=========================================================
+
+Al cargar los datos, `pd.read_csv` deja `Nivel_Socioeconomico` y `Aprobado`
+como texto y todas las columnas numéricas como int64. El esquema explícito
+de este módulo valida cada columna y la convierte al tipo más compacto:
+
+- Niveles socioeconómicos: categoría ordenada (Bajo < Medio < Alto)
+- Aprobado: booleano ('Si' -> True, 'No' -> False)
+- Columnas numéricas: int8/int16/int32 si los valores son enteros y caben,
+  float32 si la conversión no pierde precisión y float64 en otro caso
+
+Las tablas cruzadas y los filtros comparan códigos enteros en lugar de
+texto, y los resultados del análisis no cambian.
+"""
+
+import numpy as np
+import pandas as pd
+
+NUMERICO = 'numerico'
+TEXTO = 'texto'
+
+# Valores de texto aceptados para las columnas booleanas
+VALORES_BOOLEANOS = {'Si': True, 'No': False}
+
+# Etiquetas para mostrar las columnas booleanas como en el CSV original
+ETIQUETAS_BOOLEANAS = {True: 'Si', False: 'No'}
+
+NIVELES_SOCIOECONOMICOS = pd.CategoricalDtype(['Bajo', 'Medio', 'Alto'], ordered=True)
+
+ESQUEMA_ESTUDIANTES = {
+    'Estudiante': TEXTO,
+    'Edad': NUMERICO,
+    'Calificacion_Matematicas': NUMERICO,
+    'Calificacion_Ciencias': NUMERICO,
+    'Horas_Estudio': NUMERICO,
+    'Nivel_Socioeconomico': NIVELES_SOCIOECONOMICOS,
+    'Aprobado': VALORES_BOOLEANOS,
+}
+
+# Variables numéricas del análisis (PASOS 4 a 11): las usan el script, la
+# app, el análisis por lotes, el benchmark y la comparación de motores
+VARIABLES_NUMERICAS = [columna for columna, tipo in ESQUEMA_ESTUDIANTES.items() if tipo == NUMERICO]
+
+_ENTEROS = (np.int8, np.int16, np.int32, np.int64)
+
+
+def _numerico(columna):
+    try:
+        return pd.to_numeric(columna, errors='raise')
+    except (ValueError, TypeError) as error:
+        raise ValueError(f"La columna '{columna.name}' debe ser numérica: {error}") from None
+
+
+def _numerico_compacto(columna):
+    valores = _numerico(columna)
+    datos = valores.to_numpy(dtype=np.float64)
+    validos = datos[~np.isnan(datos)]
+
+    if len(validos) == len(datos) and np.array_equal(validos, np.round(validos)):
+        minimo, maximo = (validos.min(), validos.max()) if len(validos) else (0, 0)
+        for tipo in _ENTEROS:
+            limites = np.iinfo(tipo)
+            if limites.min <= minimo and maximo <= limites.max:
+                return valores.astype(tipo)
+    # float32 solo si todos los valores se representan sin pérdida
+    if np.array_equal(datos.astype(np.float32).astype(np.float64), datos, equal_nan=True):
+        return valores.astype(np.float32)
+    return valores.astype(np.float64)
+
+
+def _categorico(columna, tipo):
+    inesperados = set(columna.dropna().unique()) - set(tipo.categories)
+    if inesperados:
+        raise ValueError(
+            f"Valores no válidos en '{columna.name}': {sorted(map(str, inesperados))} "
+            f"(se esperaba uno de {list(tipo.categories)})"
+        )
+    return columna.astype(tipo)
+
+
+def _booleano(columna, valores):
+    inesperados = set(columna.dropna().unique()) - set(valores)
+    if inesperados:
+        raise ValueError(
+            f"Valores no válidos en '{columna.name}': {sorted(map(str, inesperados))} "
+            f"(se esperaba uno de {list(valores)})"
+        )
+    convertida = columna.map(valores)
+    # Con valores nulos se usa el booleano de pandas que admite NA
+    return convertida.astype('boolean' if convertida.isna().any() else bool)
+
+
+def aplicar_esquema(df, esquema=ESQUEMA_ESTUDIANTES, compactar=True):
+    """Devuelve una copia de `df` con los tipos del esquema. Lanza
+    ValueError si falta una columna o algún valor no cumple el esquema.
+    Las columnas que no están en el esquema se dejan igual.
+
+    Con `compactar=False` las columnas numéricas quedan siempre en float64,
+    para que todos los bloques de un mismo archivo tengan los mismos tipos."""
+    faltantes = [columna for columna in esquema if columna not in df.columns]
+    if faltantes:
+        raise ValueError(f"Faltan columnas requeridas por el esquema: {faltantes}")
+
+    convertidas = {}
+    for columna, tipo in esquema.items():
+        if isinstance(tipo, pd.CategoricalDtype):
+            convertidas[columna] = _categorico(df[columna], tipo)
+        elif isinstance(tipo, dict):
+            convertidas[columna] = _booleano(df[columna], tipo)
+        elif tipo == NUMERICO:
+            convertidas[columna] = (_numerico_compacto(df[columna]) if compactar
+                                    else _numerico(df[columna]).astype(np.float64))
+        elif tipo != TEXTO:
+            raise ValueError(f"Tipo desconocido en el esquema para '{columna}': {tipo!r}")
+    return df.assign(**convertidas)
+
+
+def uso_memoria(df):
+    """Memoria ocupada por el DataFrame en bytes (incluye el texto)."""
+    return int(df.memory_usage(deep=True).sum())
+
+
+def etiquetas_originales(df, esquema=ESQUEMA_ESTUDIANTES):
+    """Copia de `df` con las columnas booleanas del esquema otra vez como
+    texto ('Si'/'No'), para exportar los datos tal como venían en el CSV."""
+    convertidas = {}
+    for columna, tipo in esquema.items():
+        if isinstance(tipo, dict) and columna in df.columns:
+            etiquetas = {valor: texto for texto, valor in tipo.items()}
+            convertidas[columna] = df[columna].map(etiquetas).astype(object)
+    return df.assign(**convertidas)
@@ -0,0 +1,192 @@
+"""
+MOTOR DE ESTADÍSTICAS DESCRIPTIVAS
+=========================================================
+
+Calcula en una sola pasada vectorizada todas las medidas de la tabla
+`resumen_completo` (media, mediana, moda, mínimo, máximo, rango, Q1, Q3,
+varianza, desviación estándar y coeficiente de variación) para todas las
+variables numéricas a la vez.
+
+Cada columna se ordena una única vez; de ese orden salen el mínimo, el
+máximo, los cuantiles (interpolación lineal, igual que pandas) y la moda.
+Tanto `analisis_estadistico.py` como `app.py` muestran sus resultados a
+partir del objeto `ResumenDescriptivo` que devuelve `calcular_resumen`.
+
+Con `cuantiles='kll'` la mediana y los cuartiles se estiman con un sketch
+KLL (ver `cuantiles.py`) en lugar de ordenar cada columna completa: el
+sketch recibe la columna por tramos de 65.536 valores y solo ordena cada
+tramo al compactarlo (O(n log b) en lugar de O(n log n), sin copias del
+tamaño de la columna).
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from cuantiles import ERROR_CUANTILES, SketchKLL
+
+# Orden y nombres de las filas de la tabla resumen (PASO 11)
+MEDIDAS_RESUMEN = [
+    'Media', 'Mediana', 'Moda', 'Mínimo', 'Máximo', 'Rango',
+    'Q1 (25%)', 'Q3 (75%)', 'Varianza', 'Desv. Estándar', 'Coef. Variación (%)'
+]
+
+
+@dataclass
+class ResumenDescriptivo:
+    """Medidas descriptivas de varias variables; cada campo es un arreglo
+    alineado con `variables`."""
+
+    variables: list
+    n: np.ndarray
+    media: np.ndarray
+    mediana: np.ndarray
+    moda: np.ndarray
+    minimo: np.ndarray
+    maximo: np.ndarray
+    q1: np.ndarray
+    q3: np.ndarray
+    varianza: np.ndarray
+    # Variables cuyos cuantiles se aproximaron con un sketch KLL
+    sketches: dict = None
+
+    @property
+    def rango(self):
+        return self.maximo - self.minimo
+
+    @property
+    def desviacion_std(self):
+        return np.sqrt(self.varianza)
+
+    @property
+    def coef_variacion(self):
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return (self.desviacion_std / self.media) * 100
+
+    def descripcion_cuantiles(self):
+        """Texto que indica con qué método se calcularon los cuantiles."""
+        if not self.sketches:
+            return "exactos (interpolación lineal sobre los datos ordenados)"
+        error = max(sketch.error for sketch in self.sketches.values())
+        texto = f"aproximados con sketch KLL (error de rango ≤ {error:.2%})"
+        if len(self.sketches) < len(self.variables):
+            texto += f" en: {', '.join(self.sketches)}; exactos en el resto"
+        return texto
+
+    def medidas(self, variable):
+        """Diccionario {medida: valor} de una variable, con las claves de
+        MEDIDAS_RESUMEN."""
+        i = self.variables.index(variable)
+        valores = [
+            self.media, self.mediana, self.moda, self.minimo, self.maximo,
+            self.rango, self.q1, self.q3, self.varianza, self.desviacion_std,
+            self.coef_variacion
+        ]
+        return {medida: float(valor[i]) for medida, valor in zip(MEDIDAS_RESUMEN, valores)}
+
+    def tabla(self):
+        """Tabla `resumen_completo`: una fila por variable, una columna por medida."""
+        return pd.DataFrame(
+            [self.medidas(variable) for variable in self.variables],
+            index=self.variables,
+            columns=MEDIDAS_RESUMEN
+        )
+
+    def tabla_describe(self):
+        """Misma forma que `df[variables].describe()` (PASO 6)."""
+        return pd.DataFrame(
+            [self.n.astype(float), self.media, self.desviacion_std, self.minimo,
+             self.q1, self.mediana, self.q3, self.maximo],
+            index=['count', 'mean', 'std', 'min', '25%', '50%', '75%', 'max'],
+            columns=self.variables
+        )
+
+
+def _cuantiles_ordenados(ordenados, n, q):
+    """Cuantil q de cada columna de una matriz ya ordenada (NaN al final),
+    con interpolación lineal sobre los n valores válidos de cada columna."""
+    columnas = np.arange(ordenados.shape[1])
+    posicion = (n - 1) * q
+    inferior = np.floor(posicion).astype(np.int64)
+    superior = np.minimum(inferior + 1, np.maximum(n - 1, 0))
+    inferior = np.maximum(inferior, 0)
+    fraccion = posicion - np.floor(posicion)
+    bajo = ordenados[inferior, columnas]
+    alto = ordenados[superior, columnas]
+    resultado = bajo + (alto - bajo) * fraccion
+    return np.where(n > 0, resultado, np.nan)
+
+
+def _moda_ordenada(columna):
+    """Valor más frecuente de una columna ordenada sin NaN; ante empates
+    devuelve el menor, igual que `Series.mode().values[0]`."""
+    if len(columna) == 0:
+        return np.nan
+    inicios = np.flatnonzero(np.r_[True, columna[1:] != columna[:-1]])
+    repeticiones = np.diff(np.r_[inicios, len(columna)])
+    return columna[inicios[np.argmax(repeticiones)]]
+
+
+def _moda_conteos(valores):
+    """Moda por conteo de frecuencias (sin ordenar la columna)."""
+    conteos = pd.Series(valores).value_counts(sort=False)
+    if conteos.empty:
+        return np.nan
+    return conteos.index[conteos.to_numpy() == conteos.max()].min()
+
+
+def calcular_resumen(df, variables, cuantiles='exacto', error_cuantiles=ERROR_CUANTILES):
+    """Calcula todas las medidas de `resumen_completo` para `variables`
+    con un solo ordenamiento por columna. Los valores nulos se ignoran,
+    como en los métodos de pandas.
+
+    Con `cuantiles='kll'` no se ordena ninguna columna completa: la mediana
+    y los cuartiles salen de un sketch KLL con error de rango
+    `error_cuantiles` (que ordena la columna por tramos) y la moda de un
+    conteo de frecuencias."""
+    variables = list(variables)
+    datos = df[variables].to_numpy(dtype=np.float64)
+    if datos.shape[0] == 0:
+        # Una fila de NaN deja n = 0 y todas las medidas en NaN
+        datos = np.full((1, len(variables)), np.nan)
+
+    validos = ~np.isnan(datos)
+    n = validos.sum(axis=0)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        media = np.nansum(datos, axis=0) / n
+        desvios = np.where(validos, datos - media, 0.0)
+        varianza = (desvios ** 2).sum(axis=0) / (n - 1)
+
+    columnas = np.arange(len(variables))
+    if cuantiles == 'kll':
+        sketches = {v: SketchKLL(error_cuantiles).actualizar(datos[:, j]) for j, v in enumerate(variables)}
+        q1, mediana, q3 = np.array([sketch.cuantiles([0.25, 0.5, 0.75]) for sketch in sketches.values()]).T
+        minimo = np.array([sketch.minimo for sketch in sketches.values()])
+        maximo = np.array([sketch.maximo for sketch in sketches.values()])
+        moda = np.array([_moda_conteos(datos[validos[:, j], j]) for j in columnas], dtype=np.float64)
+    elif cuantiles == 'exacto':
+        sketches = None
+        # Un único ordenamiento por columna (los NaN quedan al final)
+        ordenados = np.sort(datos, axis=0)
+        minimo = np.where(n > 0, ordenados[0], np.nan)
+        maximo = np.where(n > 0, ordenados[np.maximum(n - 1, 0), columnas], np.nan)
+        q1, mediana, q3 = (_cuantiles_ordenados(ordenados, n, q) for q in (0.25, 0.5, 0.75))
+        moda = np.array([_moda_ordenada(ordenados[:n[j], j]) for j in columnas], dtype=np.float64)
+    else:
+        raise ValueError(f"Backend de cuantiles desconocido: '{cuantiles}' (use 'exacto' o 'kll')")
+
+    return ResumenDescriptivo(
+        variables=variables,
+        n=n,
+        media=media,
+        mediana=mediana,
+        moda=moda,
+        minimo=minimo,
+        maximo=maximo,
+        q1=q1,
+        q3=q3,
+        varianza=np.where(n > 1, varianza, np.nan),
+        sketches=sketches
+    )
@@ -0,0 +1,203 @@
+"""
+EXPORTACIÓN DE RESULTADOS EN MEMORIA CONSTANTE
+=========================================================
+
+`pd.ExcelWriter(engine='openpyxl')` arma el libro completo en memoria
+(un objeto por celda) antes de guardarlo, lo que hace lenta y costosa la
+hoja de datos originales del PASO 12 con muchas filas. Además Excel no
+admite más de 1.048.576 filas por hoja.
+
+- `LibroExcel` escribe el .xlsx con el modo de solo escritura de openpyxl:
+  cada fila se vuelca al archivo al agregarla, por bloques, y la memoria no
+  depende del número de filas.
+- Los datos que pasan del límite de filas se reparten en varias hojas
+  ('Datos_Originales', 'Datos_Originales_2', ...).
+- `exportar_datos` guarda los datos originales como Parquet o CSV
+  comprimido (.csv.gz) junto al Excel, también por bloques; las hojas de
+  resultados siguen en el libro.
+
+Los datos pueden llegar como DataFrame o como bloques (por ejemplo, leídos
+del CSV con `bloques_csv` en modo streaming).
+"""
+
+import gzip
+import os
+
+import numpy as np
+import pandas as pd
+
+# Máximo de filas de una hoja de Excel (incluida la fila de encabezados)
+LIMITE_FILAS_EXCEL = 1_048_576
+
+# Filas que se convierten y escriben de una vez
+FILAS_POR_BLOQUE = 100_000
+
+FORMATOS_DATOS = ['excel', 'parquet', 'csv.gz']
+
+
+# =============================================================================
+# BLOQUES DE DATOS
+# =============================================================================
+
+def bloques_dataframe(df, tamano_bloque=FILAS_POR_BLOQUE):
+    """Recorre `df` en bloques de `tamano_bloque` filas (vistas, sin copiar)."""
+    for inicio in range(0, max(len(df), 1), tamano_bloque):
+        yield df.iloc[inicio:inicio + tamano_bloque]
+
+
+def bloques_csv(rutas, tamano_bloque=FILAS_POR_BLOQUE):
+    """Lee uno o varios CSV en bloques, tal como están en el archivo."""
+    if isinstance(rutas, str):
+        rutas = [rutas]
+    for ruta in rutas:
+        yield from pd.read_csv(ruta, chunksize=tamano_bloque)
+
+
+def _como_bloques(datos):
+    if isinstance(datos, pd.DataFrame):
+        return bloques_dataframe(datos)
+    return iter(datos)
+
+
+def _filas(bloque, index):
+    """Filas de un bloque como listas de valores de Python; los nulos quedan
+    como celdas vacías y los infinitos como 'inf' (igual que `to_excel`)."""
+    if index:
+        bloque = bloque.reset_index()
+    valores = bloque.to_numpy(dtype=object)
+    valores[pd.isna(bloque).to_numpy()] = None
+    for j, tipo in enumerate(bloque.dtypes):
+        if pd.api.types.is_float_dtype(tipo):
+            columna = bloque.iloc[:, j].to_numpy()
+            valores[np.isposinf(columna), j] = 'inf'
+            valores[np.isneginf(columna), j] = '-inf'
+    return valores.tolist()
+
+
+def _encabezados(tabla, index):
+    columnas = list(tabla.columns)
+    if not index:
+        return columnas
+    return [tabla.index.name] + columnas
+
+
+# =============================================================================
+# LIBRO DE EXCEL EN MODO DE SOLO ESCRITURA
+# =============================================================================
+
+class LibroExcel:
+    """Libro .xlsx escrito en streaming. Se usa como `pd.ExcelWriter`:
+
+        with LibroExcel('resultados.xlsx') as libro:
+            libro.agregar_datos(df, 'Datos_Originales')
+            libro.agregar_tabla(resumen, 'Resumen_Estadistico')
+
+    El archivo se escribe primero con otro nombre y se reemplaza al cerrar,
+    así un error a mitad de camino no deja un Excel incompleto."""
+
+    def __init__(self, ruta, limite_filas=LIMITE_FILAS_EXCEL):
+        from openpyxl import Workbook
+
+        self.ruta = ruta
+        self.limite_filas = limite_filas
+        self.hojas = []
+        self._libro = Workbook(write_only=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, tipo, valor, traza):
+        if tipo is None:
+            self.guardar()
+        else:
+            self._libro.close()
+
+    def _nueva_hoja(self, nombre, encabezados):
+        hoja = self._libro.create_sheet(nombre)
+        hoja.append(encabezados)
+        self.hojas.append(nombre)
+        return hoja
+
+    def agregar_tabla(self, tabla, nombre_hoja, index=True):
+        """Agrega una tabla de resultados (pequeña) en una hoja, con el mismo
+        formato que `tabla.to_excel(writer, sheet_name=nombre_hoja)`."""
+        hoja = self._nueva_hoja(nombre_hoja, _encabezados(tabla, index))
+        for fila in _filas(tabla, index):
+            hoja.append(fila)
+
+    def agregar_datos(self, datos, nombre_hoja, index=False):
+        """Agrega datos (DataFrame o bloques de DataFrames) empezando por la
+        hoja `nombre_hoja`; si pasan del límite de filas continúan en
+        '<nombre_hoja>_2', '<nombre_hoja>_3', ... Devuelve las hojas creadas."""
+        filas_por_hoja = self.limite_filas - 1
+        creadas = []
+        hoja, libres = None, 0
+        for bloque in _como_bloques(datos):
+            if hoja is None:
+                encabezados = _encabezados(bloque, index)
+                hoja, libres = self._nueva_hoja(nombre_hoja, encabezados), filas_por_hoja
+                creadas.append(nombre_hoja)
+            filas = _filas(bloque, index)
+            while filas:
+                if libres == 0:
+                    nombre = f"{nombre_hoja}_{len(creadas) + 1}"
+                    hoja, libres = self._nueva_hoja(nombre, encabezados), filas_por_hoja
+                    creadas.append(nombre)
+                for fila in filas[:libres]:
+                    hoja.append(fila)
+                usadas = min(libres, len(filas))
+                filas, libres = filas[usadas:], libres - usadas
+        return creadas
+
+    def guardar(self):
+        temporal = f"{self.ruta}.tmp"
+        self._libro.save(temporal)
+        os.replace(temporal, self.ruta)
+
+
+# =============================================================================
+# DATOS ORIGINALES EN PARQUET O CSV COMPRIMIDO
+# =============================================================================
+
+def ruta_datos(ruta_excel, formato):
+    """Archivo de datos que acompaña al Excel:
+    'resultados.xlsx' -> 'resultados_datos.parquet' o 'resultados_datos.csv.gz'."""
+    base = os.path.splitext(ruta_excel)[0]
+    return f"{base}_datos.{formato}"
+
+
+def _exportar_parquet(bloques, ruta):
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("Exportar a Parquet requiere pyarrow: pip install pyarrow") from None
+
+    escritor = None
+    try:
+        for bloque in bloques:
+            tabla = pa.Table.from_pandas(bloque, preserve_index=False)
+            if escritor is None:
+                escritor = pq.ParquetWriter(ruta, tabla.schema)
+            escritor.write_table(tabla.cast(escritor.schema))
+    finally:
+        if escritor is not None:
+            escritor.close()
+
+
+def _exportar_csv_gz(bloques, ruta):
+    with gzip.open(ruta, 'wt', encoding='utf-8', newline='') as archivo:
+        for numero, bloque in enumerate(bloques):
+            bloque.to_csv(archivo, index=False, header=numero == 0)
+
+
+def exportar_datos(datos, ruta, formato):
+    """Guarda `datos` (DataFrame o bloques de DataFrames) en `ruta` como
+    'parquet' o 'csv.gz', bloque por bloque. Devuelve la ruta."""
+    exportadores = {'parquet': _exportar_parquet, 'csv.gz': _exportar_csv_gz}
+    if formato not in exportadores:
+        raise ValueError(f"Formato de datos desconocido: '{formato}' (use {', '.join(exportadores)})")
+    temporal = f"{ruta}.tmp"
+    exportadores[formato](_como_bloques(datos), temporal)
+    os.replace(temporal, ruta)
+    return ruta
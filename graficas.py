@@ -0,0 +1,586 @@
+"""
+GRÁFICAS DEL PASO 10 CON CACHÉ EN DISCO
+=========================================================
+
+Las 9 gráficas del PASO 10 son el paso más lento del análisis y se
+volvían a dibujar en cada ejecución aunque los datos no cambiaran.
+
+- Cada gráfica (panel) se dibuja por separado en su propia figura de
+  16/3 x 4 pulgadas, por lo que los paneles se pueden renderizar en
+  paralelo, un proceso por panel.
+- Los bytes PNG/SVG de cada panel se guardan en `.cache_graficas/` con una
+  clave que combina la huella de los datos que usa ese panel y los
+  parámetros de dibujo (formato, dpi, estilo). Si cambia solo el cálculo
+  de cuantiles, por ejemplo, solo se vuelve a dibujar el box plot.
+- La figura completa (3 x 3 paneles) se compone a partir de los PNG de los
+  paneles y también se guarda en la caché.
+- La caché conserva los MAXIMO_ARCHIVOS_CACHE archivos usados más
+  recientemente: cada escritura borra los más antiguos (`limpiar_cache`).
+- Con más de LIMITE_FILAS_GRAFICAS filas (modo de datos grandes) los
+  scatters se dibujan como histogramas 2D, los violines con densidades
+  estimadas sobre una muestra y la línea de tendencia sale de las medias,
+  desviaciones y correlaciones ya calculadas: el tiempo de dibujo no
+  depende del número de filas.
+
+`analisis_estadistico.py` escribe los bytes de la figura completa en
+`analisis_estadistico_completo.png` y `app.py` los muestra con `st.image`.
+"""
+
+import hashlib
+import io
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from cuantiles import estadisticas_caja
+from esquema import ETIQUETAS_BOOLEANAS
+
+DIRECTORIO_CACHE = '.cache_graficas'
+# Archivos que se conservan en la caché (cada figura son 9 paneles más la
+# figura completa): en la app, cada combinación de filtros agrega una figura
+MAXIMO_ARCHIVOS_CACHE = 200
+
+# Versión del dibujo: cambiarla invalida la caché cuando se modifican los paneles
+VERSION_GRAFICAS = 3
+
+ESTILO = 'seaborn-v0_8-darkgrid'
+PALETA = 'husl'
+
+# Los rcParams de matplotlib son globales del proceso: los paneles que se
+# dibujan en hilos (trabajos.py) lo hacen de a uno, para que el estilo de
+# uno no se mezcle con el de otro ni quede aplicado en el resto de la app
+_CANDADO_DIBUJO = threading.Lock()
+
+# Tamaño de la figura completa (pulgadas) y distribución de los paneles
+TAMANO_FIGURA = (16, 12)
+FILAS, COLUMNAS = 3, 3
+
+# Modo de datos grandes: por encima de este número de filas los scatters se
+# dibujan como histogramas 2D y los violines con una muestra
+LIMITE_FILAS_GRAFICAS = 100_000
+CELDAS_DENSIDAD = 60
+MAXIMO_CELDAS_ENTERAS = 200
+MUESTRA_DENSIDAD = 20_000
+PUNTOS_DENSIDAD = 200
+SEMILLA_MUESTRA = 0
+
+PANELES = [
+    'histograma_matematicas', 'boxplot_calificaciones', 'dispersion_matematicas_ciencias',
+    'histograma_horas', 'calor_pearson', 'dispersion_horas_matematicas',
+    'barras_aprobados', 'violin_aprobados', 'calor_spearman'
+]
+
+
+# =============================================================================
+# DATOS DE CADA PANEL
+# =============================================================================
+
+def _validos(valores):
+    valores = np.asarray(valores, dtype=np.float64)
+    return valores[~np.isnan(valores)]
+
+
+def _histograma(valores, bins):
+    """Conteos y bordes de un histograma; el panel solo dibuja las barras."""
+    conteos, bordes = np.histogram(_validos(valores), bins=bins)
+    return {'conteos': conteos, 'bordes': bordes}
+
+
+def _recta_tendencia(resumen, correlaciones, x, y):
+    """Extremos de la recta de mínimos cuadrados de y sobre x a partir de
+    medias, desviaciones (PASOS 4 y 5) y correlación de Pearson (PASO 7),
+    sin ajustar ni ordenar los datos otra vez."""
+    medidas_x, medidas_y = resumen.medidas(x), resumen.medidas(y)
+    pendiente = (correlaciones['pearson'].par(x, y)[0]
+                 * medidas_y['Desv. Estándar'] / medidas_x['Desv. Estándar'])
+    extremos = np.array([medidas_x['Mínimo'], medidas_x['Máximo']])
+    return {'x': extremos, 'y': medidas_y['Media'] + pendiente * (extremos - medidas_x['Media'])}
+
+
+def _celdas(serie):
+    """Índice de celda de cada valor válido de `serie` y los bordes de las
+    celdas. Las columnas enteras de rango corto usan una celda por valor
+    (así no quedan celdas vacías entre enteros); el resto, CELDAS_DENSIDAD
+    celdas iguales entre el mínimo y el máximo."""
+    valores = serie.to_numpy(dtype=np.float64)
+    minimo, maximo = np.nanmin(valores), np.nanmax(valores)
+    if pd.api.types.is_integer_dtype(serie.dtype) and maximo - minimo < MAXIMO_CELDAS_ENTERAS:
+        minimo, maximo = minimo - 0.5, maximo + 0.5
+        n_celdas = int(maximo - minimo)
+    else:
+        if minimo == maximo:
+            minimo, maximo = minimo - 0.5, maximo + 0.5
+        n_celdas = CELDAS_DENSIDAD
+    with np.errstate(invalid='ignore'):
+        indices = np.floor((valores - minimo) * (n_celdas / (maximo - minimo)))
+    # El máximo cae en la última celda, como en np.histogram; los nulos quedan en -1
+    indices = np.where(np.isnan(indices), -1, np.minimum(indices, n_celdas - 1)).astype(np.int64)
+    return indices, np.linspace(minimo, maximo, n_celdas + 1)
+
+
+def _densidad(x, y):
+    """Conteos de un histograma 2D de las series `x` e `y`: reemplaza los
+    puntos del scatter cuando hay demasiadas filas para dibujar un marcador
+    por fila. Con celdas iguales basta un `np.bincount`, sin la búsqueda
+    binaria de `np.histogram2d`."""
+    celdas_x, bordes_x = _celdas(x)
+    celdas_y, bordes_y = _celdas(y)
+    n_x, n_y = len(bordes_x) - 1, len(bordes_y) - 1
+    validos = (celdas_x >= 0) & (celdas_y >= 0)
+    conteos = np.bincount(celdas_x[validos] * n_y + celdas_y[validos], minlength=n_x * n_y)
+    return {'conteos': conteos.reshape(n_x, n_y), 'bordes_x': bordes_x, 'bordes_y': bordes_y}
+
+
+def _estadisticas_caja_datos(valores, medidas, etiqueta):
+    """Estadísticas de un box plot (formato de `Axes.bxp`) con los cuartiles
+    del resumen y los bigotes calculados con dos máscaras, sin ordenar la
+    columna. Los atípicos no se dibujan: con millones de filas serían miles
+    de marcadores superpuestos."""
+    valores = _validos(valores)
+    q1, q3 = medidas['Q1 (25%)'], medidas['Q3 (75%)']
+    rango_iq = q3 - q1
+    dentro = valores[(valores >= q1 - 1.5 * rango_iq) & (valores <= q3 + 1.5 * rango_iq)]
+    return {
+        'label': etiqueta,
+        'med': medidas['Mediana'],
+        'q1': q1,
+        'q3': q3,
+        'whislo': dentro.min() if len(dentro) else q1,
+        'whishi': dentro.max() if len(dentro) else q3,
+        'fliers': np.empty(0)
+    }
+
+
+def _estadisticas_violin(valores, generador):
+    """Estadísticas de un violín (formato de `Axes.violin`): la densidad se
+    estima con una muestra aleatoria de tamaño fijo sobre una grilla fija de
+    puntos; media, mediana y extremos salen de todos los datos."""
+    from scipy.stats import gaussian_kde
+
+    valores = _validos(valores)
+    muestra = valores
+    if len(valores) > MUESTRA_DENSIDAD:
+        muestra = valores[generador.choice(len(valores), MUESTRA_DENSIDAD, replace=False)]
+    puntos = np.linspace(valores.min(), valores.max(), PUNTOS_DENSIDAD)
+    return {
+        'coords': puntos,
+        'vals': gaussian_kde(muestra)(puntos),
+        'mean': valores.mean(),
+        'median': np.median(valores),
+        'min': valores.min(),
+        'max': valores.max()
+    }
+
+
+def datos_paneles(df, resumen, correlaciones, limite_filas=LIMITE_FILAS_GRAFICAS):
+    """Diccionario {panel: datos} con solo lo que necesita cada gráfica, a
+    partir de los datos y de los resultados de los PASOS 4 a 8.
+
+    Con más de `limite_filas` filas se pasa al modo de datos grandes: los
+    scatters se dibujan como histogramas 2D, el box plot sin atípicos y los
+    violines con densidades estimadas sobre una muestra. Así el tamaño de
+    los datos de cada panel (y el tiempo de dibujo) no depende de las filas."""
+    matematicas = df['Calificacion_Matematicas'].to_numpy(dtype=np.float64)
+    ciencias = df['Calificacion_Ciencias'].to_numpy(dtype=np.float64)
+    horas = df['Horas_Estudio'].to_numpy(dtype=np.float64)
+    # Con valores faltantes 'Aprobado' es booleano nullable: esas filas no
+    # entran en ninguno de los dos grupos del violín
+    aprobado = df['Aprobado'].to_numpy(dtype=bool, na_value=False)
+    reprobado = (df['Aprobado'] == False).to_numpy(dtype=bool, na_value=False)  # noqa: E712
+    medidas_matematicas = resumen.medidas('Calificacion_Matematicas')
+    datos_grandes = len(df) > limite_filas
+
+    variables_caja = [('Calificacion_Matematicas', 'Matemáticas'), ('Calificacion_Ciencias', 'Ciencias')]
+    if resumen.sketches:
+        # Cuartiles y bigotes desde los sketches KLL, sin ordenar las columnas
+        caja = {'estadisticas': [
+            estadisticas_caja(resumen.sketches[variable], etiqueta)
+            for variable, etiqueta in variables_caja
+        ]}
+    elif datos_grandes:
+        caja = {'estadisticas': [
+            _estadisticas_caja_datos(df[variable].to_numpy(dtype=np.float64), resumen.medidas(variable), etiqueta)
+            for variable, etiqueta in variables_caja
+        ]}
+    else:
+        caja = {'datos': [matematicas, ciencias]}
+
+    dispersion_mat_cie = {
+        'r': correlaciones['pearson'].par('Calificacion_Matematicas', 'Calificacion_Ciencias')[0],
+        'tendencia': _recta_tendencia(resumen, correlaciones, 'Calificacion_Matematicas', 'Calificacion_Ciencias')
+    }
+    dispersion_horas_mat = {
+        'rho': correlaciones['spearman'].par('Calificacion_Matematicas', 'Horas_Estudio')[0]
+    }
+    # Con datos filtrados puede faltar uno de los dos grupos: solo se dibujan los que tienen filas
+    grupos_violin = [(posicion, valores) for posicion, valores in
+                     enumerate([matematicas[aprobado], matematicas[reprobado]], start=1) if len(valores)]
+    violin = {'posiciones': [posicion for posicion, _ in grupos_violin]}
+    if datos_grandes:
+        dispersion_mat_cie['densidad'] = _densidad(df['Calificacion_Matematicas'], df['Calificacion_Ciencias'])
+        dispersion_horas_mat['densidad'] = _densidad(df['Horas_Estudio'], df['Calificacion_Matematicas'])
+        generador = np.random.default_rng(SEMILLA_MUESTRA)
+        violin['estadisticas'] = [_estadisticas_violin(valores, generador) for _, valores in grupos_violin]
+    else:
+        dispersion_mat_cie.update(x=matematicas, y=ciencias)
+        dispersion_horas_mat.update(x=horas, y=matematicas)
+        violin['datos'] = [valores for _, valores in grupos_violin]
+
+    return {
+        'histograma_matematicas': {
+            'histograma': _histograma(matematicas, 15),
+            'media': medidas_matematicas['Media'],
+            'mediana': medidas_matematicas['Mediana']
+        },
+        'boxplot_calificaciones': caja,
+        'dispersion_matematicas_ciencias': dispersion_mat_cie,
+        'histograma_horas': {
+            'histograma': _histograma(horas, 8),
+            'media': resumen.medidas('Horas_Estudio')['Media']
+        },
+        'calor_pearson': {'matriz': correlaciones['pearson'].matriz()},
+        'dispersion_horas_matematicas': dispersion_horas_mat,
+        'barras_aprobados': {
+            # Igual que pd.crosstab, pero sin su costo por fila
+            'conteo': df.groupby(['Nivel_Socioeconomico', 'Aprobado'], observed=True).size()
+                        .unstack(fill_value=0).rename(columns=ETIQUETAS_BOOLEANAS)
+        },
+        'violin_aprobados': violin,
+        'calor_spearman': {'matriz': correlaciones['spearman'].matriz()}
+    }
+
+
+# =============================================================================
+# DIBUJO DE CADA PANEL
+# =============================================================================
+
+def _barras_histograma(ax, histograma, **estilo):
+    bordes = histograma['bordes']
+    ax.hist(bordes[:-1], bins=bordes, weights=histograma['conteos'], **estilo)
+
+
+def _dibujar_densidad(ax, densidad, cmap):
+    from matplotlib.colors import LogNorm
+
+    conteos = np.ma.masked_equal(densidad['conteos'].T, 0)
+    malla = ax.pcolormesh(densidad['bordes_x'], densidad['bordes_y'], conteos, cmap=cmap, norm=LogNorm())
+    ax.figure.colorbar(malla, ax=ax, label='Estudiantes')
+
+
+def _histograma_matematicas(ax, datos):
+    _barras_histograma(ax, datos['histograma'], color='skyblue', edgecolor='black', alpha=0.7)
+    ax.axvline(datos['media'], color='red', linestyle='--', linewidth=2, label='Media')
+    ax.axvline(datos['mediana'], color='green', linestyle='--', linewidth=2, label='Mediana')
+    ax.set_xlabel('Calificación')
+    ax.set_ylabel('Frecuencia')
+    ax.set_title('Distribución de Calificaciones de Matemáticas')
+    ax.legend()
+    ax.grid(True, alpha=0.3)
+
+
+def _boxplot_calificaciones(ax, datos):
+    if 'estadisticas' in datos:
+        ax.bxp(datos['estadisticas'])
+    else:
+        ax.boxplot(datos['datos'])
+        ax.set_xticks([1, 2])
+        ax.set_xticklabels(['Matemáticas', 'Ciencias'])
+    ax.set_ylabel('Calificación')
+    ax.set_title('Box Plot - Comparación de Calificaciones')
+    ax.grid(True, alpha=0.3)
+
+
+def _dispersion_matematicas_ciencias(ax, datos):
+    if 'densidad' in datos:
+        _dibujar_densidad(ax, datos['densidad'], 'Purples')
+    else:
+        ax.scatter(datos['x'], datos['y'], alpha=0.6, s=50, color='purple')
+    ax.set_xlabel('Calificación Matemáticas')
+    ax.set_ylabel('Calificación Ciencias')
+    ax.set_title(f"Correlación Matemáticas vs Ciencias\n(r = {datos['r']:.3f})")
+    # Línea de tendencia
+    ax.plot(datos['tendencia']['x'], datos['tendencia']['y'], "r--", alpha=0.8, linewidth=2)
+    ax.grid(True, alpha=0.3)
+
+
+def _histograma_horas(ax, datos):
+    _barras_histograma(ax, datos['histograma'], color='lightcoral', edgecolor='black', alpha=0.7)
+    ax.axvline(datos['media'], color='red', linestyle='--', linewidth=2, label='Media')
+    ax.set_xlabel('Horas de Estudio')
+    ax.set_ylabel('Frecuencia')
+    ax.set_title('Distribución de Horas de Estudio')
+    ax.legend()
+    ax.grid(True, alpha=0.3)
+
+
+def _mapa_calor(ax, matriz, cmap, titulo):
+    import seaborn as sns
+
+    # El panel mide lo mismo que los demás: los nombres de las variables se
+    # parten en renglones y las celdas ocupan todo el eje (sin square)
+    etiquetas = [str(nombre).replace('_', '\n') for nombre in matriz.columns]
+    sns.heatmap(matriz, annot=True, cmap=cmap, center=0, linewidths=1, fmt='.3f',
+                annot_kws={'fontsize': 9}, xticklabels=etiquetas, yticklabels=etiquetas, ax=ax)
+    ax.tick_params(axis='both', labelsize=8)
+    ax.tick_params(axis='x', labelrotation=0)
+    ax.tick_params(axis='y', labelrotation=0)
+    ax.set_title(titulo)
+
+
+def _calor_pearson(ax, datos):
+    _mapa_calor(ax, datos['matriz'], 'coolwarm', 'Mapa de Calor - Correlación de Pearson')
+
+
+def _dispersion_horas_matematicas(ax, datos):
+    if 'densidad' in datos:
+        _dibujar_densidad(ax, datos['densidad'], 'Greens')
+    else:
+        ax.scatter(datos['x'], datos['y'], alpha=0.6, s=50, color='green')
+    ax.set_xlabel('Horas de Estudio')
+    ax.set_ylabel('Calificación Matemáticas')
+    ax.set_title(f"Horas de Estudio vs Calificación\n(ρ = {datos['rho']:.3f})")
+    ax.grid(True, alpha=0.3)
+
+
+def _barras_aprobados(ax, datos):
+    datos['conteo'].plot(kind='bar', ax=ax, color=['salmon', 'lightgreen'], alpha=0.7)
+    ax.set_xlabel('Nivel Socioeconómico')
+    ax.set_ylabel('Cantidad de Estudiantes')
+    ax.set_title('Distribución de Aprobados por Nivel Socioeconómico')
+    ax.tick_params(axis='x', labelrotation=0)
+    ax.legend(title='Aprobado')
+    ax.grid(True, alpha=0.3, axis='y')
+
+
+def _violin_aprobados(ax, datos):
+    if 'estadisticas' in datos and datos['posiciones']:
+        ax.violin(datos['estadisticas'], positions=datos['posiciones'], showmeans=True, showmedians=True)
+    elif datos['posiciones']:
+        ax.violinplot(datos['datos'], positions=datos['posiciones'], showmeans=True, showmedians=True)
+    ax.set_xticks([1, 2])
+    ax.set_xticklabels(['Aprobado: Sí', 'Aprobado: No'])
+    ax.set_ylabel('Calificación Matemáticas')
+    ax.set_title('Distribución de Calificaciones por Estado de Aprobación')
+    ax.grid(True, alpha=0.3)
+
+
+def _calor_spearman(ax, datos):
+    _mapa_calor(ax, datos['matriz'], 'viridis', 'Mapa de Calor - Correlación de Spearman')
+
+
+_DIBUJAR = {
+    'histograma_matematicas': _histograma_matematicas,
+    'boxplot_calificaciones': _boxplot_calificaciones,
+    'dispersion_matematicas_ciencias': _dispersion_matematicas_ciencias,
+    'histograma_horas': _histograma_horas,
+    'calor_pearson': _calor_pearson,
+    'dispersion_horas_matematicas': _dispersion_horas_matematicas,
+    'barras_aprobados': _barras_aprobados,
+    'violin_aprobados': _violin_aprobados,
+    'calor_spearman': _calor_spearman
+}
+
+
+def _parametros_estilo():
+    """rcParams de ESTILO con el ciclo de colores de PALETA, para aplicarlos
+    con `rc_context` solo mientras se dibuja un panel."""
+    import matplotlib.style
+    import seaborn as sns
+    from cycler import cycler
+
+    parametros = dict(matplotlib.style.library[ESTILO])
+    parametros['axes.prop_cycle'] = cycler(color=sns.color_palette(PALETA))
+    return parametros
+
+
+def _renderizar_panel(panel, datos, formato, dpi):
+    """Dibuja un panel en una figura propia y devuelve sus bytes. Usa la API
+    orientada a objetos (sin el estado global de pyplot) para poder correr
+    en paralelo en varios procesos; dentro de un proceso, `_CANDADO_DIBUJO`
+    evita que dos hilos cambien los rcParams a la vez."""
+    import matplotlib
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+    with _CANDADO_DIBUJO, matplotlib.rc_context(_parametros_estilo()):
+        figura = Figure(figsize=(TAMANO_FIGURA[0] / COLUMNAS, TAMANO_FIGURA[1] / FILAS))
+        FigureCanvasAgg(figura)
+        _DIBUJAR[panel](figura.add_subplot(), datos)
+        figura.tight_layout()
+        buffer = io.BytesIO()
+        # Sin recorte (bbox_inches): todos los paneles miden lo mismo y se
+        # pueden unir en la figura completa
+        figura.savefig(buffer, format=formato, dpi=dpi)
+    return buffer.getvalue()
+
+
+def _renderizar_panel_tarea(argumentos):
+    return _renderizar_panel(*argumentos)
+
+
+# =============================================================================
+# CACHÉ EN DISCO
+# =============================================================================
+
+def _actualizar_huella(sha, valor):
+    """Incorpora a `sha` el contenido de `valor` (arreglos, DataFrames,
+    diccionarios, listas o escalares)."""
+    if isinstance(valor, dict):
+        for clave in sorted(valor):
+            sha.update(repr(clave).encode())
+            _actualizar_huella(sha, valor[clave])
+    elif isinstance(valor, (list, tuple)):
+        sha.update(f"lista{len(valor)}".encode())
+        for elemento in valor:
+            _actualizar_huella(sha, elemento)
+    elif isinstance(valor, (pd.DataFrame, pd.Series)):
+        etiquetas = valor.columns if isinstance(valor, pd.DataFrame) else [valor.name]
+        sha.update(repr((list(etiquetas), list(valor.index))).encode())
+        sha.update(pd.util.hash_pandas_object(valor, index=False).to_numpy().tobytes())
+    elif isinstance(valor, np.ndarray):
+        sha.update(f"{valor.dtype}{valor.shape}".encode())
+        sha.update(np.ascontiguousarray(valor).tobytes())
+    else:
+        sha.update(repr(valor).encode())
+    return sha
+
+
+def clave_panel(panel, datos, formato, dpi):
+    """Clave de caché de un panel: huella de sus datos y de los parámetros."""
+    sha = hashlib.sha256(f"{VERSION_GRAFICAS}|{panel}|{formato}|{dpi}|{ESTILO}|{PALETA}".encode())
+    return _actualizar_huella(sha, datos).hexdigest()
+
+
+def _ruta_cache(directorio, clave, formato):
+    return os.path.join(directorio, f"{clave}.{formato}")
+
+
+def _leer_cache(directorio, clave, formato):
+    ruta = _ruta_cache(directorio, clave, formato)
+    try:
+        with open(ruta, 'rb') as archivo:
+            contenido = archivo.read()
+    except OSError:
+        return None
+    try:
+        # La fecha de modificación marca el último uso (ver limpiar_cache)
+        os.utime(ruta)
+    except OSError:
+        pass
+    return contenido
+
+
+def limpiar_cache(directorio=DIRECTORIO_CACHE, conservar=MAXIMO_ARCHIVOS_CACHE):
+    """Borra los archivos de la caché salvo los `conservar` usados más
+    recientemente (por fecha de modificación). Devuelve las rutas borradas."""
+    try:
+        nombres = os.listdir(directorio)
+    except FileNotFoundError:
+        return []
+    rutas = []
+    for nombre in nombres:
+        if nombre.endswith('.tmp'):
+            continue  # Escrituras en curso
+        ruta = os.path.join(directorio, nombre)
+        try:
+            rutas.append((os.stat(ruta).st_mtime, ruta))
+        except OSError:
+            continue
+    borradas = []
+    for _, ruta in sorted(rutas, reverse=True)[conservar:]:
+        try:
+            os.remove(ruta)
+            borradas.append(ruta)
+        except OSError:
+            # Ya borrado por otro proceso: queda para la próxima limpieza
+            pass
+    return borradas
+
+
+def _escribir_cache(directorio, clave, formato, contenido):
+    try:
+        os.makedirs(directorio, exist_ok=True)
+        ruta = _ruta_cache(directorio, clave, formato)
+        temporal = f"{ruta}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temporal, 'wb') as archivo:
+            archivo.write(contenido)
+        os.replace(temporal, ruta)
+    except OSError:
+        # Sin permisos de escritura: se sigue sin caché
+        return
+    limpiar_cache(directorio, MAXIMO_ARCHIVOS_CACHE)
+
+
+# =============================================================================
+# RENDERIZADO
+# =============================================================================
+
+def renderizar_paneles(entradas, formato='png', dpi=300, procesos=None, usar_cache=True,
+                       directorio_cache=DIRECTORIO_CACHE):
+    """Bytes de cada panel de `entradas` ({panel: datos}). Los paneles que
+    no están en la caché se dibujan en paralelo (`procesos=None` usa un
+    proceso por núcleo; `procesos=1` dibuja todo en este proceso).
+    Devuelve ({panel: bytes}, {panel: clave})."""
+    claves = {panel: clave_panel(panel, datos, formato, dpi) for panel, datos in entradas.items()}
+    resultado = {}
+    if usar_cache:
+        for panel, clave in claves.items():
+            contenido = _leer_cache(directorio_cache, clave, formato)
+            if contenido is not None:
+                resultado[panel] = contenido
+
+    pendientes = [panel for panel in entradas if panel not in resultado]
+    tareas = [(panel, entradas[panel], formato, dpi) for panel in pendientes]
+    procesos = min(procesos or os.cpu_count() or 1, len(tareas)) if tareas else 1
+    if procesos == 1:
+        dibujados = map(_renderizar_panel_tarea, tareas)
+        resultado.update(zip(pendientes, dibujados))
+    else:
+        from paralelo import _contexto_procesos
+
+        with ProcessPoolExecutor(max_workers=procesos, mp_context=_contexto_procesos()) as ejecutor:
+            resultado.update(zip(pendientes, ejecutor.map(_renderizar_panel_tarea, tareas)))
+
+    if usar_cache:
+        for panel in pendientes:
+            _escribir_cache(directorio_cache, claves[panel], formato, resultado[panel])
+    return {panel: resultado[panel] for panel in entradas}, claves
+
+
+def componer_figura(paneles_png, dpi=300):
+    """Une los PNG de los paneles (en el orden de PANELES) en la figura
+    completa de 3 x 3 y devuelve sus bytes PNG."""
+    from PIL import Image
+
+    imagenes = [Image.open(io.BytesIO(paneles_png[panel])) for panel in PANELES]
+    ancho, alto = imagenes[0].size
+    figura = Image.new('RGBA', (ancho * COLUMNAS, alto * FILAS))
+    for posicion, imagen in enumerate(imagenes):
+        fila, columna = divmod(posicion, COLUMNAS)
+        figura.paste(imagen, (columna * ancho, fila * alto))
+    buffer = io.BytesIO()
+    figura.save(buffer, format='png', dpi=(dpi, dpi))
+    return buffer.getvalue()
+
+
+def generar_figura(df, resumen, correlaciones, dpi=300, procesos=None, usar_cache=True,
+                   directorio_cache=DIRECTORIO_CACHE, limite_filas=LIMITE_FILAS_GRAFICAS):
+    """Bytes PNG de la figura completa del PASO 10. Si los datos y los
+    parámetros no cambiaron desde la última vez, se lee de la caché sin
+    dibujar nada."""
+    entradas = datos_paneles(df, resumen, correlaciones, limite_filas)
+    claves = {panel: clave_panel(panel, datos, 'png', dpi) for panel, datos in entradas.items()}
+    clave_figura = hashlib.sha256('|'.join(claves[panel] for panel in PANELES).encode()).hexdigest()
+    if usar_cache:
+        contenido = _leer_cache(directorio_cache, clave_figura, 'png')
+        if contenido is not None:
+            return contenido
+
+    paneles, _ = renderizar_paneles(entradas, 'png', dpi, procesos, usar_cache, directorio_cache)
+    figura = componer_figura(paneles, dpi)
+    if usar_cache:
+        _escribir_cache(directorio_cache, clave_figura, 'png', figura)
+    return figura
@@ -0,0 +1,172 @@
+"""
+RECÁLCULO INCREMENTAL AL AGREGAR FILAS AL CSV
+=========================================================
+
+La tabla de estudiantes crece cada día agregando filas al final del CSV.
+En lugar de repetir todo el análisis, se guarda en disco el EstadoAnalisis
+(momentos, co-momentos, conteos de contingencia y sketches de cuantiles)
+junto con la huella SHA-256 del fragmento del archivo ya procesado.
+
+En la siguiente ejecución:
+- Si el inicio del archivo no cambió, solo se leen y se incorporan las
+  filas nuevas del final.
+- Si cambió alguna fila ya procesada (o los parámetros del análisis), se
+  recalcula todo desde cero.
+
+Solo se persisten líneas completas: una última línea sin salto de línea se
+incluye en los resultados pero se vuelve a leer en la próxima ejecución.
+"""
+
+import copy
+import hashlib
+import io
+import os
+import pickle
+
+import pandas as pd
+
+from acumuladores import LIMITE_CARDINALIDAD, TAMANO_BLOQUE, EstadoAnalisis
+from cuantiles import ERROR_CUANTILES
+
+# Versión del formato del archivo de estado; al cambiarla se recalcula todo
+VERSION_ESTADO = 2
+
+_TAMANO_LECTURA = 1 << 20
+
+
+class _LectorAcotado(io.RawIOBase):
+    """Archivo de solo lectura limitado al rango de bytes [inicio, fin)."""
+
+    def __init__(self, archivo, inicio, fin):
+        self._archivo = archivo
+        self._archivo.seek(inicio)
+        self._restantes = fin - inicio
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        datos = self._archivo.read(min(len(buffer), self._restantes))
+        self._restantes -= len(datos)
+        buffer[:len(datos)] = datos
+        return len(datos)
+
+
+def _actualizar_huella(huella, ruta_archivo, inicio, fin):
+    """Incorpora a `huella` (objeto de hashlib) los bytes [inicio, fin)."""
+    with open(ruta_archivo, 'rb') as archivo:
+        archivo.seek(inicio)
+        restantes = fin - inicio
+        while restantes > 0:
+            datos = archivo.read(min(_TAMANO_LECTURA, restantes))
+            if not datos:
+                break
+            huella.update(datos)
+            restantes -= len(datos)
+    return huella
+
+
+def huella_prefijo(ruta_archivo, n_bytes):
+    """Huella SHA-256 de los primeros `n_bytes` del archivo."""
+    return _actualizar_huella(hashlib.sha256(), ruta_archivo, 0, n_bytes).hexdigest()
+
+
+def _fin_ultima_linea(ruta_archivo, tamano):
+    """Posición justo después del último salto de línea del archivo."""
+    with open(ruta_archivo, 'rb') as archivo:
+        posicion = tamano
+        while posicion > 0:
+            inicio = max(0, posicion - _TAMANO_LECTURA)
+            archivo.seek(inicio)
+            datos = archivo.read(posicion - inicio)
+            indice = datos.rfind(b'\n')
+            if indice >= 0:
+                return inicio + indice + 1
+            posicion = inicio
+    return 0
+
+
+def _leer_rango(ruta_archivo, inicio, fin, columnas, tamano_bloque):
+    """Bloques del CSV entre los bytes `inicio` y `fin`. Con `columnas=None`
+    el rango empieza en el encabezado."""
+    if fin <= inicio:
+        return
+    with open(ruta_archivo, 'rb') as archivo:
+        lector = io.BufferedReader(_LectorAcotado(archivo, inicio, fin))
+        opciones = {'header': 0} if columnas is None else {'header': None, 'names': columnas}
+        yield from pd.read_csv(lector, chunksize=tamano_bloque, **opciones)
+
+
+def _cargar_estado(ruta_estado, parametros):
+    if not os.path.exists(ruta_estado):
+        return None
+    try:
+        with open(ruta_estado, 'rb') as archivo:
+            guardado = pickle.load(archivo)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+        return None
+    if guardado.get('version') != VERSION_ESTADO or guardado.get('parametros') != parametros:
+        return None
+    return guardado
+
+
+def analizar_incremental(ruta_archivo, variables, par_contingencia=('Nivel_Socioeconomico', 'Aprobado'),
+                         ruta_estado=None, tamano_bloque=TAMANO_BLOQUE,
+                         limite_cardinalidad=LIMITE_CARDINALIDAD, error_cuantiles=ERROR_CUANTILES):
+    """Analiza el CSV reutilizando el estado guardado en `ruta_estado`
+    (por defecto `<ruta_archivo>.estado.pkl`) y lo actualiza.
+
+    Devuelve (estado, info), donde info indica el `modo` usado
+    ('incremental', 'completo' o 'sin cambios') y las `filas_nuevas`."""
+    ruta_estado = ruta_estado or f"{ruta_archivo}.estado.pkl"
+    parametros = {
+        'variables': list(variables),
+        'par_contingencia': tuple(par_contingencia),
+        'limite_cardinalidad': limite_cardinalidad,
+        'error_cuantiles': error_cuantiles
+    }
+    tamano = os.path.getsize(ruta_archivo)
+    fin = _fin_ultima_linea(ruta_archivo, tamano)
+
+    guardado = _cargar_estado(ruta_estado, parametros)
+    huella = hashlib.sha256()
+    if guardado is not None and guardado['desplazamiento'] <= fin:
+        _actualizar_huella(huella, ruta_archivo, 0, guardado['desplazamiento'])
+    if guardado is not None and huella.hexdigest() == guardado['huella']:
+        estado, inicio, columnas = guardado['estado'], guardado['desplazamiento'], guardado['columnas']
+        modo = 'incremental'
+    else:
+        estado = EstadoAnalisis(variables, par_contingencia, limite_cardinalidad, error_cuantiles)
+        inicio, columnas = 0, None
+        huella = hashlib.sha256()
+        modo = 'completo'
+
+    filas_previas = estado.n_registros
+    for bloque in _leer_rango(ruta_archivo, inicio, fin, columnas, tamano_bloque):
+        columnas = list(bloque.columns)
+        estado.actualizar(bloque)
+    filas_nuevas = estado.n_registros - filas_previas
+    if modo == 'incremental' and filas_nuevas == 0 and fin == tamano:
+        modo = 'sin cambios'
+
+    if modo != 'sin cambios':
+        temporal = f"{ruta_estado}.tmp"
+        with open(temporal, 'wb') as archivo:
+            pickle.dump({
+                'version': VERSION_ESTADO,
+                'parametros': parametros,
+                'desplazamiento': fin,
+                'huella': _actualizar_huella(huella, ruta_archivo, inicio, fin).hexdigest(),
+                'columnas': columnas,
+                'estado': estado
+            }, archivo, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporal, ruta_estado)
+
+    # Última línea sin salto de línea: se incluye en el resultado, no en el estado
+    if fin < tamano:
+        estado = copy.deepcopy(estado)
+        for bloque in _leer_rango(ruta_archivo, 0 if columnas is None else fin, tamano, columnas, tamano_bloque):
+            estado.actualizar(bloque)
+        filas_nuevas = estado.n_registros - filas_previas
+
+    return estado, {'modo': modo, 'filas_nuevas': filas_nuevas}
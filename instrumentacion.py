@@ -0,0 +1,241 @@
+"""
+INSTRUMENTACIÓN DE LOS PASOS DEL ANÁLISIS
+=========================================================
+
+Registra, para cada PASO de `analisis_estadistico.py` y de `app.py`:
+
+- Tiempo real (reloj de pared) y tiempo de CPU del proceso
+- Memoria residente (RSS) al terminar el paso y pico de RSS del proceso
+  (nunca menor que la RSS actual)
+- Pico de memoria reservada por Python/NumPy durante el paso, por encima de
+  la que ya estaba en uso al empezar (tracemalloc, opcional porque hace más
+  lento el código)
+- Filas procesadas
+
+Opcionalmente perfila con cProfile uno o varios pasos y guarda el perfil
+en un archivo `.prof` (se puede abrir con `snakeviz` o `pstats`).
+
+Al final se muestra una tabla resumen y la traza se guarda en JSON o CSV
+(según la extensión del archivo).
+
+Uso en un script lineal (cada marca cierra el paso anterior):
+
+    instrumentacion = Instrumentacion()
+    instrumentacion.marcar('PASO 1')
+    ...
+    instrumentacion.marcar('PASO 2', filas=len(df))
+    ...
+    instrumentacion.finalizar()
+
+o con un bloque `with instrumentacion.paso('PASO 3'):`. Los pasos medidos
+en otro hilo (trabajos en segundo plano de la app) se agregan con
+`registrar`, sin cerrar el paso en curso.
+"""
+
+import cProfile
+import io
+import json
+import os
+import pstats
+import re
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+import pandas as pd
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - no existe en Windows
+    resource = None
+
+# Columnas de la traza y de la tabla resumen
+COLUMNAS_TRAZA = [
+    'paso', 'segundos', 'segundos_cpu', 'rss_mb', 'rss_pico_mb', 'memoria_python_pico_mb', 'filas'
+]
+
+# Funciones que se muestran del perfil de cProfile
+LINEAS_PERFIL = 15
+
+
+def rss_actual_mb():
+    """Memoria residente actual del proceso en MB (None si no se puede leer)."""
+    try:
+        with open('/proc/self/statm') as archivo:
+            paginas = int(archivo.read().split()[1])
+        return paginas * os.sysconf('SC_PAGE_SIZE') / 2 ** 20
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def rss_pico_mb():
+    """Pico de memoria residente del proceso desde que inició, en MB.
+
+    En Linux se lee VmHWM de /proc/self/status: `ru_maxrss` solo se
+    actualiza en algunos eventos del kernel y puede quedar por debajo de la
+    RSS actual."""
+    try:
+        with open('/proc/self/status') as archivo:
+            for linea in archivo:
+                if linea.startswith('VmHWM:'):
+                    return int(linea.split()[1]) / 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    if resource is None:
+        return None
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux lo informa en KB y macOS en bytes
+    return pico / 2 ** 20 if sys.platform == 'darwin' else pico / 1024
+
+
+def _memoria_residente():
+    """(RSS actual, pico de RSS) en MB; el pico nunca es menor que la actual."""
+    actual, pico = rss_actual_mb(), rss_pico_mb()
+    if actual is not None and pico is not None:
+        pico = max(pico, actual)
+    return actual, pico
+
+
+class Instrumentacion:
+    """Registro de tiempo y memoria por paso. Con `activa=False` todas las
+    llamadas son gratuitas y no se registra nada.
+
+    - memoria_python: mide el pico de tracemalloc de cada paso
+    - perfilar: nombre (o lista de nombres) de los pasos que se perfilan con
+      cProfile; basta con la parte anterior a ':' (por ejemplo 'PASO 10')
+    - directorio_perfiles: dónde se guardan los archivos `.prof`"""
+
+    def __init__(self, activa=True, memoria_python=False, perfilar=None, directorio_perfiles='.'):
+        self.activa = activa
+        self.memoria_python = memoria_python
+        if isinstance(perfilar, str):
+            perfilar = [perfilar]
+        self.perfilar = list(perfilar or [])
+        self.directorio_perfiles = directorio_perfiles
+        self.registros = []
+        self.perfiles = {}
+        self._actual = None
+
+    # -------------------------------------------------------------------------
+    # Registro de pasos
+    # -------------------------------------------------------------------------
+
+    def _debe_perfilar(self, nombre):
+        # 'PASO 1' perfila 'PASO 1: ...' pero no 'PASO 10: ...'
+        return any(nombre == paso or nombre.split(':')[0] == paso.rstrip(':') for paso in self.perfilar)
+
+    def iniciar(self, nombre, filas=None):
+        """Empieza a medir el paso `nombre` (cierra el anterior si lo hay)."""
+        if not self.activa:
+            return
+        self.terminar()
+        if self.memoria_python:
+            if tracemalloc.is_tracing():
+                tracemalloc.reset_peak()
+            else:
+                tracemalloc.start()
+        perfil = None
+        if self._debe_perfilar(nombre):
+            perfil = cProfile.Profile()
+            perfil.enable()
+        self._actual = {
+            'paso': nombre,
+            'filas': filas,
+            'memoria_inicio': tracemalloc.get_traced_memory()[0] if self.memoria_python else 0,
+            'inicio': time.perf_counter(),
+            'inicio_cpu': time.process_time(),
+            'perfil': perfil
+        }
+
+    # En un script lineal cada marca cierra el paso anterior
+    marcar = iniciar
+
+    def registrar_filas(self, filas):
+        """Indica las filas procesadas por el paso en curso."""
+        if self.activa and self._actual is not None:
+            self._actual['filas'] = filas
+
+    def terminar(self):
+        """Cierra el paso en curso y guarda su registro."""
+        if not self.activa or self._actual is None:
+            return
+        actual, self._actual = self._actual, None
+        segundos = time.perf_counter() - actual['inicio']
+        segundos_cpu = time.process_time() - actual['inicio_cpu']
+        if actual['perfil'] is not None:
+            actual['perfil'].disable()
+            self._guardar_perfil(actual['paso'], actual['perfil'])
+        memoria_python = None
+        if self.memoria_python and tracemalloc.is_tracing():
+            memoria_python = (tracemalloc.get_traced_memory()[1] - actual['memoria_inicio']) / 2 ** 20
+        self._agregar(actual['paso'], segundos, segundos_cpu, memoria_python, actual['filas'])
+
+    def registrar(self, nombre, segundos, segundos_cpu=None, filas=None):
+        """Agrega un paso medido por fuera (por ejemplo, un trabajo que corrió
+        en otro hilo) sin cerrar el paso en curso."""
+        if self.activa:
+            self._agregar(nombre, segundos, segundos_cpu, None, filas)
+
+    def _agregar(self, nombre, segundos, segundos_cpu, memoria_python, filas):
+        rss, rss_pico = _memoria_residente()
+        self.registros.append({
+            'paso': nombre,
+            'segundos': segundos,
+            'segundos_cpu': segundos_cpu,
+            'rss_mb': rss,
+            'rss_pico_mb': rss_pico,
+            'memoria_python_pico_mb': memoria_python,
+            'filas': filas
+        })
+
+    @contextmanager
+    def paso(self, nombre, filas=None):
+        """Mide el bloque `with` como un paso."""
+        self.iniciar(nombre, filas)
+        try:
+            yield self
+        finally:
+            self.terminar()
+
+    def finalizar(self):
+        """Cierra el último paso y detiene tracemalloc."""
+        self.terminar()
+        if self.activa and self.memoria_python and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    # -------------------------------------------------------------------------
+    # Perfiles de cProfile
+    # -------------------------------------------------------------------------
+
+    def _guardar_perfil(self, nombre, perfil):
+        os.makedirs(self.directorio_perfiles, exist_ok=True)
+        archivo = re.sub(r'[^\w.-]+', '_', nombre).strip('_') or 'paso'
+        ruta = os.path.join(self.directorio_perfiles, f"perfil_{archivo}.prof")
+        perfil.dump_stats(ruta)
+        self.perfiles[nombre] = ruta
+
+    def texto_perfil(self, nombre, lineas=LINEAS_PERFIL):
+        """Las funciones con más tiempo acumulado del perfil de un paso."""
+        salida = io.StringIO()
+        pstats.Stats(self.perfiles[nombre], stream=salida).sort_stats('cumulative').print_stats(lineas)
+        return salida.getvalue()
+
+    # -------------------------------------------------------------------------
+    # Resultados
+    # -------------------------------------------------------------------------
+
+    def tabla(self):
+        """Tabla resumen con un paso por fila y el porcentaje del tiempo total."""
+        tabla = pd.DataFrame(self.registros, columns=COLUMNAS_TRAZA).astype({'filas': 'Int64'})
+        total = tabla['segundos'].sum()
+        tabla['porcentaje'] = 100 * tabla['segundos'] / total if total > 0 else 0.0
+        return tabla
+
+    def guardar(self, ruta):
+        """Guarda la traza en JSON o, si la ruta termina en `.csv`, en CSV."""
+        if ruta.lower().endswith('.csv'):
+            self.tabla().to_csv(ruta, index=False)
+            return
+        with open(ruta, 'w', encoding='utf-8') as archivo:
+            json.dump({'pasos': self.registros, 'perfiles': self.perfiles}, archivo, indent=2, ensure_ascii=False)
@@ -0,0 +1,76 @@
+"""
+ANÁLISIS PARALELO DE DATOS PARTICIONADOS
+=========================================================
+
+Analiza varios archivos CSV (por ejemplo, uno por sede o país) en paralelo,
+un proceso por archivo, y combina los resultados parciales.
+
+- Map: cada proceso lee su archivo por bloques y devuelve un EstadoAnalisis
+  (momentos, mínimo/máximo, conteos de valores, sketches de cuantiles,
+  co-momentos y conteos de contingencia), que ocupa poca memoria y se
+  envía rápido entre procesos.
+- Reduce: los estados parciales se combinan en un único estado global, del
+  que salen `resumen_completo`, `matriz_correlacion` y `tabla_contingencia`
+  exactamente iguales a los del análisis de todos los archivos juntos.
+"""
+
+import glob
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial, reduce
+
+from acumuladores import LIMITE_CARDINALIDAD, TAMANO_BLOQUE, EstadoAnalisis, analizar_csv_por_bloques
+from cuantiles import ERROR_CUANTILES
+
+
+def expandir_rutas(patrones):
+    """Lista ordenada y sin duplicados de los archivos que coinciden con uno
+    o varios patrones (por ejemplo 'datos/sede_*.csv')."""
+    if isinstance(patrones, (str, os.PathLike)):
+        patrones = [patrones]
+    rutas = set()
+    for patron in patrones:
+        coincidencias = glob.glob(os.fspath(patron))
+        if not coincidencias:
+            raise FileNotFoundError(f"No se encontró ningún archivo para '{patron}'")
+        rutas.update(coincidencias)
+    return sorted(rutas)
+
+
+def _contexto_procesos():
+    # 'fork' permite usar el análisis paralelo desde scripts sin bloque
+    # `if __name__ == '__main__':` (como analisis_estadistico.py); donde no
+    # existe (Windows) se usa el método por defecto del sistema.
+    if 'fork' in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context('fork')
+    return multiprocessing.get_context()
+
+
+def analizar_particiones(rutas, variables, par_contingencia=('Nivel_Socioeconomico', 'Aprobado'),
+                         tamano_bloque=TAMANO_BLOQUE, limite_cardinalidad=LIMITE_CARDINALIDAD,
+                         error_cuantiles=ERROR_CUANTILES, procesos=None):
+    """Analiza cada archivo de `rutas` en un proceso distinto y devuelve el
+    EstadoAnalisis combinado de todos. `procesos=None` usa un proceso por
+    núcleo; con un solo archivo o `procesos=1` todo corre en este proceso."""
+    rutas = list(rutas)
+    if not rutas:
+        return EstadoAnalisis(variables, par_contingencia, limite_cardinalidad, error_cuantiles)
+
+    analizar = partial(
+        analizar_csv_por_bloques,
+        variables=variables,
+        par_contingencia=par_contingencia,
+        tamano_bloque=tamano_bloque,
+        limite_cardinalidad=limite_cardinalidad,
+        error_cuantiles=error_cuantiles
+    )
+    procesos = min(procesos or os.cpu_count() or 1, len(rutas))
+    if procesos == 1:
+        estados = map(analizar, rutas)
+        return reduce(EstadoAnalisis.combinar, estados)
+
+    with ProcessPoolExecutor(max_workers=procesos, mp_context=_contexto_procesos()) as ejecutor:
+        # Los estados se combinan en el orden de `rutas` a medida que llegan
+        estados = ejecutor.map(analizar, rutas)
+        return reduce(EstadoAnalisis.combinar, estados)
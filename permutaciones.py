@@ -0,0 +1,355 @@
+"""
+PRUEBAS DE PERMUTACIÓN Y PRUEBA EXACTA DE FISHER
+=========================================================
+
+Los p-valores de los PASOS 7 a 9 (`stats.pearsonr`, `stats.spearmanr` y
+`stats.chi2_contingency`) son asintóticos y poco fiables con muestras
+pequeñas, como las 50 filas de `estudiantes_datos.csv` o una sola sede.
+Este módulo los recalcula por remuestreo:
+
+- Correlaciones: se permutan las filas de una variable respecto de la otra.
+  Cada lote de permutaciones es una matriz de índices (permutaciones x
+  filas) y los coeficientes de todos los pares en todas las permutaciones
+  del lote salen de un producto de matrices sobre las columnas
+  estandarizadas. Los rangos de Spearman no cambian al permutar: se
+  calculan una sola vez.
+- Chi-cuadrado: las tablas de todas las permutaciones de un lote salen de
+  un solo `np.bincount`; las frecuencias esperadas no cambian al permutar.
+- Parada temprana: después de cada lote se calcula un intervalo de
+  Clopper-Pearson para el p-valor de cada prueba; las pruebas cuyo
+  intervalo queda entero por encima o por debajo de `alfa` dejan de
+  permutarse.
+- Prueba exacta de Fisher para tablas 2xK (o Kx2): suma las
+  probabilidades de todas las tablas con los mismos marginales que no son
+  más probables que la observada.
+
+El p-valor de permutación es (b + 1) / (m + 1), donde b es el número de
+permutaciones al menos tan extremas como lo observado entre las m
+realizadas. La semilla es fija: los resultados se repiten en cada ejecución.
+"""
+
+from dataclasses import dataclass
+from itertools import combinations
+
+import numpy as np
+import pandas as pd
+
+from asociacion import codificar_categoricas, columnas_categoricas
+from correlaciones import p_valores_correlacion
+
+ALFA = 0.05
+PERMUTACIONES_MAXIMAS = 10_000
+PERMUTACIONES_POR_LOTE = 500
+SEMILLA_PERMUTACIONES = 0
+
+# Confianza del intervalo del p-valor con que se decide la parada temprana
+NIVEL_PARADA = 0.999
+
+# Máximo de índices (permutaciones x filas) de un lote en memoria
+INDICES_POR_LOTE = 2_000_000
+
+# Por encima de estas filas los p-valores asintóticos ya son fiables y las
+# permutaciones, costosas (el script no las calcula)
+LIMITE_FILAS_PERMUTACION = 10_000
+
+# Máximo de tablas parciales que enumera la prueba exacta de Fisher
+LIMITE_TABLAS_FISHER = 5_000_000
+
+# Tolerancia relativa al comparar con lo observado: permutaciones con el
+# mismo estadístico en teoría pueden diferir en el último decimal
+_TOLERANCIA = 1e-10
+
+COLUMNAS_PRUEBAS = [
+    'Prueba', 'Variable_1', 'Variable_2', 'Estadistico', 'P_valor_asintotico', 'P_valor', 'Permutaciones', 'N'
+]
+
+
+@dataclass
+class PruebasSignificancia:
+    """Una fila por prueba en `pruebas`: Prueba ('pearson', 'spearman',
+    'chi2' o 'fisher'), Variable_1, Variable_2, Estadistico, P_valor_asintotico,
+    P_valor (por permutación o exacto), Permutaciones (0 en las pruebas
+    exactas) y N."""
+
+    alfa: float
+    pruebas: pd.DataFrame
+
+    def tabla(self, prueba):
+        """Filas de una prueba ('pearson', 'spearman', 'chi2' o 'fisher')."""
+        return self.pruebas[self.pruebas['Prueba'] == prueba].reset_index(drop=True)
+
+    def matriz(self, prueba, medida='P_valor'):
+        """Matriz cuadrada simétrica de `medida` entre las variables de una
+        prueba; la diagonal queda vacía."""
+        filas = self.tabla(prueba)
+        variables = list(dict.fromkeys(list(filas['Variable_1']) + list(filas['Variable_2'])))
+        matriz = pd.DataFrame(np.nan, index=variables, columns=variables)
+        for fila in filas.itertuples(index=False):
+            valor = getattr(fila, medida)
+            matriz.loc[fila.Variable_1, fila.Variable_2] = valor
+            matriz.loc[fila.Variable_2, fila.Variable_1] = valor
+        return matriz
+
+    def significativos(self):
+        """Pruebas con p-valor menor que `alfa`."""
+        return self.pruebas[self.pruebas['P_valor'] < self.alfa]
+
+
+# =============================================================================
+# MOTOR DE PERMUTACIONES
+# =============================================================================
+
+def _decididas(extremos, permutaciones, alfa, nivel=NIVEL_PARADA):
+    """True en las pruebas cuyo p-valor queda, con confianza `nivel`, entero
+    por encima o por debajo de `alfa` (intervalo de Clopper-Pearson)."""
+    from scipy import stats
+
+    cola = (1 - nivel) / 2
+    with np.errstate(divide='ignore', invalid='ignore'):
+        inferior = np.where(extremos > 0,
+                            stats.beta.ppf(cola, np.maximum(extremos, 1), permutaciones - extremos + 1), 0.0)
+        superior = np.where(extremos < permutaciones,
+                            stats.beta.ppf(1 - cola, extremos + 1, np.maximum(permutaciones - extremos, 1)), 1.0)
+    return (superior < alfa) | (inferior > alfa)
+
+
+def _permutar(estadisticos_lote, observados, n, alfa, permutaciones_maximas, permutaciones_por_lote, semilla,
+              parada_temprana):
+    """P-valores por permutación de varias pruebas sobre las mismas n filas.
+
+    `estadisticos_lote(indices, activas)` devuelve el estadístico de cada
+    permutación (filas de `indices`) para las pruebas `activas`, como
+    matriz (permutaciones, pruebas activas); valores mayores son más
+    extremos. Todas las pruebas usan las mismas permutaciones; con
+    `parada_temprana`, las que ya están decididas dejan de calcularse.
+    Devuelve (p-valores, permutaciones realizadas por prueba)."""
+    observados = np.asarray(observados, dtype=np.float64)
+    generador = np.random.default_rng(semilla)
+    extremos = np.zeros(len(observados), dtype=np.int64)
+    permutaciones = np.zeros(len(observados), dtype=np.int64)
+    activas = ~np.isnan(observados)
+    umbral = observados - _TOLERANCIA * np.abs(observados)
+    por_lote = max(1, min(permutaciones_por_lote, INDICES_POR_LOTE // max(n, 1)))
+    realizadas = 0
+    while activas.any() and realizadas < permutaciones_maximas:
+        b = min(por_lote, permutaciones_maximas - realizadas)
+        indices = generador.permuted(np.tile(np.arange(n), (b, 1)), axis=1)
+        posiciones = np.flatnonzero(activas)
+        valores = estadisticos_lote(indices, posiciones)
+        extremos[posiciones] += (valores >= umbral[posiciones]).sum(axis=0)
+        permutaciones[posiciones] += b
+        realizadas += b
+        if parada_temprana:
+            activas[posiciones] &= ~_decididas(extremos[posiciones], permutaciones[posiciones], alfa)
+
+    p_valor = np.where(np.isnan(observados), np.nan, (extremos + 1) / (permutaciones + 1))
+    return p_valor, permutaciones
+
+
+# =============================================================================
+# CORRELACIONES DE PEARSON Y SPEARMAN
+# =============================================================================
+
+def _normalizar(datos):
+    """Columnas centradas y de norma 1: el producto de dos de ellas es su
+    coeficiente de Pearson."""
+    centrados = datos - datos.mean(axis=0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return centrados / np.sqrt((centrados ** 2).sum(axis=0))
+
+
+def _permutar_correlaciones(datos, pares, alfa, permutaciones_maximas, permutaciones_por_lote, semilla,
+                            parada_temprana):
+    """Coeficientes observados, p-valores bilaterales y permutaciones de los
+    `pares` (i, j) de columnas de `datos` (sin nulos); se permuta la
+    segunda variable de cada par."""
+    normalizados = _normalizar(datos)
+    i, j = pares[:, 0], pares[:, 1]
+    r = np.clip(np.einsum('ti,ti->i', normalizados[:, i], normalizados[:, j]), -1.0, 1.0)
+
+    def estadisticos_lote(indices, activas):
+        columnas, posicion = np.unique(j[activas], return_inverse=True)
+        permutadas = normalizados[:, columnas][indices]
+        # productos[b, a, c] = suma_t x[t, a] * y[indices[b, t], c]
+        productos = np.matmul(normalizados.T, permutadas)
+        return np.abs(productos[:, i[activas], posicion])
+
+    p_valor, permutaciones = _permutar(estadisticos_lote, np.abs(r), len(datos), alfa, permutaciones_maximas,
+                                       permutaciones_por_lote, semilla, parada_temprana)
+    return r, p_valor, permutaciones
+
+
+def pruebas_correlacion(df, variables, metodo='pearson', alfa=ALFA, permutaciones_maximas=PERMUTACIONES_MAXIMAS,
+                        permutaciones_por_lote=PERMUTACIONES_POR_LOTE, semilla=SEMILLA_PERMUTACIONES,
+                        parada_temprana=True):
+    """Prueba de permutación del coeficiente de Pearson o Spearman de todos
+    los pares de `variables` (bilateral). Sin nulos, todos los pares se
+    permutan a la vez; con nulos, cada par usa sus filas completas."""
+    variables = list(variables)
+    datos = df[variables].to_numpy(dtype=np.float64)
+    pares = np.array(list(combinations(range(len(variables)), 2)), dtype=np.int64).reshape(-1, 2)
+
+    from scipy.stats import rankdata
+
+    def preparar(bloque):
+        return rankdata(bloque, axis=0) if metodo == 'spearman' else bloque
+
+    nulos = np.isnan(datos)
+    if not nulos.any():
+        n = np.full(len(pares), len(datos))
+        r, p_valor, permutaciones = _permutar_correlaciones(preparar(datos), pares, alfa, permutaciones_maximas,
+                                                            permutaciones_por_lote, semilla, parada_temprana)
+    else:
+        n = np.zeros(len(pares), dtype=np.int64)
+        r, p_valor = np.full(len(pares), np.nan), np.full(len(pares), np.nan)
+        permutaciones = np.zeros(len(pares), dtype=np.int64)
+        for k, (a, b) in enumerate(pares):
+            filas = ~(nulos[:, a] | nulos[:, b])
+            n[k] = filas.sum()
+            if n[k] < 3:
+                continue
+            resultado = _permutar_correlaciones(preparar(datos[filas][:, [a, b]]), np.array([[0, 1]]), alfa,
+                                                permutaciones_maximas, permutaciones_por_lote, semilla,
+                                                parada_temprana)
+            r[k], p_valor[k], permutaciones[k] = (valor[0] for valor in resultado)
+
+    return pd.DataFrame({
+        'Prueba': metodo,
+        'Variable_1': [variables[a] for a in pares[:, 0]],
+        'Variable_2': [variables[b] for b in pares[:, 1]],
+        'Estadistico': r,
+        'P_valor_asintotico': p_valores_correlacion(r, n),
+        'P_valor': p_valor,
+        'Permutaciones': permutaciones,
+        'N': n
+    }, columns=COLUMNAS_PRUEBAS)
+
+
+# =============================================================================
+# CHI-CUADRADO Y PRUEBA EXACTA DE FISHER
+# =============================================================================
+
+def _chi2(observados, esperados):
+    return ((observados - esperados) ** 2 / esperados).sum(axis=(-2, -1))
+
+
+def prueba_chi2_permutacion(filas, columnas, alfa=ALFA, permutaciones_maximas=PERMUTACIONES_MAXIMAS,
+                            permutaciones_por_lote=PERMUTACIONES_POR_LOTE, semilla=SEMILLA_PERMUTACIONES,
+                            parada_temprana=True):
+    """Prueba de independencia por permutación con el Chi-cuadrado (sin
+    corrección) de dos variables codificadas como enteros 0..k-1, sin
+    nulos. Devuelve (tabla observada sin filas ni columnas vacías, Chi2,
+    p-valor, permutaciones)."""
+    filas = np.unique(filas, return_inverse=True)[1].ravel()
+    columnas = np.unique(columnas, return_inverse=True)[1].ravel()
+    k1, k2 = int(filas.max(initial=-1)) + 1, int(columnas.max(initial=-1)) + 1
+    n = len(filas)
+    observados = np.bincount(filas * k2 + columnas, minlength=k1 * k2).reshape(k1, k2)
+    if k1 < 2 or k2 < 2:
+        return observados, 0.0, 1.0, 0
+    esperados = np.outer(observados.sum(axis=1), observados.sum(axis=0)) / n
+    chi2 = _chi2(observados, esperados)
+    base = filas * k2
+
+    def estadisticos_lote(indices, activas):
+        b = len(indices)
+        celdas = base + columnas[indices] + (k1 * k2 * np.arange(b))[:, None]
+        tablas = np.bincount(celdas.ravel(), minlength=b * k1 * k2).reshape(b, k1, k2)
+        return _chi2(tablas, esperados)[:, None]
+
+    p_valor, permutaciones = _permutar(estadisticos_lote, [chi2], n, alfa, permutaciones_maximas,
+                                       permutaciones_por_lote, semilla, parada_temprana)
+    return observados, chi2, float(p_valor[0]), int(permutaciones[0])
+
+
+def _log_combinaciones(n, k):
+    from scipy.special import gammaln
+
+    return gammaln(n + 1) - gammaln(k + 1) - gammaln(n - k + 1)
+
+
+def fisher_exacto(tabla):
+    """P-valor bilateral exacto de Fisher (Freeman-Halton) de una tabla 2xK
+    o Kx2. Las tablas con los mismos marginales se enumeran columna a
+    columna (primera fila de cada columna), descartando las sumas parciales
+    que ya no pueden completar el marginal."""
+    tabla = np.asarray(tabla, dtype=np.int64)
+    if tabla.ndim != 2 or 2 not in tabla.shape:
+        raise ValueError(f"La prueba exacta de Fisher requiere una tabla 2xK o Kx2 (recibida {tabla.shape})")
+    if tabla.shape[0] != 2:
+        tabla = tabla.T
+    tabla = tabla[:, tabla.sum(axis=0) > 0]
+    totales_columna = tabla.sum(axis=0)
+    total_fila, n = int(tabla[0].sum()), int(totales_columna.sum())
+    if tabla.shape[1] < 2 or total_fila in (0, n):
+        return 1.0
+
+    log_total = _log_combinaciones(n, total_fila)
+    log_observada = _log_combinaciones(totales_columna, tabla[0]).sum() - log_total
+
+    sumas, log_probabilidades = np.zeros(1, dtype=np.int64), np.zeros(1)
+    restante = n
+    for total in totales_columna:
+        restante -= total
+        celda = np.arange(total + 1)
+        sumas = (sumas[:, None] + celda).ravel()
+        log_probabilidades = (log_probabilidades[:, None] + _log_combinaciones(total, celda)).ravel()
+        posibles = (sumas <= total_fila) & (sumas + restante >= total_fila)
+        sumas, log_probabilidades = sumas[posibles], log_probabilidades[posibles]
+        if len(sumas) > LIMITE_TABLAS_FISHER:
+            raise ValueError("Tabla demasiado grande para la prueba exacta de Fisher: use la prueba de permutación")
+
+    log_probabilidades -= log_total
+    # Misma tolerancia relativa que R y scipy para tablas igual de probables
+    no_mas_probables = log_probabilidades <= log_observada + np.log1p(1e-7)
+    return float(min(1.0, np.exp(log_probabilidades[no_mas_probables]).sum()))
+
+
+def pruebas_asociacion(df, columnas=None, alfa=ALFA, permutaciones_maximas=PERMUTACIONES_MAXIMAS,
+                       permutaciones_por_lote=PERMUTACIONES_POR_LOTE, semilla=SEMILLA_PERMUTACIONES,
+                       parada_temprana=True):
+    """Chi-cuadrado por permutación de todos los pares de `columnas` (por
+    defecto, `columnas_categoricas(df)`, como `calcular_asociaciones`) y,
+    en las tablas 2xK, la prueba exacta de Fisher."""
+    from scipy import stats
+
+    if columnas is None:
+        columnas = columnas_categoricas(df)
+    columnas = list(columnas)
+    codigos, _ = codificar_categoricas(df, columnas)
+
+    filas = []
+    for a, b in combinations(range(len(columnas)), 2):
+        validas = (codigos[:, a] >= 0) & (codigos[:, b] >= 0)
+        n = int(validas.sum())
+        observados, chi2, p_valor, permutaciones = prueba_chi2_permutacion(
+            codigos[validas, a], codigos[validas, b], alfa, permutaciones_maximas, permutaciones_por_lote, semilla,
+            parada_temprana)
+        asintotico = stats.chi2_contingency(observados)[1] if min(observados.shape) > 1 else 1.0
+        filas.append(['chi2', columnas[a], columnas[b], chi2, asintotico, p_valor, permutaciones, n])
+        if 2 in observados.shape and min(observados.shape) > 1:
+            try:
+                p_fisher = fisher_exacto(observados)
+            except ValueError:
+                continue  # Tabla demasiado grande: queda solo el p-valor por permutación
+            filas.append(['fisher', columnas[a], columnas[b], np.nan, asintotico, p_fisher, 0, n])
+    return pd.DataFrame(filas, columns=COLUMNAS_PRUEBAS).astype({'Permutaciones': np.int64, 'N': np.int64})
+
+
+# =============================================================================
+# TODAS LAS PRUEBAS
+# =============================================================================
+
+def calcular_pruebas(df, variables, columnas_categoricas=None, alfa=ALFA,
+                     permutaciones_maximas=PERMUTACIONES_MAXIMAS, permutaciones_por_lote=PERMUTACIONES_POR_LOTE,
+                     semilla=SEMILLA_PERMUTACIONES, parada_temprana=True):
+    """Pruebas de permutación de Pearson y Spearman para todos los pares de
+    `variables` y de Chi-cuadrado (más Fisher en tablas 2xK) para todos los
+    pares de columnas categóricas. Con `parada_temprana=False` todas las
+    pruebas hacen `permutaciones_maximas` permutaciones."""
+    opciones = dict(alfa=alfa, permutaciones_maximas=permutaciones_maximas,
+                    permutaciones_por_lote=permutaciones_por_lote, semilla=semilla,
+                    parada_temprana=parada_temprana)
+    tablas = [pruebas_correlacion(df, variables, metodo, **opciones) for metodo in ('pearson', 'spearman')]
+    tablas.append(pruebas_asociacion(df, columnas_categoricas, **opciones))
+    return PruebasSignificancia(alfa=alfa, pruebas=pd.concat(tablas, ignore_index=True))
@@ -0,0 +1,21 @@
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+DIRECTORIO_REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, DIRECTORIO_REPO)
+
+from esquema import aplicar_esquema  # noqa: E402
+
+
+@pytest.fixture
+def datos_crudos():
+    """El CSV de ejemplo tal como se lee, sin aplicar el esquema."""
+    return pd.read_csv(os.path.join(DIRECTORIO_REPO, 'estudiantes_datos.csv'))
+
+
+@pytest.fixture
+def datos(datos_crudos):
+    return aplicar_esquema(datos_crudos)
@@ -0,0 +1,28 @@
+import numpy as np
+import pandas as pd
+
+from asociacion import MAXIMO_CATEGORIAS, calcular_asociaciones, columnas_categoricas
+
+
+def _con_campos_de_encuesta(datos):
+    generador = np.random.default_rng(0)
+    return datos.assign(
+        Region=generador.choice(['Norte', 'Sur', 'Centro'], len(datos)),
+        Turno=pd.array(generador.choice(['Manana', 'Tarde'], len(datos)), dtype='string'),
+        Codigo=[f"c{i % (MAXIMO_CATEGORIAS + 1)}" for i in range(len(datos))]
+    )
+
+
+def test_columnas_categoricas_incluye_texto_de_baja_cardinalidad(datos):
+    df = _con_campos_de_encuesta(datos)
+
+    # 'Estudiante' es un identificador (un valor por fila) y 'Codigo' pasa del máximo
+    assert columnas_categoricas(df) == ['Nivel_Socioeconomico', 'Aprobado', 'Region', 'Turno']
+
+
+def test_cribado_usa_columnas_de_texto(datos):
+    asociaciones = calcular_asociaciones(_con_campos_de_encuesta(datos))
+
+    pares = set(zip(asociaciones.pares['Variable_1'], asociaciones.pares['Variable_2']))
+    assert ('Region', 'Turno') in pares
+    assert len(pares) == 6
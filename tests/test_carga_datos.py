@@ -0,0 +1,33 @@
+import io
+
+import pandas as pd
+import pytest
+
+from carga_datos import abrir_columnar, convertir_a_columnar
+from esquema import VARIABLES_NUMERICAS
+
+pytest.importorskip('pyarrow')
+
+
+def _convertir(df, tmp_path):
+    ruta = str(tmp_path / 'datos.arrow')
+    convertir_a_columnar(io.BytesIO(df.to_csv(index=False).encode()), ruta)
+    return abrir_columnar(ruta)
+
+
+def test_columnar_conserva_booleano_con_nulos(datos_crudos, datos, tmp_path):
+    crudos = datos_crudos.astype({'Aprobado': object})
+    crudos.loc[3, 'Aprobado'] = None
+    df = _convertir(crudos, tmp_path)
+
+    assert df['Aprobado'].dtype == 'boolean'
+    assert df['Aprobado'].isna().sum() == 1
+    pd.testing.assert_series_equal(df['Aprobado'].drop(3), datos['Aprobado'].drop(3).astype('boolean'))
+
+
+def test_columnar_sin_nulos_mismos_tipos(datos_crudos, datos, tmp_path):
+    df = _convertir(datos_crudos, tmp_path)
+
+    assert df['Aprobado'].dtype == bool
+    assert df['Nivel_Socioeconomico'].dtype == datos['Nivel_Socioeconomico'].dtype
+    pd.testing.assert_frame_equal(df[VARIABLES_NUMERICAS], datos[VARIABLES_NUMERICAS].astype(float))
@@ -0,0 +1,39 @@
+import numpy as np
+
+import graficas
+from correlaciones import calcular_correlaciones
+from esquema import VARIABLES_NUMERICAS, aplicar_esquema
+from estadisticas import calcular_resumen
+
+
+def test_violin_sin_filas_con_aprobado_faltante(datos_crudos):
+    crudos = datos_crudos.astype({'Aprobado': object})
+    crudos.loc[[0, 1], 'Aprobado'] = None
+    df = aplicar_esquema(crudos)
+    assert df['Aprobado'].dtype == 'boolean'
+
+    paneles = graficas.datos_paneles(df, calcular_resumen(df, VARIABLES_NUMERICAS),
+                                     calcular_correlaciones(df, VARIABLES_NUMERICAS))
+
+    grupos = paneles['violin_aprobados']['datos']
+    matematicas = df['Calificacion_Matematicas'].to_numpy(dtype=np.float64)
+    # Las filas sin 'Aprobado' no caen en ninguno de los dos grupos
+    assert sum(len(grupo) for grupo in grupos) == len(df) - 2
+    np.testing.assert_array_equal(grupos[0], matematicas[(df['Aprobado'] == True).fillna(False).to_numpy()])  # noqa: E712
+    np.testing.assert_array_equal(grupos[1], matematicas[(df['Aprobado'] == False).fillna(False).to_numpy()])  # noqa: E712
+
+
+def test_cache_de_graficas_no_pasa_del_maximo(datos, tmp_path, monkeypatch):
+    monkeypatch.setattr(graficas, 'MAXIMO_ARCHIVOS_CACHE', 12)
+    resumen = calcular_resumen(datos, VARIABLES_NUMERICAS)
+    correlaciones = calcular_correlaciones(datos, VARIABLES_NUMERICAS)
+
+    # Tres subconjuntos distintos (como tres combinaciones de filtros en la app)
+    for nivel in ['Bajo', 'Medio', 'Alto']:
+        df = datos[datos['Nivel_Socioeconomico'] != nivel]
+        graficas.generar_figura(df, resumen, correlaciones, dpi=20, procesos=1, directorio_cache=str(tmp_path))
+        assert len(list(tmp_path.iterdir())) <= 12
+
+    # La última figura se conservó: se lee de la caché sin volver a dibujar
+    monkeypatch.setattr(graficas, 'renderizar_paneles', None)
+    graficas.generar_figura(df, resumen, correlaciones, dpi=20, procesos=1, directorio_cache=str(tmp_path))
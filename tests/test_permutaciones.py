@@ -0,0 +1,17 @@
+import pytest
+
+import permutaciones
+from permutaciones import fisher_exacto, pruebas_asociacion
+
+
+def test_fisher_requiere_tabla_2xk():
+    with pytest.raises(ValueError, match='2xK'):
+        fisher_exacto([[5], [3], [2]])
+
+
+def test_fisher_demasiado_grande_deja_la_permutacion(datos, monkeypatch):
+    monkeypatch.setattr(permutaciones, 'LIMITE_TABLAS_FISHER', 1)
+
+    pruebas = pruebas_asociacion(datos, ['Nivel_Socioeconomico', 'Aprobado'], permutaciones_maximas=200)
+
+    assert list(pruebas['Prueba']) == ['chi2']
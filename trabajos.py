@@ -0,0 +1,152 @@
+"""
+TRABAJOS EN SEGUNDO PLANO
+=========================================================
+
+Ejecuta las secciones pesadas de la app (correlaciones, Chi-cuadrado y
+pruebas exactas, figura del PASO 10) en un grupo de hilos compartido por
+todas las sesiones de Streamlit, para que la página se muestre sin
+esperarlas y cada sección se complete cuando termina su trabajo.
+
+- El identificador de un trabajo sale de su sección y su clave (huella de
+  los datos y parámetros). Una solicitud igual a un trabajo pendiente, en
+  curso o terminado reutiliza ese trabajo, aunque venga de otra sesión.
+- Cada trabajo guarda las sesiones que esperan su resultado. Cuando una
+  sesión pide otro trabajo para la misma sección (cambió sus entradas),
+  suelta el anterior; si ninguna otra sesión lo espera y todavía no
+  empezó, se cancela.
+- Se conservan los `MAXIMO_TERMINADOS` trabajos terminados más recientes,
+  para que las recargas de la página los muestren al instante.
+- Cada trabajo mide su propio tiempo real y de CPU (del hilo que lo
+  ejecuta), para la instrumentación de la app.
+
+Un hilo no se puede interrumpir: un trabajo que ya empezó termina aunque
+nadie lo espere, y su resultado queda guardado.
+"""
+
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+
+# Hilos del grupo compartido (al menos 2: la figura no bloquea las demás
+# secciones) y trabajos terminados que se conservan
+HILOS_TRABAJOS = max(2, os.cpu_count() or 1)
+MAXIMO_TERMINADOS = 32
+
+ESTADOS_TRABAJO = ['pendiente', 'en_curso', 'terminado', 'error', 'cancelado']
+
+
+@dataclass
+class Trabajo:
+    """Un trabajo enviado al grupo de hilos; `futuro` es su
+    `concurrent.futures.Future`. `segundos`, `segundos_cpu` y `terminado`
+    (fecha, en segundos desde epoch) se completan cuando termina de
+    ejecutarse."""
+
+    id: str
+    seccion: str
+    futuro: object
+    sesiones: set = field(default_factory=set)
+    segundos: float = None
+    segundos_cpu: float = None
+    terminado: float = None
+
+    @property
+    def estado(self):
+        if self.futuro.cancelled():
+            return 'cancelado'
+        if not self.futuro.done():
+            return 'en_curso' if self.futuro.running() else 'pendiente'
+        return 'error' if self.futuro.exception() is not None else 'terminado'
+
+    def resultado(self, timeout=None):
+        """Resultado del trabajo (espera hasta `timeout` segundos); relanza
+        la excepción si el trabajo falló."""
+        return self.futuro.result(timeout)
+
+
+def _ejecutar_medido(trabajo, funcion, argumentos, opciones):
+    inicio, inicio_cpu = time.perf_counter(), time.thread_time()
+    try:
+        return funcion(*argumentos, **opciones)
+    finally:
+        trabajo.segundos = time.perf_counter() - inicio
+        trabajo.segundos_cpu = time.thread_time() - inicio_cpu
+        trabajo.terminado = time.time()
+
+
+def identificador_trabajo(seccion, clave):
+    """Identificador estable de un trabajo: la sección y un resumen de su
+    clave (una tupla de textos y números)."""
+    return f"{seccion}-{hashlib.sha1(repr(clave).encode()).hexdigest()[:12]}"
+
+
+class GestorTrabajos:
+    """Grupo de hilos con trabajos deduplicados por clave y cancelables por
+    sesión. Es seguro usarlo desde varias sesiones a la vez."""
+
+    def __init__(self, hilos=HILOS_TRABAJOS, maximo_terminados=MAXIMO_TERMINADOS):
+        self.maximo_terminados = maximo_terminados
+        self._ejecutor = ThreadPoolExecutor(max_workers=hilos, thread_name_prefix='trabajo')
+        self._candado = threading.Lock()
+        self._trabajos = OrderedDict()  # id -> Trabajo, del uso más antiguo al más reciente
+        self._por_sesion = {}  # (sesión, sección) -> id del último trabajo pedido
+
+    def enviar(self, seccion, clave, funcion, *argumentos, sesion=None, **opciones):
+        """Trabajo que calcula `funcion(*argumentos, **opciones)` para
+        `seccion` y `clave`: el ya existente con esa clave o uno nuevo. Si
+        `sesion` había pedido otro trabajo para `seccion`, lo suelta."""
+        id_trabajo = identificador_trabajo(seccion, clave)
+        with self._candado:
+            trabajo = self._trabajos.get(id_trabajo)
+            if trabajo is None or trabajo.estado in ('error', 'cancelado'):
+                trabajo = Trabajo(id_trabajo, seccion, None)
+                trabajo.futuro = self._ejecutor.submit(_ejecutar_medido, trabajo, funcion, argumentos, opciones)
+                self._trabajos[id_trabajo] = trabajo
+                self._descartar_terminados()
+            self._trabajos.move_to_end(id_trabajo)
+            if sesion is not None:
+                anterior = self._por_sesion.get((sesion, seccion))
+                if anterior not in (None, id_trabajo):
+                    self._soltar(anterior, sesion)
+                self._por_sesion[(sesion, seccion)] = id_trabajo
+                trabajo.sesiones.add(sesion)
+        return trabajo
+
+    def soltar(self, sesion, seccion):
+        """La sesión ya no espera su trabajo de `seccion`. Devuelve True si
+        el trabajo se canceló (nadie más lo esperaba y no había empezado)."""
+        with self._candado:
+            id_trabajo = self._por_sesion.pop((sesion, seccion), None)
+            return id_trabajo is not None and self._soltar(id_trabajo, sesion)
+
+    def trabajos(self):
+        """Lista (id, sección, estado, sesiones) de los trabajos guardados."""
+        with self._candado:
+            return [(t.id, t.seccion, t.estado, len(t.sesiones)) for t in self._trabajos.values()]
+
+    def _soltar(self, id_trabajo, sesion):
+        trabajo = self._trabajos.get(id_trabajo)
+        if trabajo is None:
+            return False
+        trabajo.sesiones.discard(sesion)
+        if not trabajo.sesiones and trabajo.futuro.cancel():
+            del self._trabajos[id_trabajo]
+            return True
+        return False
+
+    def _descartar_terminados(self):
+        terminados = [id_trabajo for id_trabajo, trabajo in self._trabajos.items() if trabajo.futuro.done()]
+        for id_trabajo in terminados[:max(0, len(terminados) - self.maximo_terminados)]:
+            del self._trabajos[id_trabajo]
+
+
+def esperar_primeros(trabajos, timeout):
+    """Los trabajos de `trabajos` que terminaron (o ya estaban terminados)
+    dentro de `timeout` segundos."""
+    por_futuro = {trabajo.futuro: trabajo for trabajo in trabajos}
+    terminados, _ = wait(por_futuro, timeout=timeout, return_when=FIRST_COMPLETED)
+    return [por_futuro[futuro] for futuro in terminados]